@@ -0,0 +1,161 @@
+import os, json, math, time
+from datetime import datetime, timezone
+
+import config_store
+from botlog import get_logger
+
+log = get_logger("analytics")
+
+ANALYTICS_FILE = "analytics.json"
+DAILY_RETENTION = 400  # days of per-day buckets to keep
+
+# log-spaced duration buckets: bucket 0 is < 60s, then each edge is 1.2x the previous (~68 buckets to 180 days)
+_HIST_BASE = 60.0
+_HIST_GROWTH = 1.2
+_HIST_BUCKETS = 70
+
+def _bucket(seconds: float) -> int:
+    if seconds < _HIST_BASE:
+        return 0
+    return min(_HIST_BUCKETS - 1, 1 + int(math.log(seconds / _HIST_BASE, _HIST_GROWTH)))
+
+def _bucket_upper(i: int) -> float:
+    return _HIST_BASE * (_HIST_GROWTH ** i)
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+def _new_hist() -> dict:
+    return {"n": 0, "sum": 0.0, "b": {}}
+
+def hist_add(h: dict, seconds: float) -> None:
+    seconds = max(0.0, float(seconds))
+    h["n"] += 1; h["sum"] += seconds
+    k = str(_bucket(seconds)); h["b"][k] = h["b"].get(k, 0) + 1
+
+def hist_mean(h: dict) -> float | None:
+    return (h["sum"] / h["n"]) if h.get("n") else None
+
+def hist_percentile(h: dict, p: float) -> float | None:
+    # upper edge of the bucket holding the p-th value (≤20% overestimate by construction)
+    n = h.get("n") or 0
+    if not n:
+        return None
+    rank, seen = max(1, math.ceil(n * p / 100.0)), 0
+    for k in sorted(h["b"], key=int):
+        seen += h["b"][k]
+        if seen >= rank:
+            return _bucket_upper(int(k))
+    return _bucket_upper(_HIST_BUCKETS - 1)
+
+def _new_counters() -> dict:
+    return {"created": 0, "closed": 0, "open": 0, "time_to_close": _new_hist(), "first_reply": _new_hist()}
+
+class TicketAnalytics:
+    """Rolling per-guild ticket aggregates, updated as events happen.
+
+    Nothing here ever re-reads history: each event bumps counters, a duration
+    histogram (for mean/percentiles) and a per-day bucket, so /stats is O(1)-ish.
+    """
+    def __init__(self, path: str = ANALYTICS_FILE):
+        self.path = path
+        self.data: dict = self._load()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path): return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning("analytics load failed: %s: %s", type(e).__name__, e)
+            return {}
+
+    def save(self) -> None:
+        config_store.write_json(self.path, self.data, indent=None)
+
+    def _guild(self, guild_id: int) -> dict:
+        g = self.data.setdefault(str(guild_id), {})
+        g.setdefault("all", _new_counters())
+        g.setdefault("types", {})
+        g.setdefault("daily", {})
+        g.setdefault("status", {})
+        return g
+
+    def _scopes(self, guild_id: int, type_label: str | None) -> tuple[dict, list[dict]]:
+        g = self._guild(guild_id)
+        scopes = [g["all"]]
+        if type_label:
+            scopes.append(g["types"].setdefault(type_label, _new_counters()))
+        return g, scopes
+
+    def _daily(self, g: dict, ts: float, key: str) -> None:
+        days = g["daily"]
+        d = days.setdefault(_day(ts), {"created": 0, "closed": 0})
+        d[key] = d.get(key, 0) + 1
+        if len(days) > DAILY_RETENTION:
+            for old in sorted(days)[:len(days) - DAILY_RETENTION]:
+                days.pop(old, None)
+
+    # ---------- events ----------
+    def ticket_created(self, guild_id: int, type_label: str | None, ts: float) -> None:
+        g, scopes = self._scopes(guild_id, type_label)
+        for c in scopes: c["created"] += 1; c["open"] += 1
+        self._daily(g, ts, "created")
+        self.save()
+
+    def first_staff_reply(self, guild_id: int, type_label: str | None, open_time: float, ts: float) -> None:
+        _, scopes = self._scopes(guild_id, type_label)
+        for c in scopes: hist_add(c["first_reply"], ts - open_time)
+        self.save()
+
+    def status_changed(self, guild_id: int, value: str) -> None:
+        st = self._guild(guild_id)["status"]
+        st[value] = st.get(value, 0) + 1
+        self.save()
+
+    def ticket_closed(self, guild_id: int, type_label: str | None, open_time: float | None, ts: float, timed: bool = True) -> None:
+        # timed=False: noticed gone (deleted by hand / reconcile), possibly long after; counts but adds no time-to-close
+        g, scopes = self._scopes(guild_id, type_label)
+        for c in scopes:
+            c["closed"] += 1; c["open"] = max(0, c["open"] - 1)
+            if open_time and timed: hist_add(c["time_to_close"], ts - float(open_time))
+        self._daily(g, ts, "closed")
+        self.save()
+
+    def resync_backlog(self, open_tickets: dict) -> None:
+        # open counts are the one thing that can drift while the bot is down; recount from the live records
+        counts: dict[int, dict[str | None, int]] = {}
+        for rec in (open_tickets or {}).values():
+            gid = rec.get("guild_id")
+            if gid is None: continue
+            per = counts.setdefault(gid, {})
+            per[rec.get("type")] = per.get(rec.get("type"), 0) + 1
+        for gid_s in list(self.data.keys()) + [str(g) for g in counts if str(g) not in self.data]:
+            gid = int(gid_s); g = self._guild(gid); per = counts.get(gid, {})
+            g["all"]["open"] = sum(per.values())
+            for label, c in g["types"].items(): c["open"] = per.get(label, 0)
+            for label, n in per.items():
+                if label and label not in g["types"]:
+                    g["types"][label] = _new_counters(); g["types"][label]["open"] = n
+        self.save()
+
+    # ---------- read ----------
+    def summary(self, guild_id: int, days: int = 7) -> dict:
+        g = self._guild(guild_id)
+        def view(c: dict) -> dict:
+            ttc, fr = c["time_to_close"], c["first_reply"]
+            return {"created": c["created"], "closed": c["closed"], "open": c["open"],
+                    "ttc_mean": hist_mean(ttc), "ttc_p50": hist_percentile(ttc, 50), "ttc_p90": hist_percentile(ttc, 90),
+                    "reply_p50": hist_percentile(fr, 50), "reply_p90": hist_percentile(fr, 90)}
+        now = time.time()
+        recent = [_day(now - 86400 * i) for i in range(max(1, days))]
+        daily = [(d, g["daily"].get(d, {}).get("created", 0), g["daily"].get(d, {}).get("closed", 0)) for d in recent]
+        return {"all": view(g["all"]), "types": {k: view(v) for k, v in g["types"].items()},
+                "daily": daily, "status": dict(g["status"])}
+
+def fmt_duration(seconds: float | None) -> str:
+    if seconds is None: return "—"
+    seconds = int(seconds)
+    if seconds < 3600: return f"{max(1, seconds // 60)}m"
+    if seconds < 86400: return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
@@ -0,0 +1,168 @@
+import discord
+import asyncio, heapq, time
+
+from botlog import ctx, get_logger
+from config_model import CONFIGS
+from member_cache import SUPPORT_MEMBERS
+
+log = get_logger("assign")
+
+POOL_TTL = 300.0   # seconds before an eligible-staff list is re-read from the roles
+
+class _StaffPool:
+    # staff eligible for one role set, as a heap of (load, last busy, user id);
+    # entries go stale when a load changes and are skipped (and dropped) on pick
+    __slots__ = ("members", "heap", "built")
+
+    def __init__(self, members: set[int], built: float):
+        self.members = members
+        self.heap: list[tuple[int, float, int]] = []
+        self.built = built
+
+class StaffWorkload:
+    """Live workload per staff member, for routing each new ticket to one person.
+
+    Load is the number of open tickets assigned to (or claimed by) someone; ties go
+    to whoever was given work least recently. Every change pushes a fresh heap entry,
+    so picking the least-loaded eligible member is O(log n) amortized. An assigned
+    ticket with no staff reply after the configured time escalates to the roles.
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self._load: dict[tuple[int, int], int] = {}       # (guild, user) -> open assigned tickets
+        self._busy: dict[tuple[int, int], float] = {}     # (guild, user) -> last assignment/claim
+        self._pools: dict[int, dict[frozenset[int], _StaffPool]] = {}  # guild -> role set -> eligible staff
+        self._timers: dict[int, asyncio.TimerHandle] = {}  # channel id -> pending escalation
+        self._tasks: set[asyncio.Task] = set()
+        for rec in manager.open_tickets.values():
+            if rec.get("assignee"):
+                k = (rec.get("guild_id"), rec["assignee"])
+                self._load[k] = self._load.get(k, 0) + 1
+                self._busy[k] = max(self._busy.get(k, 0.0), float(rec.get("assigned_at") or 0))
+
+    def start(self) -> None:
+        # re-arm escalations that were waiting when the bot stopped
+        now = time.time()
+        for cid, rec in self.manager.open_tickets.items():
+            if rec.get("assignee") and not rec.get("first_staff_reply") and not rec.get("escalated") and int(cid) not in self._timers:
+                model = CONFIGS.get_or_none(rec.get("guild_id") or 0)
+                if model and model.assignment_enabled:
+                    due = float(rec.get("assigned_at") or now) + model.assignment_escalate_minutes * 60
+                    self._arm(int(cid), max(1.0, due - now))
+
+    def load_of(self, guild_id: int, user_id: int) -> int:
+        return self._load.get((guild_id, user_id), 0)
+
+    # ---------- index ----------
+    def _key(self, guild_id: int, user_id: int) -> tuple[int, float, int]:
+        k = (guild_id, user_id)
+        return self._load.get(k, 0), self._busy.get(k, 0.0), user_id
+
+    def _touch(self, guild_id: int, user_id: int) -> None:
+        entry = self._key(guild_id, user_id)
+        for pool in self._pools.get(guild_id, {}).values():
+            if user_id in pool.members:
+                heapq.heappush(pool.heap, entry)
+                if len(pool.heap) > 4 * len(pool.members) + 16:  # too many stale entries; rebuild
+                    pool.heap = [self._key(guild_id, u) for u in pool.members]; heapq.heapify(pool.heap)
+
+    async def _pool(self, guild: discord.Guild, role_ids) -> _StaffPool:
+        roles = frozenset(role_ids)
+        pools = self._pools.setdefault(guild.id, {})
+        pool = pools.get(roles)
+        if pool is None or time.monotonic() - pool.built > POOL_TTL:
+            members = set(await SUPPORT_MEMBERS.member_ids(guild, roles))
+            me = getattr(guild, "me", None)
+            if me is not None: members.discard(me.id)
+            pool = pools[roles] = _StaffPool(members, time.monotonic())
+            pool.heap = [self._key(guild.id, u) for u in members]; heapq.heapify(pool.heap)
+        return pool
+
+    async def pick(self, guild: discord.Guild, role_ids, exclude: int | None = None) -> int | None:
+        """The least-loaded staff member holding any of `role_ids` (not `exclude`), or None."""
+        pool = await self._pool(guild, role_ids)
+        held = None
+        try:
+            while pool.heap:
+                entry = pool.heap[0]
+                if entry[2] not in pool.members or entry != self._key(guild.id, entry[2]):
+                    heapq.heappop(pool.heap); continue  # stale
+                if entry[2] == exclude:
+                    held = heapq.heappop(pool.heap); continue
+                return entry[2]
+            return None
+        finally:
+            if held is not None: heapq.heappush(pool.heap, held)
+
+    # ---------- changes ----------
+    def assign(self, channel_id: int, user_id: int, escalate_after: float | None = None) -> None:
+        rec = self.manager.open_tickets.get(str(channel_id))
+        if rec is None or rec.get("assignee") == user_id:
+            return
+        if rec.get("assignee"): self._release(rec)
+        gid, now = rec.get("guild_id"), time.time()
+        rec["assignee"], rec["assigned_at"] = user_id, now
+        self._load[(gid, user_id)] = self._load.get((gid, user_id), 0) + 1
+        self._busy[(gid, user_id)] = now
+        self._touch(gid, user_id)
+        self.manager.save_tickets()
+        if escalate_after: self._arm(channel_id, escalate_after)
+
+    def _release(self, rec: dict) -> None:
+        k = (rec.get("guild_id"), rec.get("assignee"))
+        left = self._load.get(k, 0) - 1
+        if left > 0: self._load[k] = left
+        else: self._load.pop(k, None)
+        self._touch(*k)
+
+    def ticket_removed(self, channel_id: int, rec: dict) -> None:
+        self._cancel(channel_id)
+        if rec.get("assignee"): self._release(rec)
+
+    def staff_replied(self, channel_id: int, rec: dict, user_id: int, claim: bool) -> None:
+        # first staff reply: no escalation needed; an unrouted ticket counts as claimed by them
+        self._cancel(channel_id)
+        if claim and not rec.get("assignee"):
+            self.assign(channel_id, user_id)
+
+    # ---------- escalation ----------
+    def _arm(self, channel_id: int, delay: float) -> None:
+        self._cancel(channel_id)
+        loop = asyncio.get_running_loop()
+        self._timers[channel_id] = loop.call_later(delay, self._fire, channel_id)
+
+    def _cancel(self, channel_id: int) -> None:
+        h = self._timers.pop(channel_id, None)
+        if h: h.cancel()
+
+    def _fire(self, channel_id: int) -> None:
+        self._timers.pop(channel_id, None)
+        task = asyncio.create_task(self._escalate(channel_id))
+        self._tasks.add(task); task.add_done_callback(self._tasks.discard)
+
+    async def _escalate(self, channel_id: int) -> None:
+        rec = self.manager.open_tickets.get(str(channel_id))
+        if rec is None or rec.get("first_staff_reply") or rec.get("escalated"):
+            return
+        guild = self.manager.bot.get_guild(rec.get("guild_id") or 0)
+        channel = guild.get_channel(channel_id) if guild else None
+        model = CONFIGS.get_or_none(guild.id) if guild else None
+        if channel is None or model is None:
+            return
+        rec["escalated"] = True; self.manager.save_tickets()
+        ttype = model.type(rec.get("type"))
+        roles = list(dict.fromkeys((ttype.support_role_ids if ttype else ()) + model.support_role_ids))
+        where = ctx(guild_id=guild.id, channel_id=channel_id, ticket=rec.get("number"), assignee=rec.get("assignee"))
+        try:
+            exclude = list(dict.fromkeys(model.no_mention_role_ids + (ttype.no_mention_role_ids if ttype else ())))
+            mentions = " ".join(self.manager._support_mentions(guild, roles, exclude, self.manager.mentions_allowed(guild.id)))
+            minutes = round(model.assignment_escalate_minutes)
+            await channel.send(f"{mentions + ' ' if mentions else ''}No staff reply after {minutes} min, "
+                               f"<@{rec['assignee']}> may be away. Can someone else pick this up?")
+            log.info("ticket escalated to roles", extra=where)
+        except Exception as e:
+            log.warning("escalation failed: %s: %s", type(e).__name__, e, extra=where)
+        # the rest of the team joins the notes thread now
+        thread = guild.get_thread(rec.get("notes_thread_id") or 0)
+        if thread is not None:
+            await self.manager._add_thread_staff(thread, roles, where)
@@ -0,0 +1,114 @@
+import asyncio, hashlib, os, tempfile
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from botlog import ctx, get_logger
+
+log = get_logger("archive")
+
+ARCHIVE_FOLDER = "attachments"
+MAX_REMEMBERED_URLS = 5000
+# only discord's own cdn/media proxy is fetched; link-preview urls can point anywhere
+ARCHIVE_HOSTS = ("cdn.discordapp.com", "media.discordapp.net", "images-ext-1.discordapp.net", "images-ext-2.discordapp.net")
+
+def archivable(url: str) -> bool:
+    try: parts = urlsplit(url)
+    except ValueError: return False
+    return parts.scheme == "https" and (parts.hostname or "") in ARCHIVE_HOSTS
+
+def _ext_for(url: str) -> str:
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    return ext if (0 < len(ext) <= 8 and ext[1:].isalnum()) else ""
+
+class AttachmentArchiver:
+    """Downloads transcript media into a local content-addressed store.
+
+    Files land at <folder>/<sha256[:2]>/<sha256><ext>, so the same screenshot or
+    avatar is stored once no matter how many tickets reference it. Downloads run
+    in the background with bounded concurrency; callers wait only as long as they
+    choose and fall back to the original URL for anything still in flight.
+    """
+    def __init__(self, folder: str = ARCHIVE_FOLDER, concurrency: int = 4, timeout: float = 30.0,
+                 max_bytes: int = 50 * 1024 * 1024, session: aiohttp.ClientSession | None = None, allowed=archivable):
+        self.folder = folder
+        self.accepts = allowed             # url -> may it be fetched (tests point this at a local server)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._session = session            # inject one (e.g. pointed at a local test server) or we make our own
+        self._owns_session = session is None
+        self._sem: asyncio.Semaphore | None = None
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._archived: OrderedDict[str, str] = OrderedDict()  # url -> stored path
+
+    def _session_or_new(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        for t in list(self._tasks.values()): t.cancel()
+        if self._owns_session and self._session and not self._session.closed:
+            await self._session.close()
+
+    def submit(self, url: str) -> None:
+        # start (or reuse) a download; never blocks
+        if not url or url in self._archived or url in self._tasks or not self.accepts(url):
+            return
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        self._tasks[url] = asyncio.create_task(self._download(url))
+
+    def _remember(self, url: str, path: str) -> None:
+        self._archived[url] = path; self._archived.move_to_end(url)
+        while len(self._archived) > MAX_REMEMBERED_URLS:
+            self._archived.popitem(last=False)
+
+    async def _download(self, url: str) -> str | None:
+        try:
+            async with self._sem:
+                os.makedirs(self.folder, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.folder, suffix=".part")
+                digest, size = hashlib.sha256(), 0
+                try:
+                    with os.fdopen(fd, "wb") as out:
+                        async with self._session_or_new().get(url) as resp:
+                            if resp.status != 200:
+                                return None
+                            if (resp.content_length or 0) > self.max_bytes:
+                                return None
+                            async for chunk in resp.content.iter_chunked(64 * 1024):
+                                size += len(chunk)
+                                if size > self.max_bytes:
+                                    return None
+                                digest.update(chunk); out.write(chunk)
+                    h = digest.hexdigest()
+                    final = os.path.join(self.folder, h[:2], h + _ext_for(url))
+                    if os.path.exists(final):
+                        os.remove(tmp)  # already archived from another ticket
+                    else:
+                        os.makedirs(os.path.dirname(final), exist_ok=True)
+                        os.replace(tmp, final)
+                    tmp = None
+                    self._remember(url, final)
+                    return final
+                finally:
+                    if tmp and os.path.exists(tmp):
+                        os.remove(tmp)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("archive download failed: %s: %s", type(e).__name__, e, extra=ctx(url=url))
+            return None
+        finally:
+            self._tasks.pop(url, None)
+
+    async def wait_for(self, urls: list[str], timeout: float) -> dict[str, str]:
+        # url -> stored path for everything that finished in time; the rest keep downloading
+        pending = [self._tasks[u] for u in urls if u in self._tasks]
+        if pending and timeout > 0:
+            await asyncio.wait(pending, timeout=timeout)
+        return {u: self._archived[u] for u in urls if u in self._archived}
@@ -0,0 +1,82 @@
+import difflib
+from collections import Counter
+
+import config_store
+
+MAX_CHOICES = 25  # discord's cap per autocomplete response
+
+class LabelIndex:
+    """Prefix + fuzzy index over one guild's ticket-type labels."""
+    __slots__ = ("labels", "lowered", "prefixes")
+
+    def __init__(self, labels: tuple[str, ...]):
+        self.labels = labels
+        self.lowered = tuple(l.lower() for l in labels)
+        # prefix of the whole label -> tier 1, prefix of a later word -> tier 2
+        self.prefixes: dict[str, dict[int, int]] = {}
+        for i, low in enumerate(self.lowered):
+            for w, word in enumerate(low.split()):
+                tier = 1 if w == 0 else 2
+                for n in range(1, len(word) + 1):
+                    slot = self.prefixes.setdefault(word[:n], {})
+                    slot[i] = min(slot.get(i, tier), tier)
+            for n in range(1, len(low) + 1):
+                self.prefixes.setdefault(low[:n], {})[i] = 1
+
+    def _subsequence(self, query: str, low: str) -> bool:
+        it = iter(low)
+        return all(ch in it for ch in query)
+
+    def match(self, query: str) -> dict[int, int]:
+        # label index -> tier (0 exact, 1 prefix, 2 word prefix, 3 substring, 4 subsequence, 5 typo)
+        q = query.strip().lower()
+        if not q:
+            return {i: 1 for i in range(len(self.labels))}
+        hits = dict(self.prefixes.get(q, {}))
+        for i, low in enumerate(self.lowered):
+            if low == q:
+                hits[i] = 0
+            elif i in hits:
+                continue
+            elif q in low:
+                hits[i] = 3
+            elif self._subsequence(q, low):
+                hits[i] = 4
+            elif difflib.SequenceMatcher(None, q, low[:len(q) + 2]).ratio() >= 0.6:
+                hits[i] = 5
+        return hits
+
+class TicketTypeAutocomplete:
+    """Per-guild label cache for /intake autocomplete.
+
+    The index is rebuilt only when the set of ticket-type labels changes;
+    results rank by match quality first, then by how often each type is opened.
+    """
+    def __init__(self):
+        self._index: dict[int, tuple[tuple, LabelIndex]] = {}   # guild_id -> (config version, index)
+        self._usage: dict[int, Counter] = {}
+
+    def _labels_for(self, guild_id: int) -> LabelIndex:
+        ver = config_store.version(guild_id)
+        hit = self._index.get(guild_id)
+        if hit and hit[0] == ver:
+            return hit[1]
+        cfg = config_store.guild_config(guild_id)
+        labels = tuple(dict.fromkeys(str(t.get("label")) for t in (cfg.get("ticket_types") or []) if t.get("label")))
+        index = hit[1] if (hit and hit[1].labels == labels) else LabelIndex(labels)
+        self._index[guild_id] = (ver, index)
+        return index
+
+    def note_use(self, guild_id: int, label: str) -> None:
+        self._usage.setdefault(guild_id, Counter())[label] += 1
+
+    def suggest(self, guild_id: int | None, current: str, limit: int = MAX_CHOICES) -> list[str]:
+        if guild_id is None:
+            return []
+        index = self._labels_for(guild_id)
+        usage = self._usage.get(guild_id) or Counter()
+        hits = index.match(current or "")
+        ranked = sorted(hits.items(), key=lambda kv: (kv[1], -usage[index.labels[kv[0]]], len(index.labels[kv[0]]), index.labels[kv[0]]))
+        return [index.labels[i] for i, _ in ranked[:limit]]
+
+TYPE_LABELS = TicketTypeAutocomplete()
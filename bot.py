@@ -3,8 +3,12 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio, os, sys, json
 
+import config_store
+from botlog import apply_levels, ctx, get_logger, setup_logging, shutdown_logging
+from config_model import CONFIGS
 from ticket_manager import TicketManager
 from config_commands import setup as setup_config_commands
+from member_cache import member_cache_settings, bot_member_options
 
 CONFIG_FILE = "main_config.json"
 if not os.path.exists(CONFIG_FILE):
@@ -17,12 +21,22 @@ TOKEN = (_cfg.get("token") or "").strip()
 if not TOKEN:
     raise ValueError("Token not found in main_config.json.")
 
+# queue-backed logging (main_config.json "logging": level, format, file, per-subsystem levels)
+setup_logging()
+log = get_logger("bot")
+panel_log = get_logger("panel")
+watch_log = get_logger("watcher")
+event_log = get_logger("events")
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 intents.messages = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# member cache strategy (main_config.json "member_cache"): none / full / lean
+_member_cache = member_cache_settings()
+bot = commands.Bot(command_prefix="!", intents=intents, **bot_member_options(intents, _member_cache))
+log.info("member cache mode: %s", _member_cache["mode"])
 ticket_manager = TicketManager(bot)
 bot.ticket_manager = ticket_manager
 
@@ -48,12 +62,12 @@ async def _tm_interaction_check(interaction: discord.Interaction) -> bool:
 
 try:
     bot.tree.interaction_check = _tm_interaction_check  # type: ignore[attr-defined]
-    print("✅ Attached global interaction_check for test mode")
+    log.info("attached global interaction_check for test mode")
 except Exception as e:
-    print(f"⚠️ Could not attach interaction_check: {type(e).__name__}: {e}")
+    log.warning("could not attach interaction_check: %s: %s", type(e).__name__, e)
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
+    log.info("logged in as %s (ID: %s)", bot.user, bot.user.id)
 
     # Read test-mode once for startup decisions
     with open(CONFIG_FILE, "r", encoding="utf-8") as f:
@@ -68,45 +82,56 @@ async def on_ready():
     try:
         setup_config_commands(bot)
         await ticket_manager.register_persistent_views()
-        print("✅ Commands/views registered")
+        log.info("commands/views registered")
     except Exception as e:
-        print(f"❌ setup error: {type(e).__name__}: {e}")
+        log.error("setup error: %s: %s", type(e).__name__, e)
 
     # 2) Sync commands (robust: timeout + per-guild fallback)
     synced_global = False
     try:
         await asyncio.wait_for(bot.tree.sync(), timeout=20)
-        print("✅ Synced commands globally")
+        log.info("synced commands globally")
         synced_global = True
     except asyncio.TimeoutError:
-        print("⏳ Global sync timed out; falling back to per-guild sync…")
+        log.warning("global sync timed out; falling back to per-guild sync")
     except Exception as e:
-        print(f"❌ Global sync failed: {type(e).__name__}: {e}")
+        log.error("global sync failed: %s: %s", type(e).__name__, e)
 
     for g in bot.guilds:
         try:
             await asyncio.wait_for(bot.tree.sync(guild=discord.Object(id=g.id)), timeout=12)
-            print(f"✅ Synced commands to {g.name} ({g.id})")
+            log.info("synced commands to %s", g.name, extra=ctx(guild_id=g.id))
         except asyncio.TimeoutError:
-            print(f"⏳ Per-guild sync timed out for {g.name} ({g.id})")
+            log.warning("per-guild sync timed out for %s", g.name, extra=ctx(guild_id=g.id))
         except Exception as e:
-            print(f"❌ Per-guild sync failed in {g.name}: {type(e).__name__}: {e}")
+            log.error("per-guild sync failed in %s: %s: %s", g.name, type(e).__name__, e, extra=ctx(guild_id=g.id))
 
     # 3) Re-post the panel where allowed (auto-deletes old one)
     for guild in bot.guilds:
         try:
             if tm_enabled and tm_guild_ids and guild.id not in tm_guild_ids:
-                print(f"⏭️ Test mode: skipping panel in {guild.name} ({guild.id})")
+                panel_log.info("test mode: skipping panel in %s", guild.name, extra=ctx(guild_id=guild.id))
                 continue
             cfg = ticket_manager.get_config(guild.id)
+            if CONFIGS.check(guild.id):
+                continue  # invalid config; errors are logged by the config model
             ch = guild.get_channel(cfg.get("panel_channel_id"))
             if ch:
                 await ticket_manager.send_ticket_panel_to_channel(ch)
-                print(f"✅ Sent panel to #{getattr(ch,'name','?')} in {guild.name}")
+                panel_log.info("sent panel to #%s in %s", getattr(ch, "name", "?"), guild.name, extra=ctx(guild_id=guild.id, channel_id=ch.id))
         except Exception as e:
-            print(f"⚠️ Panel refresh error in {guild.name}: {type(e).__name__}: {e}")
-
-    # 4) Start the watcher (reload panels on config edits; restart on code edits)
+            panel_log.warning("panel refresh error in %s: %s: %s", guild.name, type(e).__name__, e, extra=ctx(guild_id=guild.id))
+
+    # 4) Reconcile open_tickets against live channels now, then periodically
+    ticket_manager.reconciler.start()
+    # pending transcript uploads (including ones left over from before a restart)
+    ticket_manager.deliveries.start()
+    # keep standby ticket channels topped up for guilds with warm_pool enabled
+    ticket_manager.warm_pool.start()
+    # re-arm escalation timers for routed tickets nobody has answered yet
+    ticket_manager.workload.start()
+
+    # 5) Start the watcher (reload panels on config edits; restart on code edits)
     asyncio.create_task(_watch_files())
 
 def _sanitize_cfg_for_panel(d: dict) -> dict:
@@ -136,17 +161,22 @@ async def _watch_files():
     def tracked_all():
         return [CONFIG_FILE] + code_files + tracked_cfg()
 
-    def load_json_safe(p):
-        try:
-            with open(p, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return None
-
-    code_files = ["bot.py", "ticket_manager.py", "config_commands.py"]
+    def guild_of(p):
+        # configs/<guild id>.json; None for default.json
+        stem = os.path.splitext(os.path.basename(p))[0]
+        return int(stem) if stem.isdigit() else None
+
+    code_files = ["bot.py", "ticket_manager.py", "config_commands.py", "status_scheduler.py",
+                  "config_store.py", "permissions.py", "autocomplete.py",
+                  "panel_ui.py", "intake_store.py", "analytics.py",
+                  "transcripts.py", "attachment_archive.py", "ratelimit.py",
+                  "member_cache.py", "botlog.py", "config_model.py", "reconcile.py",
+                  "category_pool.py", "transcript_delivery.py",
+                  "warm_pool.py", "assignment.py", "dashboard.py",
+                  "departures.py"]
     last_mtime = mtimes(tracked_all())
-    cfg_snapshot = {p: _sanitize_cfg_for_panel(load_json_safe(p) or {}) for p in tracked_cfg()}
-    print("👀 Watcher started.")
+    cfg_snapshot = {gid: _sanitize_cfg_for_panel(config_store.guild_config(gid)) for gid in map(guild_of, tracked_cfg()) if gid}
+    watch_log.info("watcher started")
 
     while True:
         await asyncio.sleep(2.0)
@@ -154,39 +184,46 @@ async def _watch_files():
 
         # code changes → restart
         if any(p in current and p in last_mtime and current[p] != last_mtime[p] for p in code_files):
-            print("♻️ Code change detected. Restarting…")
+            watch_log.info("code change detected, restarting")
             try:
+                await ticket_manager.shutdown()
                 await bot.close()
             except:
                 pass
+            config_store.flush()  # execl skips atexit; write queued saves and flush the log queue first
+            shutdown_logging()
             os.execl(sys.executable, sys.executable, *sys.argv)
             return
 
         # main_config.json changed
         if CONFIG_FILE in current and CONFIG_FILE in last_mtime and current[CONFIG_FILE] != last_mtime[CONFIG_FILE]:
-            print("🔄 main_config.json changed. New settings will apply to new interactions.")
-
-        # config changes → refresh panel only if meaningful fields changed
-        for path in list(cfg_snapshot.keys()) + [p for p in tracked_cfg() if p not in cfg_snapshot]:
-            if path not in current:
-                continue
-            if path in last_mtime and current.get(path) == last_mtime.get(path):
-                continue
-
-            new_cfg_raw = load_json_safe(path) or {}
-            new_sanitized = _sanitize_cfg_for_panel(new_cfg_raw)
-            old_sanitized = cfg_snapshot.get(path)
-            cfg_snapshot[path] = new_sanitized
-            last_mtime[path] = current.get(path)
+            apply_levels()
+            watch_log.info("main_config.json changed; new settings apply to new interactions")
+
+        # config changes → refresh panel only if the effective config changed in a meaningful way.
+        # a default.json edit reaches every guild that doesn't override the field
+        changed = [p for p in tracked_cfg() if p in current and current[p] != last_mtime.get(p)]
+        for p in changed:
+            last_mtime[p] = current[p]
+        if config_store.DEFAULT_CONFIG_FILE in changed:
+            gids = {guild_of(p) for p in tracked_cfg()} | set(cfg_snapshot)
+        else:
+            gids = {guild_of(p) for p in changed}
+        gids.discard(None)
+        for gid in sorted(gids):
+            new_sanitized = _sanitize_cfg_for_panel(config_store.guild_config(gid))
+            old_sanitized = cfg_snapshot.get(gid)
+            cfg_snapshot[gid] = new_sanitized
 
             if new_sanitized == old_sanitized:
                 continue  # only ticket number counters changed
 
             try:
-                gid = int(os.path.splitext(os.path.basename(path))[0])
                 guild = bot.get_guild(gid)
                 if not guild:
                     continue
+                if CONFIGS.check(gid):
+                    continue  # rejected edit: errors are logged, the last good panel stays up
 
                 with open(CONFIG_FILE, "r", encoding="utf-8") as _f:
                     _tm = (json.load(_f).get("test_mode") or {})
@@ -201,26 +238,61 @@ async def _watch_files():
                 ch_id = cfg.get("panel_channel_id")
                 ch = guild.get_channel(ch_id) if ch_id else None
                 if not ch:
-                    print(f"⚠️ Config changed for {gid} but panel channel missing.")
+                    panel_log.warning("config changed but panel channel missing", extra=ctx(guild_id=gid))
                     continue
 
                 async for msg in ch.history(limit=50):
                     if msg.author.id == bot.user.id:
                         await msg.delete()
                 await ticket_manager.send_ticket_panel_to_channel(ch)
-                print(f"🔁 Refreshed panel in {guild.name} after config edit.")
+                panel_log.info("refreshed panel in %s after config edit", guild.name, extra=ctx(guild_id=gid, channel_id=ch.id))
             except Exception as e:
-                print(f"⚠️ Panel refresh failed for {path}: {type(e).__name__}: {e}")
+                panel_log.warning("panel refresh failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=gid))
+
+@bot.listen("on_message")
+async def _ticket_activity(message: discord.Message):
+    try:
+        ticket_manager.note_message(message)
+    except Exception as e:
+        event_log.warning("on_message failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=message.guild.id if message.guild else None, channel_id=message.channel.id))
+
+@bot.listen("on_guild_channel_create")
+async def _channel_created(channel: discord.abc.GuildChannel):
+    ticket_manager.categories.channel_created(channel)
+
+@bot.listen("on_guild_channel_update")
+async def _channel_updated(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    ticket_manager.categories.channel_moved(before, after)
+
+@bot.listen("on_guild_channel_delete")
+async def _ticket_channel_deleted(channel: discord.abc.GuildChannel):
+    ticket_manager.categories.channel_deleted(channel)
+    # deleted by hand: drop the record right away instead of waiting for reconciliation
+    if ticket_manager.is_ticket(channel.id) and channel.id not in ticket_manager.closing:
+        ticket_manager.forget_ticket(channel.id)
+        event_log.info("ticket channel deleted outside the bot", extra=ctx(guild_id=channel.guild.id, channel_id=channel.id))
 
 @bot.event
-async def on_member_remove(member: discord.Member):
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    # raw event: fires even when the member was never cached (lean member-cache mode).
+    # only buffered here; their tickets are closed (with transcript) in paced batches
     try:
-        await ticket_manager.autoclose_if_opener(member)
+        ticket_manager.departures.member_left(payload.guild_id, payload.user.id)
     except Exception as e:
-        print(f"[⚠️ on_member_remove] {type(e).__name__}: {e}")
+        event_log.warning("on_member_remove failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=payload.guild_id, user_id=payload.user.id))
+
+async def _main():
+    try:
+        await bot.start(TOKEN)
+    finally:
+        await ticket_manager.shutdown()
+        if not bot.is_closed():
+            await bot.close()
 
 def run():
-    asyncio.run(bot.start(TOKEN))
+    # guild files from before overrides were sparse are rewritten once (originals kept in configs/legacy/)
+    config_store.migrate_overlays()
+    asyncio.run(_main())
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,105 @@
+import atexit, json, logging, logging.handlers, queue, sys, time
+
+import config_store
+
+ROOT_LOGGER = "ticketbot"
+# main_config.json "logging" block
+DEFAULT_LOGGING = {"level": "INFO", "format": "json", "file": "", "subsystems": {}}
+LOG_FORMATS = ("json", "text")
+
+def get_logger(subsystem: str) -> logging.Logger:
+    # one logger per subsystem ("tickets", "panel", "watcher", ...) so each can get its own level
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+def ctx(**fields) -> dict:
+    # extra= payload for structured fields (guild_id, channel_id, ticket, stage, ms, ...); None is dropped
+    return {"ctx": {k: v for k, v in fields.items() if v is not None}}
+
+def _subsystem(record: logging.LogRecord) -> str:
+    return record.name[len(ROOT_LOGGER) + 1:] if record.name.startswith(ROOT_LOGGER + ".") else record.name
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {"ts": round(record.created, 3), "level": record.levelname, "subsystem": _subsystem(record), "msg": record.getMessage()}
+        out.update(getattr(record, "ctx", None) or {})
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        extra = " ".join(f"{k}={v}" for k, v in (getattr(record, "ctx", None) or {}).items())
+        return f"{stamp} {record.levelname:<7} [{_subsystem(record)}] {record.getMessage()}" + (f"  {extra}" if extra else "")
+
+class StageTimer:
+    """Wall time per stage of one operation (ticket create, close, ...), in ms."""
+    __slots__ = ("started", "_last", "stages")
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+def logging_settings() -> dict:
+    out = dict(DEFAULT_LOGGING)
+    out.update(config_store.main_config().get("logging") or {})
+    if out["format"] not in LOG_FORMATS: out["format"] = "json"
+    return out
+
+def _level(name, default=logging.INFO) -> int:
+    lvl = logging.getLevelName(str(name).upper())
+    return lvl if isinstance(lvl, int) else default
+
+_listener: logging.handlers.QueueListener | None = None
+_configured_subsystems: set[str] = set()
+
+def apply_levels(settings: dict | None = None) -> None:
+    # safe to call again at runtime (main_config.json edits); subsystems removed from config fall back to the root level
+    settings = settings or logging_settings()
+    logging.getLogger().setLevel(_level(settings["level"]))
+    wanted = {str(k): v for k, v in (settings.get("subsystems") or {}).items()}
+    for name in _configured_subsystems - set(wanted):
+        _logger_for(name).setLevel(logging.NOTSET)
+    for name, lvl in wanted.items():
+        _logger_for(name).setLevel(_level(lvl))
+    _configured_subsystems.clear(); _configured_subsystems.update(wanted)
+
+def _logger_for(name: str) -> logging.Logger:
+    # bare names are our subsystems; dotted or "discord" names are library loggers
+    return logging.getLogger(name if (name == "discord" or "." in name) else f"{ROOT_LOGGER}.{name}")
+
+def setup_logging(settings: dict | None = None) -> None:
+    """Route every logger through a queue; one background thread formats and writes.
+
+    Logging calls on the event loop only enqueue the record, so a slow terminal or
+    disk never stalls interactions.
+    """
+    global _listener
+    settings = settings or logging_settings()
+    if _listener is not None:
+        _listener.stop()
+    out = logging.FileHandler(settings["file"], encoding="utf-8") if settings.get("file") else logging.StreamHandler(sys.stdout)
+    out.setFormatter(JsonFormatter() if settings["format"] == "json" else TextFormatter())
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        if isinstance(h, logging.handlers.QueueHandler): root.removeHandler(h)
+    root.addHandler(logging.handlers.QueueHandler(q))
+    apply_levels(settings)
+    _listener = logging.handlers.QueueListener(q, out)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    # flush whatever is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop(); _listener = None
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,130 @@
+import discord
+import asyncio, re, time
+
+from botlog import ctx, get_logger
+
+log = get_logger("categories")
+
+CATEGORY_CHANNEL_LIMIT = 50   # discord's hard cap per category
+
+class CategoryPool:
+    """Spreads ticket channels over a base category and numbered overflow categories.
+
+    "Tickets" fills up, then "Tickets 2", "Tickets 3", ... are created next to it with
+    the same permissions. Channel counts per category are kept here (seeded once from
+    the cache, then moved by channel create/delete/update events) plus in-flight
+    reservations, so picking a category is a dict lookup, not a walk over every
+    channel in the guild. Overflow categories that sit empty are deleted later.
+    """
+    def __init__(self):
+        self._counts: dict[int, int] = {}      # category id -> channels in it
+        self._pending: dict[int, int] = {}     # category id -> creations in flight
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._empty_since: dict[int, float] = {}
+
+    # ---------- counts ----------
+    def count(self, category: discord.CategoryChannel) -> int:
+        n = self._counts.get(category.id)
+        if n is None:
+            n = self._counts[category.id] = len(category.channels)
+        return n + self._pending.get(category.id, 0)
+
+    def _bump(self, category_id: int | None, delta: int) -> None:
+        if category_id is None or category_id not in self._counts:
+            return  # not seeded yet; the first count() reads the live cache
+        self._counts[category_id] = max(0, self._counts[category_id] + delta)
+        if self._counts[category_id] == 0: self._empty_since.setdefault(category_id, time.monotonic())
+        else: self._empty_since.pop(category_id, None)
+
+    def channel_created(self, channel: discord.abc.GuildChannel) -> None:
+        self._bump(getattr(channel, "category_id", None), +1)
+
+    def channel_deleted(self, channel: discord.abc.GuildChannel) -> None:
+        if isinstance(channel, discord.CategoryChannel):
+            for d in (self._counts, self._pending, self._empty_since, self._locks): d.pop(channel.id, None)
+            return
+        self._bump(getattr(channel, "category_id", None), -1)
+
+    def channel_moved(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        old, new = getattr(before, "category_id", None), getattr(after, "category_id", None)
+        if old != new:
+            self._bump(old, -1); self._bump(new, +1)
+
+    # ---------- family ----------
+    @staticmethod
+    def _family(guild: discord.Guild, base: discord.CategoryChannel) -> list[tuple[int, discord.CategoryChannel]]:
+        # (overflow number, category); the base is number 1
+        pat = re.compile(rf"^{re.escape(base.name)} (\d+)$")
+        out = [(1, base)]
+        for cat in guild.categories:
+            m = pat.match(cat.name or "")
+            if m and cat.id != base.id and int(m.group(1)) >= 2:
+                out.append((int(m.group(1)), cat))
+        return sorted(out, key=lambda p: p[0])
+
+    def _reserve(self, category: discord.CategoryChannel) -> discord.CategoryChannel:
+        self._pending[category.id] = self._pending.get(category.id, 0) + 1
+        self._empty_since.pop(category.id, None)
+        return category
+
+    def release(self, category_id: int) -> None:
+        # call once per acquire(), after create_text_channel returned or failed
+        left = self._pending.get(category_id, 0) - 1
+        if left > 0: self._pending[category_id] = left
+        else: self._pending.pop(category_id, None)
+
+    def try_acquire(self, guild: discord.Guild, base: discord.CategoryChannel, overflow: bool = True, headroom: int = 2) -> discord.CategoryChannel | None:
+        """Like acquire(), but never creates a category; None when every existing one is full."""
+        cap = CATEGORY_CHANNEL_LIMIT - max(0, headroom)
+        for _, cat in (self._family(guild, base) if overflow else [(1, base)]):
+            if self.count(cat) < cap:
+                return self._reserve(cat)
+        return None
+
+    async def acquire(self, guild: discord.Guild, base: discord.CategoryChannel, overflow: bool = True, headroom: int = 2) -> discord.CategoryChannel:
+        """A category with room for one more channel, reserved until release()."""
+        if not overflow:
+            return self._reserve(base)
+        cap = CATEGORY_CHANNEL_LIMIT - max(0, headroom)
+        for _, cat in self._family(guild, base):
+            if self.count(cat) < cap:
+                return self._reserve(cat)
+        # everything is full: one creator per base category, everyone else waits for it
+        lock = self._locks.setdefault(base.id, asyncio.Lock())
+        async with lock:
+            family = self._family(guild, base)
+            for _, cat in family:
+                if self.count(cat) < cap:
+                    return self._reserve(cat)
+            n, last = family[-1][0] + 1, family[-1][1]
+            try:
+                cat = await guild.create_category(f"{base.name} {n}", overwrites=base.overwrites, position=last.position + 1,
+                                                  reason="Ticket category is full")
+            except Exception as e:
+                log.error("overflow category create failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild.id, category_id=base.id))
+                return self._reserve(base)  # let discord refuse it; the caller reports the failure
+            self._counts[cat.id] = 0
+            log.info("created overflow category %s", cat.name, extra=ctx(guild_id=guild.id, category_id=cat.id))
+            return self._reserve(cat)
+
+    # ---------- cleanup ----------
+    async def prune_empty(self, guild: discord.Guild, base_ids, grace: float) -> int:
+        # delete overflow categories (never the base) that have been empty for `grace` seconds
+        removed, now = 0, time.monotonic()
+        for base_id in set(base_ids):
+            base = guild.get_channel(base_id)
+            if not isinstance(base, discord.CategoryChannel):
+                continue
+            for n, cat in self._family(guild, base)[1:]:
+                if self.count(cat) > 0 or self._pending.get(cat.id):
+                    continue
+                since = self._empty_since.setdefault(cat.id, now)
+                if now - since < grace:
+                    continue
+                try:
+                    await cat.delete(reason="Empty ticket overflow category")
+                    removed += 1
+                    log.info("removed empty overflow category %s", cat.name, extra=ctx(guild_id=guild.id, category_id=cat.id))
+                except Exception as e:
+                    log.warning("overflow category delete failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild.id, category_id=cat.id))
+        return removed
@@ -1,9 +1,23 @@
 import discord
 from discord import app_commands
-import json, os, re, time
+import asyncio, gzip, json, os, re, shutil, tempfile
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-CONFIGS_DIR = "configs"
+import config_store
+from analytics import fmt_duration
+from autocomplete import TYPE_LABELS
+from botlog import ctx, get_logger
+from config_model import CONFIGS, validate_guild_config
+from dashboard import STATUS_FILTERS, TicketListView
+from intake_store import INTAKE_STORE, EXPORT_FORMATS
+from permissions import PERMS
+from status_scheduler import status_label
+from transcripts import EXPORTERS, TRANSCRIPT_LAYOUTS
+
+CONFIGS_DIR = config_store.CONFIG_FOLDER
+
+log = get_logger("commands")
 
 ALLOWED_KEYS = [
     "support_role_ids",
@@ -11,6 +25,8 @@ ALLOWED_KEYS = [
     "log_channel_id",
     "panel_channel_id",
     "user_limit_max_open",  # per-user open-ticket limit (staff/bot masters exempt)
+    "transcript_formats",   # which transcript files to produce/upload (html, jsonl, md)
+    "transcript_layout",    # html transcript as one page or paged (for very long tickets)
 ]
 
 # show small explanations in the key picker so people know what they're editing
@@ -20,22 +36,33 @@ KEY_CHOICES = [
     app_commands.Choice(name="log_channel_id — where transcripts are sent", value="log_channel_id"),
     app_commands.Choice(name="panel_channel_id — channel where the ticket panel lives", value="panel_channel_id"),
     app_commands.Choice(name="user_limit_max_open — max open tickets per user (staff exempt)", value="user_limit_max_open"),
+    app_commands.Choice(name="transcript_formats — transcript files to post (html, jsonl, md)", value="transcript_formats"),
+    app_commands.Choice(name="transcript_layout — single or paged [messages per page]", value="transcript_layout"),
 ]
 
-def _cfg_path(guild_id: int) -> str:
-    return os.path.join(CONFIGS_DIR, f"{guild_id}.json")
-
 def get_server_config(guild_id: int) -> dict:
-    path = _cfg_path(guild_id)
-    if not os.path.isfile(path):
-        return {}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # effective config (default.json + this server's overrides), safe to edit
+    return config_store.load_guild_config(guild_id)
 
 def save_server_config(guild_id: int, config: dict) -> None:
-    os.makedirs(CONFIGS_DIR, exist_ok=True)
-    with open(_cfg_path(guild_id), "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2)
+    config_store.save_guild_config(guild_id, config)
+
+def _save_checked(guild_id: int, config: dict) -> str | None:
+    # refuse to write a config that wouldn't load; returns the reply to show instead
+    errors = validate_guild_config(config)
+    if errors:
+        return "❌ Not saved, the config would be invalid:\n" + "\n".join(f"• {e}" for e in errors[:10])
+    save_server_config(guild_id, config)
+    return None
+
+def _ticket_type_entry(config: dict, guild_id: int, label: str) -> dict | None:
+    # the compiled model knows each type's list position, so no scan in the common case
+    model = CONFIGS.get_or_none(guild_id)
+    tt = model.type(label) if model else None
+    types = config.get("ticket_types") or []
+    if tt and tt.index < len(types) and isinstance(types[tt.index], dict) and types[tt.index].get("label") == label:
+        return types[tt.index]
+    return next((t for t in types if isinstance(t, dict) and t.get("label") == label), None)
 def _tm_enabled_and_gids():
     try:
         with open("main_config.json", "r", encoding="utf-8") as f:
@@ -55,25 +82,11 @@ def _blocked_by_testmode(gid: int | None) -> bool:
     return (gid is None) or (gid not in gids)
 
 def _is_admin(member: discord.Member) -> bool:
-    try:
-        with open("main_config.json", "r", encoding="utf-8") as f:
-            cfg = json.load(f)
-        masters = set(int(v) for v in (cfg.get("bot_master_ids") or []))
-        if cfg.get("bot_master_id"): masters.add(int(cfg["bot_master_id"]))
-    except Exception:
-        masters = set()
-    return bool(member.guild_permissions.administrator) or (member.id in masters)
-
-def _is_staff(member: discord.Member, cfg: dict, ticket_type_label: str | None, channel: discord.TextChannel | None) -> bool:
-    if _is_admin(member):
-        return True
-    global_roles = cfg.get("support_role_ids", []) or []
-    per_type_roles = []
-    if ticket_type_label:
-        t = next((t for t in cfg.get("ticket_types", []) if t.get("label")==ticket_type_label), {})
-        per_type_roles = t.get("support_role_ids", []) or []
-    role_ids = set(global_roles + per_type_roles)
-    return any((r.id in role_ids) for r in getattr(member, "roles", []))
+    return PERMS.is_admin(member)
+
+def _is_staff(member: discord.Member, ticket_type_label: str | None) -> bool:
+    # compiled per-guild role sets; rebuilt only when the guild config changes
+    return PERMS.is_staff(member, ticket_type_label)
 
 ROLE_ID_RE = re.compile(r"<@&(\d+)>|(\d+)")
 def _parse_role_ids(text: str, guild: discord.Guild) -> List[int]:
@@ -93,33 +106,9 @@ def _parse_role_ids(text: str, guild: discord.Guild) -> List[int]:
             out.append(rid); seen.add(rid)
     return out
 
-def _open_tickets_map() -> dict:
-    try:
-        with open("open_tickets.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def _strip_status_marks(name: str) -> str:
-    name = re.sub(r"^[🟢🟡🔴]\s*", "", name)
-    name = re.sub(r"[ \-]*([🟢🟡🔴])\s*$", "", name)
-    for pat in (r"\s*-\s*Approved$", r"\s*-\s*Waiting\s+for\s+Response$", r"\s*-\s*Issue\s*/\s*Problem$"):
-        name = re.sub(pat, "", name)
-    return name.strip(" -")
-
-EMOJI_LABELS = {"approved":("🟢","Approved"), "waiting":("🟡","Waiting for Response"), "issue":("🔴","Issue / Problem")}
-
-# autocomplete for ticket types in this guild
+# autocomplete for ticket types in this guild (served from the in-memory label index)
 async def _ac_ticket_type(interaction: discord.Interaction, current: str):
-    cfg = get_server_config(interaction.guild_id)
-    labels = [t.get("label","") for t in (cfg.get("ticket_types") or [])]
-    out = []
-    for lbl in labels:
-        if current.lower() in lbl.lower():
-            out.append(app_commands.Choice(name=lbl, value=lbl))
-        if len(out) >= 25:
-            break
-    return out
+    return [app_commands.Choice(name=lbl, value=lbl) for lbl in TYPE_LABELS.suggest(interaction.guild_id, current)]
 def setup(bot: discord.Client):
     # ----- /status -----
     async def _do_status(inter: discord.Interaction, value: str):
@@ -127,38 +116,23 @@ def setup(bot: discord.Client):
             await inter.response.send_message("Test mode is active. Commands are disabled in this server.", ephemeral=True); return
         await inter.response.defer(ephemeral=True)
         ch = inter.channel
-        name = (getattr(ch, "name", "") or "").lower()
-        if not isinstance(ch, discord.TextChannel) or not (name.startswith("ticket-") or name.startswith("testticket-")):
+        if not isinstance(ch, discord.TextChannel) or not bot.ticket_manager.is_ticket(ch.id):
             await inter.followup.send("This is not a ticket channel.", ephemeral=True); return
 
-        cfg = get_server_config(inter.guild_id)
-        ot = _open_tickets_map(); rec = ot.get(str(ch.id)) or {}
+        rec = bot.ticket_manager.open_tickets.get(str(ch.id)) or {}
         type_label = rec.get("type")
 
-        if not _is_staff(inter.user, cfg, type_label, ch):
+        if not _is_staff(inter.user, type_label):
             await inter.followup.send("You don’t have permission to set ticket status.", ephemeral=True); return
 
-        base=_strip_status_marks(ch.name)
-        if value=="none":
-            new_name=base; label_msg="none"; emoji=""; topic_text=None
-        else:
-            emoji,label=EMOJI_LABELS[value]
-            if len(base)>99: base=base[:99]
-            new_name=f"{base}{emoji}"; label_msg=f"{emoji} {label}"; topic_text=f"{emoji} {label}"
-
-        now=time.time(); last=float(rec.get("last_status_rename",0)); COOLDOWN=600
-        if now-last<COOLDOWN:
-            try: await ch.edit(topic=topic_text)
-            except: pass
-            await inter.followup.send(f"✅ Status noted: {label_msg if emoji else 'none'}.\n⚠️ Rename cooldown (~2 per 10 min). Topic updated instead.", ephemeral=True); return
-
-        try:
-            await ch.edit(name=new_name, topic=topic_text, reason=f"/status by {inter.user}")
-            rec["last_status_rename"]=now; ot[str(ch.id)]=rec
-            with open("open_tickets.json","w",encoding="utf-8") as f: json.dump(ot,f,indent=2)
+        # latest request wins; the scheduler renames as soon as discord's bucket allows
+        wait = bot.ticket_manager.status_scheduler.request(ch, value, reason=f"/status by {inter.user}")
+        label_msg = status_label(value)
+        if wait <= 0:
             await inter.followup.send(f"✅ Ticket status updated to {label_msg}", ephemeral=True)
-        except Exception as e:
-            await inter.followup.send(f"Failed to update status: {type(e).__name__}", ephemeral=True)
+        else:
+            mins = max(1, round(wait / 60))
+            await inter.followup.send(f"✅ Status set to {label_msg}.\n⏳ Discord limits renames (~2 per 10 min); the channel name will update in ~{mins} min. Only the latest status is applied.", ephemeral=True)
 
     @bot.tree.command(name="status", description="Set ticket status")
     @app_commands.choices(status=[
@@ -181,13 +155,12 @@ def setup(bot: discord.Client):
         if (user is None and role is None) or (user is not None and role is not None):
             await interaction.followup.send("Pick **one**: user *or* role.", ephemeral=True); return
         ch=ticket or interaction.channel
-        name = (getattr(ch, "name", "") or "").lower()
-        if not isinstance(ch, discord.TextChannel) or not (name.startswith("ticket-") or name.startswith("testticket-")):
+        if not isinstance(ch, discord.TextChannel) or not bot.ticket_manager.is_ticket(ch.id):
             await interaction.followup.send("This is not a ticket channel.", ephemeral=True); return
 
-        cfg=get_server_config(interaction.guild_id); ot=_open_tickets_map().get(str(ch.id)) or {}
+        ot=bot.ticket_manager.open_tickets.get(str(ch.id)) or {}
         type_label=ot.get("type")
-        if not _is_staff(interaction.user, cfg, type_label, ch):
+        if not _is_staff(interaction.user, type_label):
             await interaction.followup.send("You don’t have permission to use /add here.", ephemeral=True); return
 
         perms=discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True, attach_files=True, embed_links=True, add_reactions=True)
@@ -216,7 +189,8 @@ def setup(bot: discord.Client):
             ids=set(cfg.get("support_role_ids",[])); ids.add(support_role.id); cfg["support_role_ids"]=list(ids)
         else:
             cfg.setdefault("support_role_ids", cfg.get("support_role_ids", []))
-        save_server_config(interaction.guild.id, cfg)
+        err=_save_checked(interaction.guild.id, cfg)
+        if err: await interaction.response.send_message(err, ephemeral=True); return
         await interaction.response.send_message("✅ Setup complete. Use `/panel` to deploy the ticket panel.", ephemeral=True)
 
     @bot.tree.command(name="panel", description="Send the ticket panel")
@@ -228,7 +202,7 @@ def setup(bot: discord.Client):
         try:
             await bot.ticket_manager.send_ticket_panel(interaction)
         except Exception as e:
-            print(f"[❌ PANEL ERROR] {type(e).__name__}: {e}")
+            log.error("/panel failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=interaction.guild_id))
             if not interaction.response.is_done():
                 await interaction.response.send_message("❌ Something went wrong while opening the panel.", ephemeral=True)
 
@@ -238,8 +212,78 @@ def setup(bot: discord.Client):
             await interaction.response.send_message("Test mode is active. Commands are disabled in this server.", ephemeral=True); return
         if not _is_admin(interaction.user):
             await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
-        cfg=get_server_config(interaction.guild.id)
-        await interaction.response.send_message(f"```json\n{json.dumps(cfg, indent=2)[:1900]}\n```", ephemeral=True)
+        # only this server's overrides; everything else comes from configs/default.json
+        cfg={k: v for k, v in config_store.guild_overrides(interaction.guild.id).items() if k not in (config_store.OVERLAY_KEY, config_store.REPLACE_KEY)}
+        problems=CONFIGS.check(interaction.guild.id)
+        note=("\n⚠️ This file has errors and was not loaded (the last good version stays in use):\n" + "\n".join(f"• {e}" for e in problems[:5]))[:400] if problems else ""
+        head="Overrides on top of `configs/default.json`:"
+        await interaction.response.send_message(f"{head}\n```json\n{json.dumps(cfg, indent=2)[:1850-len(note)]}\n```{note}", ephemeral=True)
+
+    @bot.tree.command(name="stats", description="Ticket statistics for this server (admin only)")
+    @app_commands.describe(days="Days of daily activity to show (default 7)")
+    async def stats(interaction: discord.Interaction, days: Optional[app_commands.Range[int, 1, 30]]=7):
+        if _blocked_by_testmode(interaction.guild_id):
+            await interaction.response.send_message("Test mode is active. Commands are disabled in this server.", ephemeral=True); return
+        if not _is_admin(interaction.user):
+            await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
+        # answered from the rolling aggregates; nothing is re-scanned
+        sm=bot.ticket_manager.analytics.summary(interaction.guild_id, days or 7); a=sm["all"]
+        emb=discord.Embed(title="Ticket stats", color=0x2f3136)
+        emb.add_field(name="Totals", value=f"Opened **{a['created']}** • Closed **{a['closed']}** • Backlog **{a['open']}**", inline=False)
+        emb.add_field(name="Time to close", value=f"avg {fmt_duration(a['ttc_mean'])} • p50 {fmt_duration(a['ttc_p50'])} • p90 {fmt_duration(a['ttc_p90'])}", inline=False)
+        emb.add_field(name="First staff reply", value=f"p50 {fmt_duration(a['reply_p50'])} • p90 {fmt_duration(a['reply_p90'])}", inline=False)
+        per_type=[f"**{lbl}** — opened {v['created']}, open {v['open']}, p50 close {fmt_duration(v['ttc_p50'])}" for lbl,v in sorted(sm["types"].items(), key=lambda kv: -kv[1]["created"])]
+        if per_type: emb.add_field(name="Per type", value="\n".join(per_type)[:1024], inline=False)
+        statuses=[f"{status_label(k) if k!='none' else 'cleared'} ×{n}" for k,n in sorted(sm["status"].items(), key=lambda kv: -kv[1])]
+        if statuses: emb.add_field(name="Status changes (all time)", value=" • ".join(statuses)[:1024], inline=False)
+        daily="\n".join(f"`{d}` +{c} / -{x}" for d,c,x in sm["daily"])
+        emb.add_field(name=f"Last {days or 7} day(s) (opened / closed)", value=daily[:1024] or "—", inline=False)
+        await interaction.response.send_message(embed=emb, ephemeral=True)
+
+    @bot.tree.command(name="transcript", description="Upload status of a closed ticket's transcript (admin only)")
+    @app_commands.describe(number="Ticket number")
+    async def transcript_status(interaction: discord.Interaction, number: app_commands.Range[int, 0]):
+        if _blocked_by_testmode(interaction.guild_id):
+            await interaction.response.send_message("Test mode is active. Commands are disabled in this server.", ephemeral=True); return
+        if not _is_admin(interaction.user):
+            await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
+        jobs=bot.ticket_manager.deliveries.status(interaction.guild_id, number)
+        if not jobs:
+            await interaction.response.send_message(f"No transcript upload on record for ticket #{number} (only the last few hundred are kept).", ephemeral=True); return
+        marks={"pending": "⏳", "delivered": "✅", "failed": "❌", "no_log_channel": "⚠️"}
+        lines=[]
+        for j in jobs[:5]:
+            line=f"{marks.get(j['status'], '•')} **{j['status']}** • {j['attempts']} attempt(s) • <t:{int(j.get('updated') or 0)}:R>"
+            if j["status"]=="pending": line+=f" • next try <t:{int(j['next_try'])}:R>"
+            if j.get("error"): line+=f"\n  `{str(j['error'])[:150]}`"
+            lines.append(line)
+        await interaction.response.send_message(f"Transcript of ticket #{number}:\n" + "\n".join(lines), ephemeral=True)
+
+    # ----- /tickets (staff dashboard over the in-memory open-ticket index) -----
+    @bot.tree.command(name="tickets", description="List open tickets (staff)")
+    @app_commands.describe(ticket_type="Only this type", opener="Only tickets opened by this user", status="Only this status",
+                           older_than="Only tickets open longer than this many hours", sort="Order (default oldest first)")
+    @app_commands.choices(
+        status=[app_commands.Choice(name=(status_label(s) if s in ("approved", "waiting", "issue") else s), value=s) for s in STATUS_FILTERS],
+        sort=[app_commands.Choice(name=n, value=n) for n in ("oldest", "newest", "number", "unanswered")],
+    )
+    @app_commands.autocomplete(ticket_type=_ac_ticket_type)
+    async def tickets(interaction: discord.Interaction, ticket_type: Optional[str]=None, opener: Optional[discord.User]=None,
+                      status: Optional[app_commands.Choice[str]]=None, older_than: Optional[app_commands.Range[int, 1, 8760]]=None,
+                      sort: Optional[app_commands.Choice[str]]=None):
+        if _blocked_by_testmode(interaction.guild_id):
+            await interaction.response.send_message("Test mode is active. Commands are disabled in this server.", ephemeral=True); return
+        # global support roles see every type; per-type support roles only see the types they cover
+        allowed=PERMS.staff_types(interaction.user)
+        if allowed is not None and (not allowed or (ticket_type and ticket_type not in allowed)):
+            await interaction.response.send_message("❌ Staff only.", ephemeral=True); return
+        filters={"type_label": ticket_type, "opener_id": opener.id if opener else None, "status": status.value if status else None,
+                 "older_than_hours": older_than, "sort": sort.value if sort else "oldest", "type_labels": allowed}
+        shown=[f"type {ticket_type}" if ticket_type else "", f"by {opener}" if opener else "", status.name if status else "",
+               f"> {older_than}h" if older_than else ""]
+        title="Open tickets" + (" — " + ", ".join(x for x in shown if x) if any(shown) else "")
+        view=TicketListView(bot.ticket_manager, interaction.guild_id, filters, title[:256], interaction.user.id)
+        await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
 
     @bot.tree.command(name="editconfig", description="Edit a value in the server config (admin only)")
     @app_commands.describe(key="Which key (see descriptions in the list)", value="New value (IDs or mentions; for lists use comma/space separated)")
@@ -256,13 +300,27 @@ def setup(bot: discord.Client):
         elif k=="user_limit_max_open":
             try: cfg["user_limit_max_open"]=max(0, int(value))
             except: await interaction.response.send_message("❌ Provide an integer.", ephemeral=True); return
+        elif k=="transcript_formats":
+            fmts=[f for f in re.split(r"[,\s]+", value.lower()) if f]
+            bad=[f for f in fmts if f not in EXPORTERS]
+            if not fmts or bad: await interaction.response.send_message(f"❌ Pick from: {', '.join(EXPORTERS)}.", ephemeral=True); return
+            cfg[k]=list(dict.fromkeys(fmts))
+        elif k=="transcript_layout":
+            parts=value.lower().split()
+            if not parts or parts[0] not in TRANSCRIPT_LAYOUTS or (len(parts)>1 and not parts[1].isdigit()):
+                await interaction.response.send_message("❌ Use `single`, `paged` or `paged <messages per page>`.", ephemeral=True); return
+            lay=dict(cfg[k]) if isinstance(cfg.get(k), dict) else {}
+            lay["mode"]=parts[0]
+            if len(parts)>1: lay["page_size"]=int(parts[1])
+            cfg[k]=lay
         elif k.endswith("_id"):
             m=re.search(r"(\d+)", value); 
             if not m: await interaction.response.send_message("❌ Provide a valid channel/category ID or mention.", ephemeral=True); return
             cfg[k]=int(m.group(1))
         else:
             cfg[k]=value
-        save_server_config(interaction.guild.id, cfg)
+        err=_save_checked(interaction.guild.id, cfg)
+        if err: await interaction.response.send_message(err, ephemeral=True); return
         await interaction.response.send_message(f"✅ Updated `{k}`.", ephemeral=True)
 
     # ----- /intake (admin-only) -----
@@ -274,9 +332,11 @@ def setup(bot: discord.Client):
     async def intake_enable(interaction: discord.Interaction, ticket_type: str, enabled: bool):
         if _blocked_by_testmode(interaction.guild_id): await interaction.response.send_message("Test mode is active.", ephemeral=True); return
         if not _is_admin(interaction.user): await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
-        cfg=get_server_config(interaction.guild_id); t=next((t for t in cfg.get("ticket_types",[]) if t.get("label")==ticket_type), None)
+        cfg=get_server_config(interaction.guild_id); t=_ticket_type_entry(cfg, interaction.guild_id, ticket_type)
         if not t: await interaction.response.send_message("Unknown ticket type.", ephemeral=True); return
-        t.setdefault("intake_form",{})["enabled"]=bool(enabled); save_server_config(interaction.guild_id,cfg)
+        t.setdefault("intake_form",{})["enabled"]=bool(enabled)
+        err=_save_checked(interaction.guild_id,cfg)
+        if err: await interaction.response.send_message(err, ephemeral=True); return
         await interaction.response.send_message(f"✅ Intake for **{ticket_type}** set to **{enabled}**.", ephemeral=True)
 
     @intake.command(name="view", description="Show current intake questions for a ticket type")
@@ -285,7 +345,7 @@ def setup(bot: discord.Client):
     async def intake_view(interaction: discord.Interaction, ticket_type: str):
         if _blocked_by_testmode(interaction.guild_id): await interaction.response.send_message("Test mode is active.", ephemeral=True); return
         if not _is_admin(interaction.user): await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
-        cfg=get_server_config(interaction.guild_id); t=next((t for t in cfg.get("ticket_types",[]) if t.get("label")==ticket_type), None)
+        cfg=get_server_config(interaction.guild_id); t=_ticket_type_entry(cfg, interaction.guild_id, ticket_type)
         if not t: await interaction.response.send_message("Unknown ticket type.", ephemeral=True); return
         form=t.get("intake_form") or {}; qs=form.get("questions") or []
         if not qs: await interaction.response.send_message("No questions set.", ephemeral=True); return
@@ -299,7 +359,7 @@ def setup(bot: discord.Client):
         if _blocked_by_testmode(interaction.guild_id): await interaction.response.send_message("Test mode is active.", ephemeral=True); return
         if not _is_admin(interaction.user): await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
         style = "paragraph" if str(style).lower().startswith("para") else "short"
-        cfg=get_server_config(interaction.guild_id); t=next((t for t in cfg.get("ticket_types",[]) if t.get("label")==ticket_type), None)
+        cfg=get_server_config(interaction.guild_id); t=_ticket_type_entry(cfg, interaction.guild_id, ticket_type)
         if not t: await interaction.response.send_message("Unknown ticket type.", ephemeral=True); return
         form=t.setdefault("intake_form",{}); qs=form.setdefault("questions",[])
         q={"label":label[:45],"style":style,"required":bool(required)}
@@ -309,7 +369,8 @@ def setup(bot: discord.Client):
         else:
             qs.append(q)
         form["enabled"]=True
-        save_server_config(interaction.guild_id,cfg)
+        err=_save_checked(interaction.guild_id,cfg)
+        if err: await interaction.response.send_message(err, ephemeral=True); return
         await interaction.response.send_message(f"✅ Added question to **{ticket_type}** (now {len(qs)} total).", ephemeral=True)
 
     @intake.command(name="removequestion", description="Remove a question by index")
@@ -318,11 +379,13 @@ def setup(bot: discord.Client):
     async def intake_removequestion(interaction: discord.Interaction, ticket_type: str, index: int):
         if _blocked_by_testmode(interaction.guild_id): await interaction.response.send_message("Test mode is active.", ephemeral=True); return
         if not _is_admin(interaction.user): await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
-        cfg=get_server_config(interaction.guild_id); t=next((t for t in cfg.get("ticket_types",[]) if t.get("label")==ticket_type), None)
+        cfg=get_server_config(interaction.guild_id); t=_ticket_type_entry(cfg, interaction.guild_id, ticket_type)
         if not t: await interaction.response.send_message("Unknown ticket type.", ephemeral=True); return
         qs=(t.setdefault("intake_form",{}).setdefault("questions",[]))
         if not (1 <= index <= len(qs)): await interaction.response.send_message("Index out of range.", ephemeral=True); return
-        qs.pop(index-1); save_server_config(interaction.guild_id,cfg)
+        qs.pop(index-1)
+        err=_save_checked(interaction.guild_id,cfg)
+        if err: await interaction.response.send_message(err, ephemeral=True); return
         await interaction.response.send_message(f"✅ Removed. {len(qs)} question(s) left.", ephemeral=True)
 
     @intake.command(name="clear", description="Remove all questions for a ticket type")
@@ -331,10 +394,48 @@ def setup(bot: discord.Client):
     async def intake_clear(interaction: discord.Interaction, ticket_type: str):
         if _blocked_by_testmode(interaction.guild_id): await interaction.response.send_message("Test mode is active.", ephemeral=True); return
         if not _is_admin(interaction.user): await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
-        cfg=get_server_config(interaction.guild_id); t=next((t for t in cfg.get("ticket_types",[]) if t.get("label")==ticket_type), None)
+        cfg=get_server_config(interaction.guild_id); t=_ticket_type_entry(cfg, interaction.guild_id, ticket_type)
         if not t: await interaction.response.send_message("Unknown ticket type.", ephemeral=True); return
         t.setdefault("intake_form",{})["questions"]=[]
-        save_server_config(interaction.guild_id,cfg)
+        err=_save_checked(interaction.guild_id,cfg)
+        if err: await interaction.response.send_message(err, ephemeral=True); return
         await interaction.response.send_message("✅ Cleared all questions.", ephemeral=True)
 
+    @intake.command(name="export", description="Export intake answers for a date range (admin only)")
+    @app_commands.describe(since="Start date (YYYY-MM-DD, UTC)", until="End date inclusive (YYYY-MM-DD, UTC); omit for today", ticket_type="Only this ticket type", format="csv or jsonl")
+    @app_commands.autocomplete(ticket_type=_ac_ticket_type)
+    @app_commands.choices(format=[app_commands.Choice(name=f, value=f) for f in EXPORT_FORMATS])
+    async def intake_export(interaction: discord.Interaction, since: str, until: Optional[str]=None, ticket_type: Optional[str]=None, format: Optional[app_commands.Choice[str]]=None):
+        if _blocked_by_testmode(interaction.guild_id): await interaction.response.send_message("Test mode is active.", ephemeral=True); return
+        if not _is_admin(interaction.user): await interaction.response.send_message("❌ Admin only.", ephemeral=True); return
+        try:
+            start=datetime.strptime(since.strip(), "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            end=(datetime.strptime(until.strip(), "%Y-%m-%d").replace(tzinfo=timezone.utc) if until else datetime.now(tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)) + timedelta(days=1)
+        except ValueError:
+            await interaction.response.send_message("❌ Dates must look like 2025-01-31.", ephemeral=True); return
+        if end <= start: await interaction.response.send_message("❌ `until` must not be before `since`.", ephemeral=True); return
+        fmt=format.value if format else "csv"
+        await interaction.response.defer(ephemeral=True)
+
+        # rows stream from sqlite straight into a temp file, off the event loop
+        tmpdir=tempfile.mkdtemp(prefix="intake-export-")
+        try:
+            name=f"intake-{interaction.guild_id}-{start:%Y%m%d}-{(end - timedelta(days=1)):%Y%m%d}.{fmt}"
+            path=os.path.join(tmpdir, name)
+            count=await asyncio.to_thread(INTAKE_STORE.export, path, fmt, interaction.guild_id, start.timestamp(), end.timestamp(), ticket_type)
+            if count == 0:
+                await interaction.followup.send("No intake answers in that range.", ephemeral=True); return
+            if os.path.getsize(path) > interaction.guild.filesize_limit:
+                def _gz():
+                    with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst: shutil.copyfileobj(src, dst)
+                await asyncio.to_thread(_gz); path += ".gz"
+            if os.path.getsize(path) > interaction.guild.filesize_limit:
+                await interaction.followup.send("❌ Export is too large to upload; narrow the date range or pick a ticket type.", ephemeral=True); return
+            await interaction.followup.send(f"✅ {count} submission(s).", file=discord.File(path), ephemeral=True)
+        except Exception as e:
+            log.error("intake export failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=interaction.guild_id))
+            await interaction.followup.send(f"Failed to export: {type(e).__name__}", ephemeral=True)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
     bot.tree.add_command(intake)
@@ -0,0 +1,329 @@
+from dataclasses import dataclass
+
+import config_store
+from botlog import ctx, get_logger
+from ratelimit import DEFAULT_ADMISSION
+from transcripts import DEFAULT_FORMATS, DEFAULT_PAGE_SIZE, EXPORTERS, TRANSCRIPT_LAYOUTS
+
+log = get_logger("config")
+
+# discord limits the config has to fit
+MAX_PANEL_OPTIONS = 25       # select menu options
+MAX_OPTION_LABEL = 100
+MAX_OPTION_DESCRIPTION = 100
+MAX_MODAL_INPUTS = 5
+MAX_INPUT_LABEL = 45
+MAX_INPUT_PLACEHOLDER = 100
+MAX_MODAL_TITLE = 45
+MAX_WARM_POOL = 10           # standby channels per ticket type (they use category slots)
+INPUT_STYLES = ("short", "paragraph")
+
+class ConfigError(ValueError):
+    """A guild config that doesn't match the schema; .errors lists every problem found."""
+    def __init__(self, source: str, errors: list[str]):
+        self.source = source
+        self.errors = errors
+        super().__init__(f"{source}: " + "; ".join(errors))
+
+@dataclass(frozen=True, slots=True)
+class IntakeQuestion:
+    label: str
+    style: str
+    required: bool
+    placeholder: str | None
+
+@dataclass(frozen=True, slots=True)
+class TicketType:
+    label: str
+    index: int                     # position in the raw ticket_types list (for editing commands)
+    description: str
+    emoji: str | None
+    enabled: bool
+    has_category: bool             # "category_id" present; an explicit null means top-level
+    category_id: int | None
+    support_role_ids: tuple[int, ...]
+    no_mention_role_ids: tuple[int, ...]
+    intake_enabled: bool
+    questions: tuple[IntakeQuestion, ...]
+
+@dataclass(frozen=True, slots=True)
+class GuildConfig:
+    support_role_ids: tuple[int, ...]
+    no_mention_role_ids: tuple[int, ...]
+    ticket_category_id: int | None
+    log_channel_id: int | None
+    panel_channel_id: int | None
+    user_limit_max_open: int
+    transcript_formats: tuple[str, ...]
+    transcript_layout: str          # "single" or "paged" (html only)
+    transcript_page_size: int       # messages per page in the paged layout
+    archive_enabled: bool
+    archive_base_url: str
+    archive_wait_seconds: float
+    overflow_enabled: bool
+    overflow_headroom: int
+    overflow_grace_minutes: float
+    warm_pool_enabled: bool
+    warm_pool_size: int
+    warm_pool_per_type: dict[str, int]
+    assignment_enabled: bool
+    assignment_escalate_minutes: float
+    admission: dict
+    types: dict[str, TicketType]    # label -> type, in config order
+    raw: dict                       # the validated json (shared, do not mutate)
+
+    def type(self, label: str | None) -> TicketType | None:
+        return self.types.get(label) if label else None
+
+    def category_id_for(self, ttype: TicketType | None) -> int | None:
+        return ttype.category_id if (ttype and ttype.has_category) else self.ticket_category_id
+
+    def warm_pool_size_for(self, label: str) -> int:
+        # standby channels to keep for a type (0 when the pool is off)
+        return self.warm_pool_per_type.get(label, self.warm_pool_size) if self.warm_pool_enabled else 0
+
+    def category_ids(self) -> set[int]:
+        # every base category tickets can land in
+        out = {self.category_id_for(t) for t in self.types.values()} | {self.ticket_category_id}
+        out.discard(None)
+        return out
+
+# ---------- validation ----------
+class _Checker:
+    __slots__ = ("errors",)
+
+    def __init__(self):
+        self.errors: list[str] = []
+
+    def snowflake(self, where: str, v) -> int | None:
+        # ids may be ints or digit strings; null/"" means unset
+        if v is None or v == "": return None
+        if isinstance(v, bool) or not (isinstance(v, int) or (isinstance(v, str) and v.strip().isdigit())):
+            self.errors.append(f"{where} must be a discord id, got {v!r}"); return None
+        return int(v)
+
+    def snowflakes(self, where: str, v) -> tuple[int, ...]:
+        if v is None: return ()
+        if not isinstance(v, list):
+            self.errors.append(f"{where} must be a list of ids"); return ()
+        out = [self.snowflake(f"{where}[{i}]", x) for i, x in enumerate(v)]
+        return tuple(dict.fromkeys(x for x in out if x is not None))
+
+    def integer(self, where: str, v, default: int, minimum: int = 0) -> int:
+        if v is None: return default
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or int(v) != v or v < minimum:
+            self.errors.append(f"{where} must be a whole number >= {minimum}, got {v!r}"); return default
+        return int(v)
+
+    def number(self, where: str, v, default: float, minimum: float = 0.0) -> float:
+        if v is None: return default
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or v < minimum:
+            self.errors.append(f"{where} must be a number >= {minimum:g}, got {v!r}"); return default
+        return float(v)
+
+    def text(self, where: str, v, default: str = "", limit: int | None = None) -> str:
+        if v is None: return default
+        if not isinstance(v, str):
+            self.errors.append(f"{where} must be text, got {v!r}"); return default
+        if limit and len(v) > limit:
+            self.errors.append(f"{where} is {len(v)} characters; discord allows {limit}")
+        return v
+
+    def flag(self, where: str, v, default: bool) -> bool:
+        if v is None: return default
+        if not isinstance(v, bool):
+            self.errors.append(f"{where} must be true or false, got {v!r}"); return default
+        return v
+
+    def block(self, where: str, v) -> dict:
+        if v is None: return {}
+        if not isinstance(v, dict):
+            self.errors.append(f"{where} must be an object"); return {}
+        return v
+
+def _question(c: _Checker, where: str, q) -> IntakeQuestion | None:
+    if not isinstance(q, dict):
+        c.errors.append(f"{where} must be an object"); return None
+    label = c.text(f"{where}.label", q.get("label"), "", MAX_INPUT_LABEL)
+    if not label.strip(): c.errors.append(f"{where}.label is required")
+    style = c.text(f"{where}.style", q.get("style"), "short").lower()
+    if style not in INPUT_STYLES: c.errors.append(f"{where}.style must be one of {', '.join(INPUT_STYLES)}, got {style!r}")
+    return IntakeQuestion(label=label, style=style, required=c.flag(f"{where}.required", q.get("required"), True),
+                          placeholder=c.text(f"{where}.placeholder", q.get("placeholder"), "", MAX_INPUT_PLACEHOLDER) or None)
+
+def _ticket_type(c: _Checker, i: int, t) -> TicketType | None:
+    where = f"ticket_types[{i}]"
+    if not isinstance(t, dict):
+        c.errors.append(f"{where} must be an object"); return None
+    label = c.text(f"{where}.label", t.get("label"), "", MAX_OPTION_LABEL)
+    if not label.strip():
+        c.errors.append(f"{where}.label is required"); return None
+    where = f"ticket type {label!r}"
+    form = c.block(f"{where}.intake_form", t.get("intake_form"))
+    raw_qs = form.get("questions") or []
+    if not isinstance(raw_qs, list):
+        c.errors.append(f"{where}.intake_form.questions must be a list"); raw_qs = []
+    if len(raw_qs) > MAX_MODAL_INPUTS:
+        c.errors.append(f"{where} has {len(raw_qs)} intake questions; a discord form holds {MAX_MODAL_INPUTS}")
+    questions = tuple(q for q in (_question(c, f"{where}.intake_form.questions[{n}]", q) for n, q in enumerate(raw_qs)) if q)
+    return TicketType(
+        label=label, index=i,
+        description=c.text(f"{where}.description", t.get("description"), "", MAX_OPTION_DESCRIPTION),
+        emoji=c.text(f"{where}.emoji", t.get("emoji")) or None,
+        enabled=c.flag(f"{where}.enabled", t.get("enabled"), True),
+        has_category="category_id" in t,
+        category_id=c.snowflake(f"{where}.category_id", t.get("category_id")),
+        support_role_ids=c.snowflakes(f"{where}.support_role_ids", t.get("support_role_ids")),
+        no_mention_role_ids=c.snowflakes(f"{where}.no_mention_role_ids", t.get("no_mention_role_ids")),
+        intake_enabled=c.flag(f"{where}.intake_form.enabled", form.get("enabled"), False),
+        questions=questions,
+    )
+
+def build_guild_config(data, source: str = "config") -> GuildConfig:
+    """Validate a guild config dict and compile it; raises ConfigError listing every problem."""
+    c = _Checker()
+    if not isinstance(data, dict):
+        raise ConfigError(source, ["top level must be a json object"])
+
+    types: dict[str, TicketType] = {}
+    raw_types = data.get("ticket_types") or []
+    if not isinstance(raw_types, list):
+        c.errors.append("ticket_types must be a list"); raw_types = []
+    for i, t in enumerate(raw_types):
+        tt = _ticket_type(c, i, t)
+        if tt is None: continue
+        if tt.label in types: c.errors.append(f"ticket type {tt.label!r} is listed twice")
+        else: types[tt.label] = tt
+    enabled = sum(1 for t in types.values() if t.enabled)
+    if enabled > MAX_PANEL_OPTIONS:
+        c.errors.append(f"{enabled} ticket types are enabled; the panel dropdown holds {MAX_PANEL_OPTIONS}")
+
+    formats = data.get("transcript_formats")
+    if formats is None: formats = list(DEFAULT_FORMATS)
+    if not isinstance(formats, list) or not formats:
+        c.errors.append("transcript_formats must be a non-empty list"); formats = list(DEFAULT_FORMATS)
+    bad = [f for f in formats if str(f).lower() not in EXPORTERS]
+    if bad: c.errors.append(f"transcript_formats: unknown {', '.join(map(str, bad))} (pick from {', '.join(EXPORTERS)})")
+
+    lay = c.block("transcript_layout", data.get("transcript_layout"))
+    layout = c.text("transcript_layout.mode", lay.get("mode"), "single")
+    if layout not in TRANSCRIPT_LAYOUTS:
+        c.errors.append(f"transcript_layout.mode must be one of {', '.join(TRANSCRIPT_LAYOUTS)}, got {layout!r}"); layout = "single"
+
+    arch = c.block("attachment_archive", data.get("attachment_archive"))
+    ovf = c.block("category_overflow", data.get("category_overflow"))
+    adm = c.block("admission", data.get("admission"))
+    assign = c.block("assignment", data.get("assignment"))
+    pool = c.block("warm_pool", data.get("warm_pool"))
+    pool_size = c.integer("warm_pool.size", pool.get("size"), 2)
+    pool_per_type = {str(k): c.integer(f"warm_pool.per_type.{k}", v, pool_size)
+                     for k, v in c.block("warm_pool.per_type", pool.get("per_type")).items()}
+    for k, v in [("size", pool_size)] + [(f"per_type.{k}", v) for k, v in pool_per_type.items()]:
+        if v > MAX_WARM_POOL: c.errors.append(f"warm_pool.{k} is {v}; at most {MAX_WARM_POOL} standby channels per type")
+    admission = dict(DEFAULT_ADMISSION)
+    for k, v in adm.items():
+        if k not in DEFAULT_ADMISSION: c.errors.append(f"admission.{k} is not a known setting"); continue
+        if k.endswith("_burst"):
+            admission[k] = c.number(f"admission.{k}", v, DEFAULT_ADMISSION[k], 1.0)
+        elif isinstance(v, (int, float)) and not isinstance(v, bool) and v <= 0:
+            c.errors.append(f"admission.{k} must be above 0 (at 0 ticket creation would stop for good), got {v!r}")
+        else:
+            admission[k] = c.number(f"admission.{k}", v, DEFAULT_ADMISSION[k])
+
+    tn = c.block("ticket_numbers", data.get("ticket_numbers"))
+    c.integer("ticket_numbers.width", tn.get("width"), 4, 1)
+    for name, blk in [("global", tn.get("global"))] + [(f"per_type.{k}", v) for k, v in c.block("ticket_numbers.per_type", tn.get("per_type")).items()]:
+        blk = c.block(f"ticket_numbers.{name}", blk)
+        c.integer(f"ticket_numbers.{name}.start", blk.get("start"), 1)
+        c.integer(f"ticket_numbers.{name}.next", blk.get("next"), 1)
+
+    if isinstance(ovf.get("headroom"), int) and ovf["headroom"] >= 50:
+        c.errors.append("category_overflow.headroom must be below 50 (discord's per-category cap)")
+
+    model = GuildConfig(
+        support_role_ids=c.snowflakes("support_role_ids", data.get("support_role_ids")),
+        no_mention_role_ids=c.snowflakes("no_mention_role_ids", data.get("no_mention_role_ids")),
+        ticket_category_id=c.snowflake("ticket_category_id", data.get("ticket_category_id")),
+        log_channel_id=c.snowflake("log_channel_id", data.get("log_channel_id")),
+        panel_channel_id=c.snowflake("panel_channel_id", data.get("panel_channel_id")),
+        user_limit_max_open=c.integer("user_limit_max_open", data.get("user_limit_max_open"), 0),
+        transcript_formats=tuple(dict.fromkeys(str(f).lower() for f in formats if str(f).lower() in EXPORTERS)) or tuple(DEFAULT_FORMATS),
+        transcript_layout=layout,
+        transcript_page_size=c.integer("transcript_layout.page_size", lay.get("page_size"), DEFAULT_PAGE_SIZE, 50),
+        archive_enabled=c.flag("attachment_archive.enabled", arch.get("enabled"), False),
+        archive_base_url=c.text("attachment_archive.base_url", arch.get("base_url"), ""),
+        archive_wait_seconds=c.number("attachment_archive.wait_seconds", arch.get("wait_seconds"), 10.0),
+        overflow_enabled=c.flag("category_overflow.enabled", ovf.get("enabled"), True),
+        overflow_headroom=c.integer("category_overflow.headroom", ovf.get("headroom"), 2),
+        overflow_grace_minutes=c.number("category_overflow.empty_grace_minutes", ovf.get("empty_grace_minutes"), 10.0),
+        warm_pool_enabled=c.flag("warm_pool.enabled", pool.get("enabled"), False),
+        warm_pool_size=pool_size,
+        warm_pool_per_type=pool_per_type,
+        assignment_enabled=c.flag("assignment.enabled", assign.get("enabled"), False),
+        assignment_escalate_minutes=c.number("assignment.escalate_minutes", assign.get("escalate_minutes"), 10.0, 0.5),
+        admission=admission,
+        types=types,
+        raw=data,
+    )
+    if c.errors:
+        raise ConfigError(source, c.errors)
+    return model
+
+def validate_guild_config(data) -> list[str]:
+    # [] when valid; used before saving edits so a bad value never reaches disk
+    try: build_guild_config(data)
+    except ConfigError as e: return e.errors
+    return []
+
+# ---------- cache ----------
+class GuildConfigModels:
+    """Compiled GuildConfig per guild, rebuilt only when the file's version changes.
+
+    A file that fails validation is rejected: the error is logged once and the last
+    good model stays in use. Only a guild with no good model yet gets the ConfigError.
+    """
+    def __init__(self):
+        self._models: dict[int, tuple[tuple, GuildConfig | ConfigError, GuildConfig | None]] = {}
+
+    def get(self, guild_id: int) -> GuildConfig:
+        ver = config_store.version(guild_id)
+        hit = self._models.get(guild_id)
+        if not hit or hit[0] != ver:
+            hit = self._build(guild_id, ver, hit[2] if hit else None)
+        if isinstance(hit[1], GuildConfig):
+            return hit[1]
+        if hit[2] is not None:
+            return hit[2]
+        raise hit[1]
+
+    def check(self, guild_id: int) -> list[str]:
+        # errors for the file as it is on disk right now ([] when valid)
+        self.get_or_none(guild_id)
+        hit = self._models.get(guild_id)
+        return hit[1].errors if hit and isinstance(hit[1], ConfigError) else []
+
+    def get_or_none(self, guild_id: int) -> GuildConfig | None:
+        try: return self.get(guild_id)
+        except ConfigError: return None
+
+    def _build(self, guild_id: int, ver: tuple, last_good: GuildConfig | None):
+        path = config_store.guild_config_path(guild_id)
+        try:
+            data = config_store.guild_config(guild_id)
+            for layer in (config_store.DEFAULT_CONFIG_FILE, path):
+                if config_store.read_error(layer):
+                    raise ConfigError(layer, [f"not valid json ({config_store.read_error(layer)})"])
+            model = build_guild_config(data, path)
+            hit = (ver, model, model)
+        except ConfigError as e:
+            log.error("invalid config rejected (%s): %s", "keeping last good version" if last_good else "no usable version",
+                      "; ".join(e.errors), extra=ctx(guild_id=guild_id, path=path))
+            hit = (ver, e, last_good)
+        self._models[guild_id] = hit
+        return hit
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        if guild_id is None: self._models.clear()
+        else: self._models.pop(guild_id, None)
+
+CONFIGS = GuildConfigModels()
@@ -0,0 +1,302 @@
+import asyncio, atexit, json, logging, os, shutil, threading
+
+CONFIG_FOLDER = "configs"
+DEFAULT_CONFIG_FILE = os.path.join(CONFIG_FOLDER, "default.json")
+MAIN_CONFIG_FILE = "main_config.json"
+WRITE_DELAY = 0.5  # seconds; saves of the same file inside this window become one write
+
+log = logging.getLogger("ticketbot.store")  # not botlog.get_logger: botlog imports this module
+
+# read-only, stamp-checked copies of the json configs. derived views (permissions etc.)
+# key their caches on version() so they rebuild only when a file actually changes.
+_cache: dict[str, tuple[tuple, dict]] = {}
+_bumps: dict[str, int] = {}
+_errors: dict[str, str] = {}  # path -> why the last read fell back to {}
+
+def guild_config_path(guild_id: int) -> str:
+    return os.path.join(CONFIG_FOLDER, f"{guild_id}.json")
+
+def _stamp(path: str) -> tuple:
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (None, None)
+
+def file_version(path: str) -> tuple:
+    # explicit bumps catch saves that land inside the fs mtime granularity
+    return (_bumps.get(path, 0),) + _stamp(path)
+
+def version(guild_id: int) -> tuple:
+    # a guild's effective config is default.json + its overrides, so both count
+    return file_version(guild_config_path(guild_id)) + file_version(DEFAULT_CONFIG_FILE)
+
+def invalidate(path: str) -> None:
+    _bumps[path] = _bumps.get(path, 0) + 1
+    _cache.pop(path, None)
+
+def read_json(path: str) -> dict:
+    # shared dict, do not mutate; use load_config()/get_server_config() for edits
+    queued = _queued(path)
+    if queued is not None:
+        return queued
+    ver = file_version(path)
+    hit = _cache.get(path)
+    if hit and hit[0] == ver:
+        return hit[1]
+    _errors.pop(path, None)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    except (OSError, ValueError) as e:
+        _errors[path] = f"{type(e).__name__}: {e}"; data = {}
+    if not isinstance(data, dict):
+        _errors.setdefault(path, "top level must be a json object"); data = {}
+    _cache[path] = (ver, data)
+    return data
+
+def read_error(path: str) -> str | None:
+    # set when the file exists but couldn't be parsed (read_json returned {} for it)
+    return _errors.get(path)
+
+def main_config() -> dict:
+    return read_json(MAIN_CONFIG_FILE)
+
+# ---------- layers ----------
+# configs/<guild>.json holds only what that guild changed; the effective config is
+# configs/default.json with those overrides laid on top. dicts merge key by key, other
+# values replace; ticket_types merge by label ({"label": x, "removed": true} hides a
+# default type, unknown labels are appended). resolved configs share every untouched
+# subtree with the one parsed default layer, so a guild costs what it customizes.
+OVERLAY_KEY = "_overlay"   # marks a sparse file; without it the file is a legacy full copy
+REPLACE_KEY = "_replace"   # top-level keys the overlay replaces whole (e.g. a reordered type list)
+_SAME = object()
+_resolved: dict[int, tuple[tuple, dict]] = {}
+
+def default_config() -> dict:
+    return read_json(DEFAULT_CONFIG_FILE)
+
+def _merge(base, over):
+    if not isinstance(base, dict) or not isinstance(over, dict):
+        return over
+    if not over:
+        return base
+    out = dict(base)
+    for k, v in over.items():
+        out[k] = _merge(base[k], v) if k in base else v
+    return out
+
+def _merge_types(base: list, over: list) -> list:
+    known = {t.get("label") for t in base if isinstance(t, dict)}
+    by_label = {t.get("label"): t for t in over if isinstance(t, dict) and t.get("label") in known}
+    out = []
+    for t in base:
+        o = by_label.get(t.get("label")) if isinstance(t, dict) else None
+        if o is None: out.append(t)
+        elif not o.get("removed"): out.append(_merge(t, {k: v for k, v in o.items() if k != "removed"}))
+    out.extend(t for t in over if not isinstance(t, dict) or (t.get("label") not in known and not t.get("removed")))
+    return out
+
+def resolve(default: dict, overlay: dict) -> dict:
+    """The effective config: `overlay` laid over `default`. Shares unchanged parts with `default`."""
+    replace = set(overlay.get(REPLACE_KEY) or ()) if OVERLAY_KEY in overlay else {"ticket_types"}
+    out = dict(default)
+    for k, v in overlay.items():
+        if k in (OVERLAY_KEY, REPLACE_KEY): continue
+        if k in replace or k not in default: out[k] = v
+        elif k == "ticket_types" and isinstance(v, list) and isinstance(default[k], list): out[k] = _merge_types(default[k], v)
+        else: out[k] = _merge(default[k], v)
+    return out
+
+def _diff(base, cur):
+    # the part of `cur` that differs from `base`, or _SAME
+    if isinstance(base, dict) and isinstance(cur, dict):
+        out = {}
+        for k, v in cur.items():
+            d = _diff(base[k], v) if k in base else v
+            if d is not _SAME: out[k] = d
+        return out or _SAME
+    return _SAME if type(base) is type(cur) and base == cur else cur
+
+def _diff_types(base: list, cur: list) -> list:
+    by_label = {t.get("label"): t for t in base if isinstance(t, dict)}
+    labels = {t.get("label") for t in cur if isinstance(t, dict)}
+    out = [{"label": t["label"], "removed": True} for t in base if isinstance(t, dict) and t.get("label") not in labels]
+    for t in cur:
+        b = by_label.get(t.get("label")) if isinstance(t, dict) else None
+        if b is None:
+            out.append(t); continue
+        d = _diff(b, t)
+        if d is not _SAME: out.append({"label": t["label"], **d})
+    return out
+
+def overlay_of(default: dict, effective: dict) -> dict:
+    """The sparse overrides that resolve() turns back into `effective` (keys it drops fall back to default)."""
+    out, replace = {OVERLAY_KEY: 1}, []
+    for k, v in effective.items():
+        if k in (OVERLAY_KEY, REPLACE_KEY): continue
+        if k not in default:
+            out[k] = v
+        elif k == "ticket_types" and isinstance(v, list) and isinstance(default[k], list):
+            d = _diff_types(default[k], v)
+            if _merge_types(default[k], d) != v:
+                out[k] = v; replace.append(k)   # reordered or duplicate labels: keep the whole list
+            elif d:
+                out[k] = d
+        elif (d := _diff(default[k], v)) is not _SAME:
+            out[k] = d
+    if replace: out[REPLACE_KEY] = replace
+    return out
+
+def guild_overrides(guild_id: int) -> dict:
+    # the guild's own file, as stored (shared, do not mutate)
+    return read_json(guild_config_path(guild_id))
+
+def guild_config(guild_id: int) -> dict:
+    # effective config (shared, do not mutate); rebuilt when either layer changes
+    ver = version(guild_id)
+    hit = _resolved.get(guild_id)
+    if hit and hit[0] == ver:
+        return hit[1]
+    data = resolve(default_config(), guild_overrides(guild_id))
+    _resolved[guild_id] = (ver, data)
+    return data
+
+def load_guild_config(guild_id: int) -> dict:
+    """A private, mutable copy of the effective config. Save it with save_guild_config()."""
+    return json.loads(json.dumps(guild_config(guild_id)))
+
+def save_guild_config(guild_id: int, data: dict) -> None:
+    write_json(guild_config_path(guild_id), overlay_of(default_config(), data))
+
+def _covers(full, resolved) -> bool:
+    # every value in `full` comes back out of `resolved` (new default keys may be extra)
+    if isinstance(full, dict) and isinstance(resolved, dict):
+        return all(k in resolved and _covers(v, resolved[k]) for k, v in full.items())
+    return full == resolved
+
+def migrate_overlays(backup_folder: str = os.path.join(CONFIG_FOLDER, "legacy")) -> int:
+    """Rewrite legacy full-copy guild files as sparse overrides; the originals go to `backup_folder`."""
+    if not os.path.isdir(CONFIG_FOLDER):
+        return 0
+    default, done = default_config(), 0
+    if read_error(DEFAULT_CONFIG_FILE):
+        return 0  # can't diff against a broken default; the files keep working as they are
+    for name in sorted(os.listdir(CONFIG_FOLDER)):
+        stem, ext = os.path.splitext(name)
+        if ext != ".json" or not stem.isdigit():
+            continue
+        path = os.path.join(CONFIG_FOLDER, name)
+        full = read_json(path)
+        if OVERLAY_KEY in full or read_error(path):
+            continue
+        overlay = overlay_of(default, full)
+        if not _covers(full, resolve(default, overlay)):
+            log.warning("config not migrated, overrides would change it", extra={"ctx": {"path": path}})
+            continue
+        os.makedirs(backup_folder, exist_ok=True)
+        backup = os.path.join(backup_folder, name)
+        if not os.path.exists(backup):
+            shutil.copy2(path, backup)
+        write_json(path, overlay); done += 1
+    if done:
+        log.info("migrated %d guild config(s) to sparse overrides", done)
+    return done
+
+# ---------- write-behind ----------
+# saves are queued and written by a worker thread: the latest data per file, once per
+# WRITE_DELAY window, via temp file + fsync + rename so a crash never leaves half a file.
+# reads here (read_json/load_json/exists) see queued data right away.
+_pending: dict[str, tuple[object, int | None]] = {}  # path -> (live data, indent), not serialized yet
+_writing: dict[str, str] = {}                         # path -> text a worker is writing right now
+_io_lock = threading.Lock()                           # one writer at a time, so writes land in order
+_flush_handle: asyncio.TimerHandle | None = None
+_flush_task: asyncio.Task | None = None
+
+def _queued(path: str):
+    if path in _pending:
+        return _pending[path][0]
+    text = _writing.get(path)
+    return json.loads(text) if text is not None else None
+
+def exists(path: str) -> bool:
+    return path in _pending or path in _writing or os.path.exists(path)
+
+def load_json(path: str) -> dict:
+    """A private, mutable copy of the file (queued saves included); {} if it doesn't exist."""
+    queued = _queued(path)
+    if queued is not None:
+        return json.loads(json.dumps(queued))
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _atomic_write(path: str, text: str) -> None:
+    folder = os.path.dirname(path)
+    if folder: os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _serialize_pending() -> dict[str, str]:
+    # runs on the caller's thread (the event loop): callers keep mutating these dicts
+    batch = {}
+    for path, (data, indent) in list(_pending.items()):
+        try: batch[path] = json.dumps(data, indent=indent)
+        except (TypeError, ValueError) as e:
+            log.error("save dropped, not serializable: %s: %s", type(e).__name__, e, extra={"ctx": {"path": path}})
+    _pending.clear()
+    _writing.update(batch)
+    return batch
+
+def _write_batch(batch: dict[str, str]) -> None:
+    # runs on a worker thread; version bumps are left to the loop (see _written)
+    with _io_lock:
+        for path, text in batch.items():
+            try: _atomic_write(path, text)
+            except OSError as e:
+                log.error("save failed: %s: %s", type(e).__name__, e, extra={"ctx": {"path": path}})
+            finally:
+                if _writing.get(path) is text: _writing.pop(path, None)
+
+def _written(batch: dict[str, str]) -> None:
+    # on the loop thread, like every other invalidate(): _bumps is never updated from two threads
+    for path in batch: invalidate(path)
+
+def _start_flush(loop: asyncio.AbstractEventLoop) -> None:
+    global _flush_task
+    _flush_task = loop.create_task(_flush_soon())  # keep a reference until it's done
+
+async def _flush_soon() -> None:
+    global _flush_handle
+    _flush_handle = None
+    batch = _serialize_pending()
+    if batch:
+        await asyncio.to_thread(_write_batch, batch)
+        _written(batch)
+
+def write_json(path: str, data, indent: int | None = 2) -> None:
+    """Queue `data` for `path`. The object is serialized at flush time, so later edits to it are included."""
+    global _flush_handle
+    _pending[path] = (data, indent)
+    invalidate(path)
+    try: loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush(); return  # no event loop (scripts, startup): write now
+    if _flush_handle is None:
+        _flush_handle = loop.call_later(WRITE_DELAY, _start_flush, loop)
+
+def flush() -> None:
+    """Write everything queued now (blocking). Call before exiting or exec-restarting."""
+    global _flush_handle
+    if _flush_handle is not None:
+        _flush_handle.cancel(); _flush_handle = None
+    batch = _serialize_pending()
+    if batch:
+        _write_batch(batch); _written(batch)
+
+atexit.register(flush)
@@ -0,0 +1,101 @@
+import discord
+import time
+
+from status_scheduler import EMOJI_LABELS
+
+PAGE_SIZE = 10
+# sort name -> (key over a ticket record, reverse)
+SORTS = {
+    "oldest": (lambda r: float(r.get("open_time") or 0), False),
+    "newest": (lambda r: float(r.get("open_time") or 0), True),
+    "number": (lambda r: int(r.get("number") or 0), False),
+    "unanswered": (lambda r: (bool(r.get("first_staff_reply")), float(r.get("open_time") or 0)), False),
+}
+STATUS_FILTERS = ("approved", "waiting", "issue", "none", "unanswered")
+
+def _age(seconds: float) -> str:
+    if seconds < 3600: return f"{int(seconds // 60)}m"
+    if seconds < 86400: return f"{int(seconds // 3600)}h"
+    return f"{int(seconds // 86400)}d"
+
+def query(manager, guild_id: int, type_label: str | None = None, opener_id: int | None = None,
+          status: str | None = None, older_than_hours: int | None = None, sort: str = "oldest",
+          type_labels: frozenset[str] | None = None) -> list[str]:
+    """Channel ids of this guild's open tickets matching the filters, sorted. Memory only.
+    type_labels (when set) limits the result to those types - the ones the viewer's roles cover."""
+    cids = manager.tickets_of(guild_id, opener_id) if opener_id else manager.guild_tickets(guild_id)
+    cutoff = time.time() - older_than_hours * 3600 if older_than_hours else None
+    rows = []
+    for cid in cids:
+        rec = manager.open_tickets.get(cid)
+        if rec is None: continue
+        if type_label and rec.get("type") != type_label: continue
+        if type_labels is not None and rec.get("type") not in type_labels: continue
+        if status == "unanswered":
+            if rec.get("first_staff_reply"): continue
+        elif status == "none":
+            if rec.get("status"): continue
+        elif status and rec.get("status") != status: continue
+        if cutoff is not None and float(rec.get("open_time") or 0) > cutoff: continue
+        rows.append((cid, rec))
+    key, reverse = SORTS.get(sort) or SORTS["oldest"]
+    rows.sort(key=lambda cr: key(cr[1]), reverse=reverse)
+    return [cid for cid, _ in rows]
+
+def render_page(manager, cids: list[str], page: int, title: str) -> discord.Embed:
+    pages = max(1, -(-len(cids) // PAGE_SIZE))
+    page = min(max(0, page), pages - 1)
+    now, lines = time.time(), []
+    for cid in cids[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]:
+        rec = manager.open_tickets.get(cid)
+        if rec is None:
+            lines.append(f"~~<#{cid}>~~ closed"); continue
+        mark = EMOJI_LABELS.get(rec.get("status") or "", ("",))[0]
+        bits = [f"`#{rec.get('number') or '?'}` <#{cid}>", rec.get("type") or "—",
+                f"<@{rec['user_id']}>" if rec.get("user_id") else "opener unknown", _age(now - float(rec.get("open_time") or now))]
+        if rec.get("assignee"): bits.append(f"→ <@{rec['assignee']}>")
+        if not rec.get("first_staff_reply"): bits.append("unanswered")
+        lines.append((f"{mark} " if mark else "") + " • ".join(bits))
+    emb = discord.Embed(title=title, description="\n".join(lines) or "No open tickets match.", color=0x2f3136)
+    emb.set_footer(text=f"{len(cids)} ticket(s) • page {page + 1}/{pages}")
+    return emb
+
+class TicketListView(discord.ui.View):
+    """Prev/next/refresh over one query result; pages are rendered from the live records."""
+    def __init__(self, manager, guild_id: int, filters: dict, title: str, owner_id: int):
+        super().__init__(timeout=600)
+        self.manager, self.guild_id, self.filters, self.title, self.owner_id = manager, guild_id, filters, title, owner_id
+        self.cids = query(manager, guild_id, **filters)
+        self.page = 0
+        self._sync()
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self.cids) // PAGE_SIZE))
+
+    def _sync(self) -> None:
+        self.page = min(max(0, self.page), self.pages - 1)
+        self.prev.disabled = self.page == 0
+        self.next.disabled = self.page >= self.pages - 1
+
+    def embed(self) -> discord.Embed:
+        return render_page(self.manager, self.cids, self.page, self.title)
+
+    async def interaction_check(self, ix: discord.Interaction) -> bool:
+        return ix.user.id == self.owner_id
+
+    async def _show(self, ix: discord.Interaction) -> None:
+        self._sync()
+        await ix.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def prev(self, ix: discord.Interaction, _):
+        self.page -= 1; await self._show(ix)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next(self, ix: discord.Interaction, _):
+        self.page += 1; await self._show(ix)
+
+    @discord.ui.button(label="🔄 Refresh", style=discord.ButtonStyle.secondary)
+    async def refresh(self, ix: discord.Interaction, _):
+        self.cids = query(self.manager, self.guild_id, **self.filters); await self._show(ix)
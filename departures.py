@@ -0,0 +1,106 @@
+import discord
+import asyncio, time
+
+import config_store
+from botlog import ctx, get_logger
+from ratelimit import TokenBucket
+
+log = get_logger("departures")
+
+# main_config.json "departures" block
+DEFAULT_DEPARTURES = {"window_seconds": 5, "workers": 2, "closes_burst": 5, "closes_per_minute": 20}
+
+# setting -> (lowest allowed value, whether the lowest value itself is allowed)
+_MINIMUMS = {"window_seconds": (0, True), "workers": (1, True), "closes_burst": (1, True), "closes_per_minute": (0, False)}
+_warned: set[tuple[str, str]] = set()
+
+def departure_settings() -> dict:
+    # bad values are ignored (warned once per value) and the default is used: a 0 close rate would stall every worker
+    out = dict(DEFAULT_DEPARTURES)
+    for k, v in (config_store.main_config().get("departures") or {}).items():
+        if k not in _MINIMUMS:
+            problem = "is not a known setting"
+        elif isinstance(v, bool) or not isinstance(v, (int, float)) or v < _MINIMUMS[k][0] or (v == _MINIMUMS[k][0] and not _MINIMUMS[k][1]):
+            low, inclusive = _MINIMUMS[k]
+            problem = f"must be a number {'>=' if inclusive else '>'} {low}"
+        else:
+            out[k] = v; continue
+        if (k, repr(v)) not in _warned:
+            _warned.add((k, repr(v)))
+            log.warning("departures.%s %s (got %r); ignored, using the default", k, problem, v)
+    out["workers"] = int(out["workers"])
+    return out
+
+class DepartureQueue:
+    """Closes the tickets of members who left, without a close storm during raids or prunes.
+
+    Leave events are collected for a short window and de-duplicated per guild; each
+    batch is resolved to ticket ids through the per-user index. The closes (history,
+    transcript, delete) then run on a few workers, paced by a token bucket per guild.
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self._left: dict[int, set[int]] = {}            # guild -> users who left this window
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._queue: asyncio.Queue | None = None
+        self._queued: set[int] = set()                  # channel ids waiting for a worker
+        self._buckets: dict[int, TokenBucket] = {}
+        self._workers: list[asyncio.Task] = []
+
+    def member_left(self, guild_id: int, user_id: int) -> None:
+        self._left.setdefault(guild_id, set()).add(user_id)
+        if self._flush_handle is None:
+            window = max(0.0, float(departure_settings()["window_seconds"]))
+            self._flush_handle = asyncio.get_running_loop().call_later(window, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        batch, self._left = self._left, {}
+        settings = departure_settings()
+        self._ensure_workers(max(1, int(settings["workers"])))
+        for guild_id, users in batch.items():
+            queued = 0
+            for cid in self.manager.tickets_of_many(guild_id, users):
+                cid = int(cid)
+                if cid in self._queued or cid in self.manager.closing:
+                    continue
+                self._queued.add(cid); self._queue.put_nowait((guild_id, cid)); queued += 1
+            if len(users) > 1 or queued:
+                log.info("member departures batched", extra=ctx(guild_id=guild_id, users=len(users), queued=queued, backlog=len(self._queued)))
+
+    def _ensure_workers(self, n: int) -> None:
+        if self._queue is None: self._queue = asyncio.Queue()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < n:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def _pace(self, guild_id: int) -> None:
+        s = departure_settings()
+        b = self._buckets.get(guild_id)
+        if b is None: b = self._buckets[guild_id] = TokenBucket(s["closes_burst"], s["closes_per_minute"])
+        else: b.configure(s["closes_burst"], s["closes_per_minute"])
+        while (wait := b.wait_time(time.monotonic())) > 0:
+            await asyncio.sleep(min(wait, 60.0))
+        b.take(time.monotonic())
+
+    async def _worker(self) -> None:
+        while True:
+            guild_id, cid = await self._queue.get()
+            try:
+                # closed by staff (or deleted) while it waited? then there is nothing to do
+                if not self.manager.is_ticket(cid) or cid in self.manager.closing:
+                    continue
+                guild = self.manager.bot.get_guild(guild_id)
+                ch = guild.get_channel(cid) if guild else None
+                if not isinstance(ch, discord.TextChannel):
+                    continue
+                await self._pace(guild_id)
+                if self.manager.is_ticket(cid):
+                    await self.manager._finalize_close(None, ch, True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("auto-close failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild_id, channel_id=cid))
+            finally:
+                self._queued.discard(cid)
+                self._queue.task_done()
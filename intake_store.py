@@ -0,0 +1,119 @@
+import sqlite3, threading, time, csv, json
+from datetime import datetime, timezone
+from typing import Iterator
+
+INTAKE_DB_FILE = "intake_answers.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS intake_submissions (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id      INTEGER NOT NULL,
+    channel_id    INTEGER NOT NULL,
+    ticket_number INTEGER,
+    ticket_type   TEXT NOT NULL,
+    user_id       INTEGER NOT NULL,
+    user_name     TEXT,
+    submitted_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS intake_answers (
+    submission_id INTEGER NOT NULL REFERENCES intake_submissions(id) ON DELETE CASCADE,
+    position      INTEGER NOT NULL,
+    question      TEXT NOT NULL,
+    answer        TEXT NOT NULL,
+    PRIMARY KEY (submission_id, position)
+);
+CREATE INDEX IF NOT EXISTS ix_sub_guild_time      ON intake_submissions(guild_id, submitted_at);
+CREATE INDEX IF NOT EXISTS ix_sub_guild_type_time ON intake_submissions(guild_id, ticket_type, submitted_at);
+DROP INDEX IF EXISTS ix_sub_channel;  -- nothing looks submissions up by channel any more
+"""
+
+EXPORT_FORMATS = ("csv", "jsonl")
+CSV_COLUMNS = ["submitted_at", "ticket_number", "ticket_type", "user_id", "user_name", "channel_id", "position", "question", "answer"]
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+class IntakeStore:
+    """Intake-form answers per ticket, indexed by guild/type/time.
+
+    All methods are blocking; call them through asyncio.to_thread from the bot.
+    """
+    def __init__(self, path: str = INTAKE_DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA foreign_keys=ON")
+        return db
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = self._connect()
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def save(self, guild_id: int, channel_id: int, ticket_number: int | None, ticket_type: str,
+             user_id: int, user_name: str, answers: list[tuple[str, str]], submitted_at: float | None = None) -> int:
+        with self._lock:
+            db = self._writer()
+            with db:
+                cur = db.execute(
+                    "INSERT INTO intake_submissions(guild_id, channel_id, ticket_number, ticket_type, user_id, user_name, submitted_at) VALUES (?,?,?,?,?,?,?)",
+                    (guild_id, channel_id, ticket_number, ticket_type, user_id, user_name, submitted_at or time.time()),
+                )
+                sid = cur.lastrowid
+                db.executemany(
+                    "INSERT INTO intake_answers(submission_id, position, question, answer) VALUES (?,?,?,?)",
+                    [(sid, i, q, a) for i, (q, a) in enumerate(answers)],
+                )
+        return sid
+
+    # ---------- export (streams rows; never holds the whole range in memory) ----------
+    def iter_rows(self, guild_id: int, since: float, until: float, ticket_type: str | None = None, batch: int = 500) -> Iterator[tuple]:
+        with self._lock:
+            self._writer()  # make sure the schema exists (same lock as save(), so the connection is opened once)
+        db = self._connect()  # own read connection so exports don't block new submissions
+        try:
+            sql = ("SELECT s.id, s.submitted_at, s.ticket_number, s.ticket_type, s.user_id, s.user_name, s.channel_id, a.position, a.question, a.answer "
+                   "FROM intake_submissions s JOIN intake_answers a ON a.submission_id = s.id "
+                   "WHERE s.guild_id = ? AND s.submitted_at >= ? AND s.submitted_at < ?")
+            args: list = [guild_id, since, until]
+            if ticket_type:
+                sql += " AND s.ticket_type = ?"; args.append(ticket_type)
+            sql += " ORDER BY s.submitted_at, s.id, a.position"
+            cur = db.execute(sql, args)
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            db.close()
+
+    def export(self, out_path: str, fmt: str, guild_id: int, since: float, until: float, ticket_type: str | None = None) -> int:
+        # csv: one row per answer. jsonl: one object per submission. returns number of submissions.
+        count, last_sid = 0, None
+        with open(out_path, "w", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                w = csv.writer(f); w.writerow(CSV_COLUMNS)
+                for sid, ts, num, ttype, uid, uname, cid, pos, q, a in self.iter_rows(guild_id, since, until, ticket_type):
+                    if sid != last_sid: count += 1; last_sid = sid
+                    w.writerow([_iso(ts), num, ttype, uid, uname, cid, pos + 1, q, a])
+            elif fmt == "jsonl":
+                current = None
+                for sid, ts, num, ttype, uid, uname, cid, pos, q, a in self.iter_rows(guild_id, since, until, ticket_type):
+                    if sid != last_sid:
+                        if current: f.write(json.dumps(current, ensure_ascii=False) + "\n")
+                        current = {"submitted_at": _iso(ts), "ticket_number": num, "ticket_type": ttype, "user_id": uid,
+                                   "user_name": uname, "channel_id": cid, "answers": []}
+                        count += 1; last_sid = sid
+                    current["answers"].append({"question": q, "answer": a})
+                if current: f.write(json.dumps(current, ensure_ascii=False) + "\n")
+            else:
+                raise ValueError(f"unknown export format: {fmt}")
+        return count
+
+INTAKE_STORE = IntakeStore()
@@ -0,0 +1,307 @@
+"""Panel-click storm load test.
+
+Drives many concurrent simulated ``ticket_type_select`` interactions through the
+real panel callbacks (``_send_ticket_panel_internal`` -> dropdown -> intake modal ->
+``_create_after_form``) against an in-memory fake guild, then reports throughput,
+latency percentiles and correctness invariants.
+
+Runs in a throwaway working directory, so real configs/open_tickets.json are never touched.
+
+    python loadtest_panel.py --users 300 --clicks 2 --limit 1 --latency-ms 150
+"""
+import argparse, asyncio, itertools, json, os, random, shutil, sys, tempfile, time
+
+import discord
+from discord.ui.select import selected_values
+
+_ids = itertools.count(10_000)
+
+# ---------- fake discord objects (only what the ticket flow touches) ----------
+class FakeRole:
+    def __init__(self, guild, name):
+        self.id = next(_ids); self.guild = guild; self.name = name; self.members = []
+        self.mention = f"<@&{self.id}>"
+    def is_default(self): return self.name == "@everyone"
+
+class FakePerms:
+    administrator = False
+
+class FakeMember:
+    bot = False
+    def __init__(self, guild, n):
+        self.id = next(_ids); self.guild = guild; self.name = f"user{n}"
+        self.mention = f"<@{self.id}>"; self.guild_permissions = FakePerms(); self.roles = []
+    def __str__(self): return self.name
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None, view=None):
+        self.id = next(_ids); self.channel = channel; self.content = content; self.embed = embed; self.view = view
+    async def pin(self, reason=None): await self.channel.guild.api()
+    async def delete(self): pass
+
+class FakeThread:
+    def __init__(self, guild, name):
+        self.id = next(_ids); self.guild = guild; self.name = name; self.members = set()
+    async def add_user(self, user): await self.guild.api(); self.members.add(user.id)
+    async def send(self, *a, **kw): await self.guild.api()
+    async def edit(self, name=None, **kw):
+        await self.guild.api(); self.name = name or self.name; return self
+
+class FakeCategory(discord.CategoryChannel):
+    # subclassed so the bot's isinstance(..., CategoryChannel) checks pass; none of the real state is used
+    def __init__(self, guild, name, position=0, overwrites=None):
+        self.id = next(_ids); self.guild = guild; self.name = name; self.position = position
+        self._fake_overwrites = dict(overwrites or {})
+    @property
+    def overwrites(self): return self._fake_overwrites
+    @property
+    def channels(self): return [c for c in self.guild.channels.values() if getattr(c, "category_id", None) == self.id]
+    async def delete(self, reason=None): await self.guild.api(); self.guild.channels.pop(self.id, None)
+
+class FakeTextChannel:
+    def __init__(self, guild, name, category=None, overwrites=None):
+        self.id = next(_ids); self.guild = guild; self.name = name; self.category = category
+        self.category_id = category.id if category else None
+        self.overwrites = dict(overwrites or {}); self.topic = None; self.messages = []; self.threads = []
+    async def send(self, content=None, *, embed=None, view=None, **kw):
+        await self.guild.api()
+        msg = FakeMessage(self, content, embed, view); self.messages.append(msg); return msg
+    async def create_thread(self, name, type=None, invitable=True, **kw):
+        await self.guild.api(); t = FakeThread(self.guild, name); self.threads.append(t); self.guild.threads[t.id] = t; return t
+    async def set_permissions(self, target, overwrite=None, reason=None): await self.guild.api()
+    async def edit(self, **kw):
+        await self.guild.api()
+        for k in ("name", "topic", "overwrites"):
+            if k in kw: setattr(self, k, kw[k])
+        return self
+    async def delete(self, reason=None): await self.guild.api(); self.guild.channels.pop(self.id, None)
+    def history(self, limit=None, oldest_first=False):
+        async def gen():
+            for m in list(self.messages): yield m
+        return gen()
+
+class FakeGuild:
+    filesize_limit = 25 * 1024 * 1024
+    def __init__(self, latency: float, jitter: float):
+        self.id = next(_ids); self.name = "Load Test Guild"
+        self.latency, self.jitter = latency, jitter
+        self.default_role = FakeRole(self, "@everyone")
+        self.roles = {self.default_role.id: self.default_role}
+        self.channels: dict[int, object] = {}
+        self.threads: dict[int, FakeThread] = {}
+        self.unavailable = False
+        self.members: dict[int, FakeMember] = {}
+        self.api_calls = 0; self.channel_creates = 0; self.category_full_errors = 0
+        self.on_channel_create = None  # stands in for the gateway's channel-create event
+    async def api(self):
+        # every REST call costs a round trip
+        self.api_calls += 1
+        if self.latency:
+            await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+    def get_channel(self, cid): return self.channels.get(cid)
+    def get_thread(self, tid): return self.threads.get(tid)
+    def get_role(self, rid): return self.roles.get(rid)
+    def get_member(self, uid): return self.members.get(uid)
+    def add_role(self, name):
+        r = FakeRole(self, name); self.roles[r.id] = r; return r
+    @property
+    def text_channels(self): return [c for c in self.channels.values() if isinstance(c, FakeTextChannel)]
+    @property
+    def categories(self): return [c for c in self.channels.values() if isinstance(c, FakeCategory)]
+    def add_category(self, name, position=0, overwrites=None):
+        c = FakeCategory(self, name, position, overwrites); self.channels[c.id] = c; return c
+    async def create_category(self, name, overwrites=None, position=0, reason=None):
+        await self.api(); return self.add_category(name, position, overwrites)
+    async def create_text_channel(self, name, category=None, overwrites=None, topic=None, **kw):
+        await self.api()
+        if category is not None and len(category.channels) >= 50:
+            self.category_full_errors += 1
+            raise discord.HTTPException(type("R", (), {"status": 400, "reason": "Bad Request"})(), "Maximum number of channels in category reached (50)")
+        ch = FakeTextChannel(self, name, category, overwrites); ch.topic = topic
+        self.channels[ch.id] = ch; self.channel_creates += 1
+        if self.on_channel_create: self.on_channel_create(ch)
+        return ch
+
+class FakeResponse:
+    def __init__(self, ix): self.ix = ix; self._done = False; self.modal = None
+    def is_done(self): return self._done
+    async def defer(self, ephemeral=False, **kw): self._done = True
+    async def send_message(self, content=None, ephemeral=False, **kw): self._done = True; self.ix.replies.append(content)
+    async def send_modal(self, modal): self._done = True; self.modal = modal
+
+class FakeFollowup:
+    def __init__(self, ix): self.ix = ix
+    async def send(self, content=None, ephemeral=False, **kw): self.ix.replies.append(content)
+
+class FakeInteraction:
+    def __init__(self, guild, user):
+        self.guild = guild; self.guild_id = guild.id; self.user = user; self.channel = None
+        self.replies: list[str] = []
+        self.response = FakeResponse(self); self.followup = FakeFollowup(self)
+
+class FakeBot:
+    def __init__(self): self.user = discord.Object(id=next(_ids)); self.guilds = []
+    def add_view(self, view): pass
+
+# ---------- harness ----------
+def _percentile(sorted_vals: list[float], p: float) -> float:
+    if not sorted_vals: return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+def _write_fixture(workdir: str, guild_id: int, support_role_id: int, label: str, limit: int, intake: bool, admission: dict, category_id: int | None, warm_pool: int = 0, assign: bool = False):
+    os.makedirs(os.path.join(workdir, "configs"), exist_ok=True)
+    with open(os.path.join(workdir, "main_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"token": "", "bot_master_ids": [], "test_mode": {"enabled": False, "guild_ids": []}}, f)
+    questions = [{"label": "Why do you want to join?", "style": "paragraph", "required": True}] if intake else []
+    cfg = {
+        "support_role_ids": [support_role_id], "ticket_category_id": category_id, "log_channel_id": None, "panel_channel_id": None,
+        "user_limit_max_open": limit, "admission": admission,
+        "warm_pool": {"enabled": warm_pool > 0, "size": warm_pool},
+        "assignment": {"enabled": assign, "escalate_minutes": 10},
+        "ticket_numbers": {"width": 4, "global": {"start": 1, "next": 1}, "per_type": {}},
+        "ticket_types": [{"label": label, "description": "load test", "enabled": True, "support_role_ids": [],
+                          "intake_form": {"enabled": intake, "questions": questions}}],
+    }
+    with open(os.path.join(workdir, "configs", "default.json"), "w", encoding="utf-8") as f: json.dump(cfg, f)
+    with open(os.path.join(workdir, "configs", f"{guild_id}.json"), "w", encoding="utf-8") as f: json.dump(cfg, f)
+
+async def run(args) -> dict:
+    from ticket_manager import TicketManager, load_open_tickets
+    from panel_ui import PANEL_SELECT_ID
+
+    guild = FakeGuild(args.latency_ms / 1000.0, args.jitter_ms / 1000.0)
+    support = guild.add_role("Support")
+    for i in range(args.staff):
+        m = FakeMember(guild, f"staff{i}"); m.roles = [support]; support.members.append(m); guild.members[m.id] = m
+    users = [FakeMember(guild, i) for i in range(args.users)]
+    for u in users: guild.members[u.id] = u
+    admission = {"guild_burst": args.guild_burst, "guild_per_minute": args.guild_per_minute}
+    base = guild.add_category("Tickets") if args.category else None
+    _write_fixture(os.getcwd(), guild.id, support.id, args.type, args.limit, args.intake, admission, base.id if base else None, args.warm_pool, args.assign)
+
+    import warm_pool
+    warm_pool.REFILL_GAP = 0.0
+    manager = TicketManager(FakeBot()); manager.bot.guilds.append(guild)
+    guild.on_channel_create = manager.categories.channel_created
+    # fill the standby pool up front (the bot does this in the background between bursts)
+    pooled = await manager.warm_pool.refill() if args.warm_pool else 0
+    api_before = guild.api_calls
+    panel = FakeTextChannel(guild, "panel"); guild.channels[panel.id] = panel
+    await manager._send_ticket_panel_internal(guild.id, panel)
+    dropdown = next(i for i in panel.messages[-1].view.children if getattr(i, "custom_id", None) == PANEL_SELECT_ID)
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    interactions: list[FakeInteraction] = []
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def click(user: FakeMember):
+        async with sem:
+            ix = FakeInteraction(guild, user); interactions.append(ix)
+            t0 = time.perf_counter()
+            try:
+                selected_values.set({PANEL_SELECT_ID: [args.type]})
+                await dropdown.callback(ix)
+                modal = ix.response.modal
+                if modal is not None:
+                    # user fills the intake form and submits it
+                    for child in modal.children:
+                        if isinstance(child, discord.ui.TextInput): child._value = f"answer from {user.name}"
+                    submit = FakeInteraction(guild, user)
+                    await modal.on_submit(submit)
+                    ix.replies.extend(submit.replies)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+            latencies.append(time.perf_counter() - t0)
+
+    # every user clicks --clicks times; duplicates land close together like real double-clicks
+    clicks = [u for u in users for _ in range(args.clicks)]
+    random.shuffle(clicks)
+    t_start = time.perf_counter()
+    await asyncio.gather(*(click(u) for u in clicks))
+    elapsed = time.perf_counter() - t_start
+
+    # ---------- invariants ----------
+    tickets = [c for c in guild.channels.values() if isinstance(c, FakeTextChannel) and c is not panel
+               and not (c.topic or "").startswith(warm_pool.POOL_TOPIC)]
+    per_category = sorted((len(c.channels) for c in guild.categories), reverse=True)
+    tracked = manager.open_tickets
+    numbers = [rec.get("number") for rec in tracked.values()]
+    per_user: dict[int, int] = {}
+    for rec in tracked.values(): per_user[rec["user_id"]] = per_user.get(rec["user_id"], 0) + 1
+    import config_store
+    config_store.flush()  # saves are write-behind; check what actually reached the file
+    on_disk = load_open_tickets()
+    lost = [c.id for c in tickets if str(c.id) not in tracked]
+    not_persisted = [cid for cid in tracked if cid not in on_disk]
+    per_staff = [manager.workload.load_of(guild.id, m.id) for m in support.members]
+    over_limit = {uid: n for uid, n in per_user.items() if args.limit > 0 and n > args.limit}
+    lat = sorted(latencies)
+    replies = [r or "" for ix in interactions for r in ix.replies]
+    return {
+        "clicks": len(clicks), "tickets_created": len(tickets), "elapsed_s": round(elapsed, 3),
+        "throughput_clicks_per_s": round(len(clicks) / elapsed, 1) if elapsed else None,
+        "throughput_tickets_per_s": round(len(tickets) / elapsed, 1) if elapsed else None,
+        "latency_ms": {p: round(_percentile(lat, p) * 1000, 1) for p in (50, 90, 95, 99)} | {"max": round((lat[-1] if lat else 0) * 1000, 1)},
+        "api_calls": guild.api_calls - api_before, "channel_creates": guild.channel_creates,
+        "warm_pool": {"prefilled": pooled, "left": sum(len(p) for p in manager.warm_pool._pools.values())},
+        "assignment": {"per_staff": per_staff, "spread": (max(per_staff) - min(per_staff)) if per_staff else 0} if args.assign else None,
+        "categories": {"used": len(per_category), "channels_per_category": per_category, "full_errors": guild.category_full_errors},
+        "outcomes": {
+            "created": sum(r.startswith("✅") for r in replies),
+            "coalesced": sum(r.startswith("⏳") for r in replies),
+            "throttled": sum(r.startswith("🐢") for r in replies),
+            "rejected": sum(r.startswith("❌") for r in replies),
+        },
+        "errors": len(errors), "error_samples": errors[:5],
+        "invariants": {
+            "unique_ticket_numbers": len(numbers) == len(set(numbers)),
+            "per_user_limit_respected": not over_limit,
+            "users_over_limit": len(over_limit),
+            "no_lost_records": not lost,
+            "lost_records": len(lost),
+            "records_persisted": not not_persisted,
+            "no_category_full_errors": not guild.category_full_errors,
+        },
+    }
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--users", type=int, default=200, help="distinct simulated users")
+    ap.add_argument("--clicks", type=int, default=2, help="panel selections per user (2 = double-click)")
+    ap.add_argument("--concurrency", type=int, default=500, help="max interactions in flight")
+    ap.add_argument("--limit", type=int, default=1, help="user_limit_max_open for the fake guild (0 = off)")
+    ap.add_argument("--staff", type=int, default=5, help="support-role members added to each notes thread")
+    ap.add_argument("--type", default="New Member", help="ticket type label to select")
+    ap.add_argument("--category", action="store_true", help="put tickets in a category (exercises overflow past 50 channels)")
+    ap.add_argument("--warm-pool", type=int, default=0, help="standby channels to pre-create for the type (0 = off)")
+    ap.add_argument("--assign", action="store_true", help="route each ticket to the least-loaded staff member")
+    ap.add_argument("--intake", action="store_true", help="enable a one-question intake modal for the type")
+    ap.add_argument("--guild-burst", type=int, default=1000, help="admission guild_burst (raise to measure raw throughput)")
+    ap.add_argument("--guild-per-minute", type=int, default=1000, help="admission guild_per_minute")
+    ap.add_argument("--latency-ms", type=float, default=50.0, help="simulated REST round trip")
+    ap.add_argument("--jitter-ms", type=float, default=20.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    args = ap.parse_args(argv)
+    random.seed(args.seed)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    workdir = tempfile.mkdtemp(prefix="ticket-loadtest-")
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        report = asyncio.run(run(args))
+    finally:
+        os.chdir(cwd)
+        if args.keep: print(f"scratch dir: {workdir}", file=sys.stderr)
+        else: shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+    inv = report["invariants"]
+    ok = all(v for k, v in inv.items() if isinstance(v, bool)) and not report["errors"]
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import asyncio, time
+import discord
+
+import config_store
+from botlog import ctx, get_logger
+from permissions import PERMS, member_role_ids
+
+log = get_logger("members")
+
+# main_config.json "member_cache.mode":
+#   none - no members intent; role.members is whatever discord happened to cache (original behavior)
+#   full - members intent + full chunking at startup; role.members is always complete
+#   lean - members intent, no chunking, no member cache; support-role members fetched on demand
+MEMBER_CACHE_MODES = ("none", "full", "lean")
+DEFAULT_MEMBER_CACHE = {"mode": "none", "ttl_seconds": 900}
+
+def member_cache_settings() -> dict:
+    out = dict(DEFAULT_MEMBER_CACHE)
+    out.update(config_store.main_config().get("member_cache") or {})
+    if out["mode"] not in MEMBER_CACHE_MODES:
+        log.warning("unknown member cache mode %r, using 'none'", out["mode"])
+        out["mode"] = "none"
+    return out
+
+def bot_member_options(intents: discord.Intents, settings: dict) -> dict:
+    # sets the members intent and returns the extra commands.Bot kwargs for the mode
+    if settings["mode"] == "none":
+        return {}
+    intents.members = True
+    if settings["mode"] == "full":
+        return {}
+    # lean: the bot only needs itself cached; interaction/message payloads carry their own member
+    return {"chunk_guilds_at_startup": False, "member_cache_flags": discord.MemberCacheFlags.none()}
+
+class SupportMemberCache:
+    """Member ids holding a guild's support roles, for notes-thread population.
+
+    In lean mode one paged member scan keeps only support-role holders (ids, not
+    Member objects), so a 50k-member guild costs a few hundred ints instead of the
+    whole member list. Only the first lookup waits for a scan; after the TTL the old
+    ids keep being served while a background scan replaces them. Concurrent callers
+    for the same guild share one scan. Other modes just read role.members.
+    """
+    def __init__(self):
+        # guild_id -> (fetched_at, tracked role ids, role id -> member ids)
+        self._entries: dict[int, tuple[float, frozenset[int], dict[int, frozenset[int]]]] = {}
+        self._scans: dict[int, tuple[frozenset[int], asyncio.Task]] = {}
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        if guild_id is None: self._entries.clear()
+        else: self._entries.pop(guild_id, None)
+
+    async def member_ids(self, guild: discord.Guild, role_ids) -> list[int]:
+        wanted = [int(r) for r in role_ids]
+        settings = member_cache_settings()
+        if settings["mode"] != "lean" or guild.chunked:
+            by_role = {}
+            for rid in wanted:
+                role = guild.get_role(rid)
+                by_role[rid] = [m.id for m in role.members if not m.bot] if role else []
+        else:
+            entry = self._entries.get(guild.id)
+            if entry is None or not set(wanted) <= entry[1]:
+                entry = await asyncio.shield(self._scan(guild, frozenset(wanted)))  # nothing usable yet: wait
+            elif time.monotonic() - entry[0] >= float(settings["ttl_seconds"]):
+                self._scan(guild, frozenset(wanted))  # stale: keep serving it while a scan refreshes it
+            by_role = entry[2]
+        return list(dict.fromkeys(uid for rid in wanted for uid in by_role.get(rid, ())))
+
+    def _scan(self, guild: discord.Guild, wanted: frozenset[int]) -> asyncio.Task:
+        # the running scan for this guild if it covers `wanted`, else a new one
+        running = self._scans.get(guild.id)
+        if running and wanted <= running[0]:
+            return running[1]
+        # track every support role of the guild so one scan serves all ticket types
+        gp = PERMS.for_guild(guild.id)
+        tracked = wanted | gp.global_roles
+        for roles in gp.per_type.values(): tracked |= roles
+        task = asyncio.create_task(self._fetch(guild, tracked))
+        self._scans[guild.id] = (tracked, task)
+        task.add_done_callback(lambda t, gid=guild.id: self._scan_done(gid, t))
+        return task
+
+    def _scan_done(self, guild_id: int, task: asyncio.Task) -> None:
+        running = self._scans.get(guild_id)
+        if running and running[1] is task:
+            self._scans.pop(guild_id, None)
+        # background refreshes have nobody awaiting them; the old entry stays in use
+        if not task.cancelled() and task.exception() is not None:
+            e = task.exception()
+            log.warning("support member scan failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild_id))
+
+    async def _fetch(self, guild: discord.Guild, tracked: frozenset[int]):
+        found: dict[int, set[int]] = {rid: set() for rid in tracked}
+        async for m in guild.fetch_members(limit=None):
+            if m.bot: continue
+            for rid in member_role_ids(m):
+                ids = found.get(int(rid))
+                if ids is not None: ids.add(m.id)
+        entry = (time.monotonic(), tracked, {rid: frozenset(ids) for rid, ids in found.items()})
+        self._entries[guild.id] = entry
+        return entry
+
+SUPPORT_MEMBERS = SupportMemberCache()
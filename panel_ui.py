@@ -0,0 +1,92 @@
+import discord
+
+import config_store
+from config_model import CONFIGS, MAX_MODAL_TITLE, TicketType
+from botlog import ctx, get_logger
+
+log = get_logger("tickets")
+
+PANEL_SELECT_ID = "ticket_type_select"
+
+# ---------- intake modal ----------
+class IntakeModal(discord.ui.Modal):
+    # compiled subclasses carry the TextInputs as class attributes; discord.py copies them per instance
+    questions: tuple[str, ...] = ()  # question labels, in the same order as the inputs
+
+    def __init__(self, manager, ticket_type_label: str):
+        super().__init__()
+        self.manager = manager
+        self.ticket_type_label = ticket_type_label
+
+    async def on_submit(self, ix: discord.Interaction):
+        await ix.response.defer(ephemeral=True)
+        inputs = [inp for inp in self.children if isinstance(inp, discord.ui.TextInput)]
+        answers = [(q, str(inp.value)) for q, inp in zip(self.questions, inputs)]
+        await self.manager._create_after_form(ix, self.ticket_type_label, answers)
+
+def _compile_modal(ttype: TicketType) -> type[IntakeModal] | None:
+    # built from the validated model: labels, placeholders and the input count are already within discord's limits
+    if not (ttype.intake_enabled and ttype.questions):
+        return None
+    fields = {}
+    for q in ttype.questions:
+        style = discord.TextStyle.short if q.style == "short" else discord.TextStyle.paragraph
+        fields[f"field_{len(fields)}"] = discord.ui.TextInput(label=q.label, style=style, required=q.required, placeholder=q.placeholder, max_length=4000)
+    title = f"{ttype.label} – Intake"[:MAX_MODAL_TITLE]
+    # build the class in one go so Modal.__init_subclass__ registers the inputs
+    fields["questions"] = tuple(q.label for q in ttype.questions)
+    return type("CompiledIntakeModal", (IntakeModal,), fields, title=title)
+
+# ---------- panel ----------
+class TicketTypeDropdown(discord.ui.Select):
+    def __init__(self, manager, options: list[discord.SelectOption]):
+        super().__init__(placeholder="Choose a ticket type...", options=options, custom_id=PANEL_SELECT_ID)
+        self.manager = manager
+    async def callback(self, ix: discord.Interaction):
+        # resolved against the current config at click time, not the config the panel was posted with
+        try: await self.manager.create_ticket(ix, self.values[0])
+        except Exception as e:
+            log.error("create ticket failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=ix.guild_id, user_id=ix.user.id))
+            if not ix.response.is_done():
+                await ix.response.send_message("❌ Failed to create ticket.", ephemeral=True)
+
+class TicketView(discord.ui.View):
+    def __init__(self, manager, options: list[discord.SelectOption]):
+        super().__init__(timeout=None); self.add_item(TicketTypeDropdown(manager, options))
+
+class CompiledPanel:
+    """Dropdown options + intake modal classes for one guild's enabled ticket types."""
+    __slots__ = ("fingerprint", "types", "options", "modals")
+
+    def __init__(self, fingerprint: tuple[TicketType, ...]):
+        self.fingerprint = fingerprint
+        # only enabled types show in the dropdown / can be opened
+        self.types: dict[str, TicketType] = {t.label: t for t in fingerprint if t.enabled}
+        self.options: list[discord.SelectOption] = []
+        for t in self.types.values():
+            try: self.options.append(discord.SelectOption(label=t.label, description=t.description, emoji=t.emoji))
+            except Exception: continue
+        self.modals: dict[str, type[IntakeModal] | None] = {label: _compile_modal(t) for label, t in self.types.items()}
+
+class PanelUICache:
+    def __init__(self):
+        self._compiled: dict[int, tuple[tuple, CompiledPanel]] = {}  # guild_id -> (config version, panel)
+
+    def get(self, guild_id: int) -> CompiledPanel:
+        ver = config_store.version(guild_id)
+        hit = self._compiled.get(guild_id)
+        if hit and hit[0] == ver:
+            return hit[1]
+        # a config that failed validation never reaches the panel; the last good one stays up
+        model = CONFIGS.get_or_none(guild_id)
+        fingerprint = tuple(model.types.values()) if model else ()
+        # counter bumps change the file but not the UI; keep the compiled classes then
+        compiled = hit[1] if (hit and hit[1].fingerprint == fingerprint) else CompiledPanel(fingerprint)
+        self._compiled[guild_id] = (ver, compiled)
+        return compiled
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        if guild_id is None: self._compiled.clear()
+        else: self._compiled.pop(guild_id, None)
+
+PANEL_UI = PanelUICache()
@@ -0,0 +1,91 @@
+import discord
+from typing import Iterable
+
+import config_store
+
+def _ids(values) -> frozenset[int]:
+    out = set()
+    for v in (values or []):
+        try: out.add(int(v))
+        except (TypeError, ValueError): continue
+    return frozenset(out)
+
+def member_role_ids(member) -> Iterable[int]:
+    # public api only; a plain User (no guild) has no roles
+    return [r.id for r in getattr(member, "roles", ())]
+
+class GuildPermissions:
+    """Support-role sets for one guild, compiled from its config once per config version."""
+    __slots__ = ("global_roles", "per_type")
+
+    def __init__(self, cfg: dict):
+        self.global_roles = _ids(cfg.get("support_role_ids"))
+        self.per_type: dict[str, frozenset[int]] = {}
+        for t in (cfg.get("ticket_types") or []):
+            label = t.get("label")
+            if label and label not in self.per_type:
+                self.per_type[label] = self.global_roles | _ids(t.get("support_role_ids"))
+
+    def roles_for(self, ticket_type_label: str | None) -> frozenset[int]:
+        if not ticket_type_label:
+            return self.global_roles
+        return self.per_type.get(ticket_type_label, self.global_roles)
+
+class PermissionResolver:
+    def __init__(self):
+        self._guilds: dict[int, tuple[tuple, GuildPermissions]] = {}
+        self._masters: tuple[tuple, frozenset[int]] = ((), frozenset())
+
+    def masters(self) -> frozenset[int]:
+        # one or many bot masters in main_config.json
+        ver = config_store.file_version(config_store.MAIN_CONFIG_FILE)
+        if self._masters[0] != ver:
+            cfg = config_store.main_config()
+            ids = set(_ids(cfg.get("bot_master_ids")))
+            try:
+                if cfg.get("bot_master_id"): ids.add(int(cfg["bot_master_id"]))
+            except (TypeError, ValueError):
+                pass
+            self._masters = (ver, frozenset(ids))
+        return self._masters[1]
+
+    def for_guild(self, guild_id: int) -> GuildPermissions:
+        ver = config_store.version(guild_id)
+        hit = self._guilds.get(guild_id)
+        if hit and hit[0] == ver:
+            return hit[1]
+        compiled = GuildPermissions(config_store.guild_config(guild_id))
+        self._guilds[guild_id] = (ver, compiled)
+        return compiled
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        if guild_id is None: self._guilds.clear()
+        else: self._guilds.pop(guild_id, None)
+
+    # ---------- checks ----------
+    def is_admin(self, member: discord.abc.User) -> bool:
+        perms = getattr(member, "guild_permissions", None)
+        return bool(perms and perms.administrator) or (member.id in self.masters())
+
+    def has_support_role(self, member: discord.abc.User, ticket_type_label: str | None) -> bool:
+        guild = getattr(member, "guild", None)
+        if guild is None:
+            return False
+        roles = self.for_guild(guild.id).roles_for(ticket_type_label)
+        return bool(roles) and not roles.isdisjoint(member_role_ids(member))
+
+    def is_staff(self, member: discord.abc.User, ticket_type_label: str | None) -> bool:
+        return self.is_admin(member) or self.has_support_role(member, ticket_type_label)
+
+    def staff_types(self, member: discord.abc.User) -> frozenset[str] | None:
+        """Ticket types this member supports: None = all of them (admin or global role), empty = not staff."""
+        if self.is_admin(member) or self.has_support_role(member, None):
+            return None
+        guild = getattr(member, "guild", None)
+        if guild is None:
+            return frozenset()
+        mine = frozenset(member_role_ids(member))
+        return frozenset(label for label, roles in self.for_guild(guild.id).per_type.items() if not roles.isdisjoint(mine))
+
+# shared by ticket_manager and config_commands
+PERMS = PermissionResolver()
@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+
+MAX_TRACKED_USERS = 20000
+
+# defaults for the per-guild "admission" config block
+DEFAULT_ADMISSION = {
+    "user_burst": 2, "user_per_minute": 2,     # one person: a double-click's worth, then 1 per 30s
+    "guild_burst": 20, "guild_per_minute": 30,  # whole server: keeps channel creation under discord's limits
+}
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "stamp")
+
+    def __init__(self, capacity: float, per_minute: float, now: float | None = None):
+        self.capacity = max(1.0, float(capacity))
+        self.rate = max(0.0, float(per_minute)) / 60.0
+        self.tokens = self.capacity
+        self.stamp = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        if now > self.stamp:
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        # seconds until one token is available (0 = available now)
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return float("inf") if self.rate <= 0 else (1.0 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def configure(self, capacity: float, per_minute: float) -> None:
+        self.capacity = max(1.0, float(capacity)); self.rate = max(0.0, float(per_minute)) / 60.0
+        self.tokens = min(self.tokens, self.capacity)
+
+class AdmissionControl:
+    """Per-user and per-guild token buckets for ticket creation.
+
+    A request is admitted only if both buckets have a token; neither is charged otherwise,
+    so a user rejected by the guild bucket doesn't also lose their own allowance.
+    """
+    def __init__(self):
+        self._users: OrderedDict[tuple[int, int], TokenBucket] = OrderedDict()
+        self._guilds: dict[int, TokenBucket] = {}
+
+    def _bucket(self, table, key, capacity, per_minute, now) -> TokenBucket:
+        b = table.get(key)
+        if b is None:
+            b = table[key] = TokenBucket(capacity, per_minute, now)
+        else:
+            b.configure(capacity, per_minute)
+        return b
+
+    def admit(self, guild_id: int, user_id: int, limits: dict | None = None) -> float:
+        # 0.0 when admitted (tokens charged), else seconds until a retry would succeed
+        limits = limits or DEFAULT_ADMISSION
+        now = time.monotonic()
+        ub = self._bucket(self._users, (guild_id, user_id), limits["user_burst"], limits["user_per_minute"], now)
+        self._users.move_to_end((guild_id, user_id))
+        while len(self._users) > MAX_TRACKED_USERS:
+            self._users.popitem(last=False)
+        gb = self._bucket(self._guilds, guild_id, limits["guild_burst"], limits["guild_per_minute"], now)
+        wait = max(ub.wait_time(now), gb.wait_time(now))
+        if wait > 0:
+            return wait
+        ub.take(now); gb.take(now)
+        return 0.0
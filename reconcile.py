@@ -0,0 +1,117 @@
+import discord
+import asyncio, re
+
+import config_store
+from botlog import ctx, get_logger
+from config_model import CONFIGS
+
+log = get_logger("reconcile")
+
+# main_config.json "reconcile" block
+DEFAULT_RECONCILE = {"interval_minutes": 15, "batch_size": 200, "adopt": True}
+
+# channel names the bot gives tickets: ticket-0042-name / testticket-0042-name (maybe with a status mark)
+TICKET_NAME_RE = re.compile(r"^(?:[🟢🟡🔴]\s*)?(?:test)?ticket-(\d+)-")
+
+def reconcile_settings() -> dict:
+    out = dict(DEFAULT_RECONCILE)
+    out.update(config_store.main_config().get("reconcile") or {})
+    return out
+
+def _opener_from_overwrites(channel: discord.TextChannel, bot_id: int) -> int | None:
+    # tickets grant the opener a member overwrite; roles are support, the bot is us
+    for target, ow in channel.overwrites.items():
+        # uncached targets come back as discord.Object with .type set
+        if isinstance(target, discord.Role) or getattr(target, "type", None) is discord.Role or target.id == bot_id:
+            continue
+        if ow.view_channel:
+            return target.id
+    return None
+
+class TicketReconciler:
+    """Keeps open_tickets in line with the channels that actually exist.
+
+    Records whose channel is gone (deleted by hand, or while the bot was down) are
+    pruned; ticket-named channels with no record are adopted. Work is done against
+    the gateway channel cache in batches with a yield in between, so a big backlog
+    never holds the event loop. Runs once at startup and then every interval.
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def start(self) -> None:
+        # on_ready can fire again after a reconnect; keep a single loop
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task: self._task.cancel()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("reconcile pass failed: %s: %s", type(e).__name__, e)
+            await asyncio.sleep(max(1.0, float(reconcile_settings()["interval_minutes"])) * 60)
+
+    async def run_once(self) -> dict:
+        async with self._lock:
+            settings = reconcile_settings()
+            batch = max(1, int(settings["batch_size"]))
+            pruned = await self._prune(batch)
+            adopted = await self._adopt(batch) if settings["adopt"] else 0
+            await self._prune_categories()
+            if pruned or adopted:
+                self.manager.save_tickets()
+                self.manager.analytics.resync_backlog(self.manager.open_tickets)
+                log.info("reconciled open tickets", extra=ctx(pruned=pruned, adopted=adopted, tracked=len(self.manager.open_tickets)))
+            return {"pruned": pruned, "adopted": adopted}
+
+    async def _prune(self, batch: int) -> int:
+        bot, pruned = self.manager.bot, 0
+        items = list(self.manager.open_tickets.items())
+        for start in range(0, len(items), batch):
+            for cid, rec in items[start:start + batch]:
+                guild = bot.get_guild(rec.get("guild_id") or 0)
+                if guild is None or guild.unavailable:
+                    continue  # can't tell (outage, or not loaded yet); keep the record
+                if guild.get_channel(int(cid)) is None:
+                    self.manager.forget_ticket(int(cid), save=False)
+                    log.info("pruned ticket record for missing channel", extra=ctx(guild_id=guild.id, channel_id=int(cid), ticket=rec.get("number")))
+                    pruned += 1
+            await asyncio.sleep(0)
+        return pruned
+
+    async def _prune_categories(self) -> None:
+        for guild in list(self.manager.bot.guilds):
+            model = CONFIGS.get_or_none(guild.id)
+            if model and model.overflow_enabled:
+                await self.manager.categories.prune_empty(guild, model.category_ids(), model.overflow_grace_minutes * 60)
+
+    async def _adopt(self, batch: int) -> int:
+        bot, adopted = self.manager.bot, 0
+        bot_id = bot.user.id if bot.user else 0
+        for guild in list(bot.guilds):
+            channels = list(guild.text_channels)
+            for start in range(0, len(channels), batch):
+                for ch in channels[start:start + batch]:
+                    if self.manager.is_ticket(ch.id) or ch.id in self.manager.closing:
+                        continue
+                    m = TICKET_NAME_RE.match(ch.name or "")
+                    if not m:
+                        continue
+                    number = int(m.group(1))
+                    rec = {"guild_id": guild.id, "user_id": _opener_from_overwrites(ch, bot_id), "type": None,
+                           "number": number, "open_time": ch.created_at.timestamp(), "adopted": True}
+                    notes = next((t for t in ch.threads if t.name == f"notes-{m.group(1)}"), None)
+                    if notes: rec["notes_thread_id"] = notes.id
+                    self.manager._add_ticket(ch.id, rec, save=False)
+                    log.info("adopted untracked ticket channel", extra=ctx(guild_id=guild.id, channel_id=ch.id, ticket=number))
+                    adopted += 1
+                await asyncio.sleep(0)
+        return adopted
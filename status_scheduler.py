@@ -0,0 +1,96 @@
+import discord
+import asyncio, re, time
+
+from botlog import ctx, get_logger
+
+log = get_logger("status")
+
+# discord lets a channel change name/topic ~2 times per 10 minutes
+RENAME_LIMIT = 2
+RENAME_WINDOW = 600.0
+
+EMOJI_LABELS = {"approved":("🟢","Approved"), "waiting":("🟡","Waiting for Response"), "issue":("🔴","Issue / Problem")}
+
+def _strip_status_marks(name: str) -> str:
+    name = re.sub(r"^[🟢🟡🔴]\s*", "", name)
+    name = re.sub(r"[ \-]*([🟢🟡🔴])\s*$", "", name)
+    for pat in (r"\s*-\s*Approved$", r"\s*-\s*Waiting\s+for\s+Response$", r"\s*-\s*Issue\s*/\s*Problem$"):
+        name = re.sub(pat, "", name)
+    return name.strip(" -")
+
+def status_target(current_name: str, value: str) -> tuple[str, str | None]:
+    # (new channel name, new topic) for a status value; "none" clears the mark
+    base = _strip_status_marks(current_name)
+    if value == "none" or value not in EMOJI_LABELS:
+        return base, None
+    emoji, label = EMOJI_LABELS[value]
+    return f"{base[:99]}{emoji}", f"{emoji} {label}"
+
+def status_label(value: str) -> str:
+    if value not in EMOJI_LABELS:
+        return "none"
+    emoji, label = EMOJI_LABELS[value]
+    return f"{emoji} {label}"
+
+class StatusRenameScheduler:
+    """Per-channel, latest-wins status renames.
+
+    Only the newest requested status is kept per channel; it is applied as soon as
+    the channel's rename bucket has room, and anything it superseded is dropped.
+    Rename timestamps live on the ticket record so they survive restarts.
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self._pending: dict[int, tuple[str, str]] = {}   # channel_id -> (status value, reason)
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def _recent(self, channel_id: int, now: float) -> list[float]:
+        rec = self.manager.open_tickets.get(str(channel_id)) or {}
+        stamps = list(rec.get("status_renames") or [])
+        if rec.get("last_status_rename"): stamps.append(rec["last_status_rename"])  # pre-scheduler records
+        return sorted(float(t) for t in stamps if now - float(t) < RENAME_WINDOW)
+
+    def wait_time(self, channel_id: int) -> float:
+        # seconds until the bucket lets one more rename through
+        now = time.time()
+        recent = self._recent(channel_id, now)
+        if len(recent) < RENAME_LIMIT:
+            return 0.0
+        return max(0.0, recent[-RENAME_LIMIT] + RENAME_WINDOW - now)
+
+    def request(self, channel: discord.TextChannel, value: str, reason: str) -> float:
+        # remember the status right away, then make sure a worker is draining this channel
+        self.manager.set_ticket_status(channel.id, value)
+        self._pending[channel.id] = (value, reason)
+        task = self._tasks.get(channel.id)
+        if task is None or task.done():
+            self._tasks[channel.id] = asyncio.create_task(self._drain(channel))
+        return self.wait_time(channel.id)
+
+    def cancel(self, channel_id: int) -> None:
+        self._pending.pop(channel_id, None)
+        task = self._tasks.pop(channel_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    async def _drain(self, channel: discord.TextChannel):
+        cid = channel.id
+        try:
+            while cid in self._pending:
+                wait = self.wait_time(cid)
+                if wait > 0:
+                    await asyncio.sleep(wait); continue
+                value, reason = self._pending.pop(cid)
+                new_name, new_topic = status_target(channel.name, value)
+                if new_name == channel.name and (new_topic or None) == (channel.topic or None):
+                    continue
+                try:
+                    await channel.edit(name=new_name, topic=new_topic, reason=reason)
+                    self.manager.record_status_rename(cid, time.time())
+                except discord.NotFound:
+                    self._pending.pop(cid, None); return
+                except Exception as e:
+                    log.warning("status rename failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=channel.guild.id, channel_id=cid))
+        finally:
+            if self._tasks.get(cid) is asyncio.current_task():
+                self._tasks.pop(cid, None)
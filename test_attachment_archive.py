@@ -0,0 +1,84 @@
+"""AttachmentArchiver against a local aiohttp server standing in for the discord cdn.
+
+Run: python -m pytest -q test_attachment_archive.py   (or python -m unittest test_attachment_archive)
+"""
+import asyncio, os, tempfile, unittest
+
+from aiohttp import web
+
+from attachment_archive import ARCHIVE_HOSTS, AttachmentArchiver, archivable
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"x" * 1000
+
+class ArchivableTest(unittest.TestCase):
+    def test_only_discord_https_hosts(self):
+        for host in ARCHIVE_HOSTS:
+            self.assertTrue(archivable(f"https://{host}/attachments/1/2/a.png"))
+        self.assertFalse(archivable("http://cdn.discordapp.com/a.png"))           # not https
+        self.assertFalse(archivable("https://example.com/a.png"))                 # link preview origin
+        self.assertFalse(archivable("https://cdn.discordapp.com.evil.test/a.png"))  # lookalike
+        self.assertFalse(archivable("https://evil.test/?u=https://cdn.discordapp.com/a.png"))
+        self.assertFalse(archivable(""))
+
+class ArchiverTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hits: dict[str, int] = {}
+        self.release = asyncio.Event()
+        async def serve(request: web.Request):
+            name = request.match_info["name"]
+            self.hits[name] = self.hits.get(name, 0) + 1
+            if name.startswith("slow"): await self.release.wait()
+            if name.startswith("big"): return web.Response(body=b"y" * 4096)
+            if name.startswith("missing"): return web.Response(status=404)
+            return web.Response(body=PNG)
+        app = web.Application(); app.router.add_get("/{name}", serve)
+        self.runner = web.AppRunner(app); await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0); await site.start()
+        self.base = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.arch = AttachmentArchiver(folder=self.tmp.name, max_bytes=2048, allowed=lambda u: u.startswith(self.base))
+
+    async def asyncTearDown(self):
+        self.release.set()
+        await self.arch.close()
+        await self.runner.cleanup()
+        self.tmp.cleanup()
+
+    def stored_files(self) -> list[str]:
+        return [os.path.join(d, f) for d, _, files in os.walk(self.tmp.name) for f in files]
+
+    async def test_same_content_stored_once(self):
+        urls = [f"{self.base}/a.png", f"{self.base}/b.png"]
+        for u in urls: self.arch.submit(u)
+        stored = await self.arch.wait_for(urls, 5)
+        self.assertEqual(set(stored), set(urls))
+        self.assertEqual(stored[urls[0]], stored[urls[1]])
+        self.assertEqual(self.stored_files(), [stored[urls[0]]])
+        self.assertTrue(stored[urls[0]].endswith(".png"))
+        self.arch.submit(urls[0])  # already archived: no second request
+        self.assertEqual(self.hits["a.png"], 1)
+
+    async def test_disallowed_url_is_never_fetched(self):
+        self.arch = AttachmentArchiver(folder=self.tmp.name)  # default allow-list: discord hosts only
+        url = f"{self.base}/a.png"
+        self.arch.submit(url)
+        self.assertEqual(await self.arch.wait_for([url], 0.2), {})
+        self.assertEqual(self.hits, {})
+
+    async def test_wait_times_out_and_download_finishes_later(self):
+        url = f"{self.base}/slow.png"
+        self.arch.submit(url)
+        self.assertEqual(await self.arch.wait_for([url], 0.1), {})  # close moves on with the original link
+        self.release.set()
+        stored = await self.arch.wait_for([url], 5)                  # ...while the download keeps going
+        self.assertIn(url, stored)
+        self.assertTrue(os.path.exists(stored[url]))
+
+    async def test_failed_or_oversized_downloads_leave_nothing(self):
+        urls = [f"{self.base}/big.bin", f"{self.base}/missing.png"]
+        for u in urls: self.arch.submit(u)
+        self.assertEqual(await self.arch.wait_for(urls, 5), {})
+        self.assertEqual(self.stored_files(), [])  # no stray .part files either
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,34 @@
 import discord
-import os, json, re, time, html
+import asyncio, os, json, re, time
 from datetime import datetime, timezone
 from typing import Tuple, Optional
 
-CONFIG_FOLDER = "configs"
-DEFAULT_CONFIG = os.path.join(CONFIG_FOLDER, "default.json")
+import config_store
+from analytics import TicketAnalytics
+from attachment_archive import AttachmentArchiver
+from autocomplete import TYPE_LABELS
+from category_pool import CategoryPool
+from botlog import StageTimer, ctx, get_logger
+from config_model import CONFIGS, ConfigError, GuildConfig, TicketType, build_guild_config
+from permissions import PERMS
+from assignment import StaffWorkload
+from departures import DepartureQueue
+from ratelimit import AdmissionControl
+from reconcile import TicketReconciler
+from intake_store import INTAKE_STORE
+from member_cache import SUPPORT_MEMBERS
+from panel_ui import PANEL_UI, TicketView
+from transcripts import TRANSCRIPT_EXTS, TranscriptMeta, export_transcript
+from transcript_delivery import TranscriptDelivery
+from warm_pool import WarmChannelPool
+from status_scheduler import StatusRenameScheduler, RENAME_LIMIT, RENAME_WINDOW
+
+CONFIG_FOLDER = config_store.CONFIG_FOLDER
+
+log = get_logger("tickets")
+panel_log = get_logger("panel")
+transcript_log = get_logger("transcripts")
+DEFAULT_CONFIG = config_store.DEFAULT_CONFIG_FILE
 OPEN_TICKETS_FILE = "open_tickets.json"
 
 # test-mode helpers (multi-guild). if test is ON, only listed guild(s) can run commands.
@@ -30,45 +54,22 @@ def _is_test_guild(gid: int | None) -> bool:
     enabled, gids = _tm_guild_ids()
     return enabled and (gid is not None) and (gid in gids)
 
-def _bot_masters() -> set[int]:
-    # you can have one or many bot masters in main_config.json
-    try:
-        with open("main_config.json", "r", encoding="utf-8") as f:
-            cfg = json.load(f)
-        ids = set()
-        if cfg.get("bot_master_id"): ids.add(int(cfg["bot_master_id"]))
-        for v in (cfg.get("bot_master_ids") or []): ids.add(int(v))
-        return ids
-    except Exception:
-        return set()
-
 def get_config_path(guild_id: int) -> str:
-    return os.path.join(CONFIG_FOLDER, f"{guild_id}.json")
+    return config_store.guild_config_path(guild_id)
 
 def load_config(guild_id: int) -> dict:
-    path = get_config_path(guild_id)
-    os.makedirs(CONFIG_FOLDER, exist_ok=True)
-    if not os.path.exists(path):
-        with open(DEFAULT_CONFIG, "r", encoding="utf-8") as df:
-            default_data = json.load(df)
-        with open(path, "w", encoding="utf-8") as nf:
-            json.dump(default_data, nf, indent=2)
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # default.json + this guild's overrides; no file is written until something differs
+    return config_store.load_guild_config(guild_id)
 
 def save_config(guild_id: int, data: dict) -> None:
-    os.makedirs(CONFIG_FOLDER, exist_ok=True)
-    with open(get_config_path(guild_id), "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    # only the differences from default.json are stored; queued and written atomically
+    config_store.save_guild_config(guild_id, data)
 
 def load_open_tickets() -> dict:
-    if not os.path.exists(OPEN_TICKETS_FILE): return {}
-    with open(OPEN_TICKETS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return config_store.load_json(OPEN_TICKETS_FILE)
 
 def save_open_tickets(data: dict) -> None:
-    with open(OPEN_TICKETS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    config_store.write_json(OPEN_TICKETS_FILE, data)
 
 def _sanitize_username(name: str) -> str:
     # keep channel names readable + safe
@@ -78,11 +79,126 @@ class TicketManager:
     def __init__(self, bot: discord.Client):
         self.bot = bot
         self.open_tickets = load_open_tickets()
+        # (guild_id, user_id) -> channel ids, so per-user lookups never scan every ticket
+        self._by_user: dict[tuple[int, int], set[str]] = {}
+        self._by_guild: dict[int, set[str]] = {}  # guild -> channel ids (the /tickets dashboard)
+        for cid, rec in self.open_tickets.items(): self._index_ticket(cid, rec)
+        # in-flight creations: first request per (guild, user, type) + reservations per (guild, user)
+        self._creating: dict[tuple[int, int, str], asyncio.Future] = {}
+        self._reserved: dict[tuple[int, int], int] = {}
+        self.admission = AdmissionControl()
+        self.status_scheduler = StatusRenameScheduler(self)
+        self.reconciler = TicketReconciler(self)
+        self.categories = CategoryPool()
+        self.warm_pool = WarmChannelPool(self)
+        self.workload = StaffWorkload(self)
+        self.departures = DepartureQueue(self)  # members who left: their tickets close in paced batches
+        self.closing: set[int] = set()  # record already dropped, channel delete still in flight
+        self.analytics = TicketAnalytics()
+        self.archiver = AttachmentArchiver()
+        self.deliveries = TranscriptDelivery(bot)
+        self.analytics.resync_backlog(self.open_tickets)
+
+    async def shutdown(self) -> None:
+        # before exit / exec-restart: release what the background helpers hold
+        self.reconciler.stop()
+        self.warm_pool.stop()
+        await self.archiver.close()
 
     # ---------- helpers ----------
+
     def get_config(self, guild_id: int) -> dict:
         return load_config(guild_id)
 
+    # ---------- ticket records (all adds/removes go through here to keep the index right) ----------
+    def _index_ticket(self, cid, rec: dict) -> None:
+        self._by_user.setdefault((rec.get("guild_id"), rec.get("user_id")), set()).add(str(cid))
+        self._by_guild.setdefault(rec.get("guild_id"), set()).add(str(cid))
+
+    def _add_ticket(self, channel_id: int, rec: dict, save: bool = True) -> None:
+        self.open_tickets[str(channel_id)] = rec
+        self._index_ticket(channel_id, rec)
+        if save: save_open_tickets(self.open_tickets)
+
+    def _remove_ticket(self, channel_id: int, save: bool = True) -> dict | None:
+        rec = self.open_tickets.pop(str(channel_id), None)
+        if rec is not None:
+            key = (rec.get("guild_id"), rec.get("user_id"))
+            ids = self._by_user.get(key)
+            if ids is not None:
+                ids.discard(str(channel_id))
+                if not ids: self._by_user.pop(key, None)
+            ids = self._by_guild.get(rec.get("guild_id"))
+            if ids is not None:
+                ids.discard(str(channel_id))
+                if not ids: self._by_guild.pop(rec.get("guild_id"), None)
+            self.workload.ticket_removed(channel_id, rec)
+            if save: save_open_tickets(self.open_tickets)
+        return rec
+
+    def save_tickets(self) -> None:
+        save_open_tickets(self.open_tickets)
+
+    def is_ticket(self, channel_id: int) -> bool:
+        # tickets are whatever we track; channel names are never trusted
+        return str(channel_id) in self.open_tickets
+
+    def forget_ticket(self, channel_id: int, save: bool = True) -> dict | None:
+        # channel is gone without going through close (deleted by hand, reconciliation)
+        self.status_scheduler.cancel(channel_id)
+        rec = self._remove_ticket(channel_id, save=save)
+        if rec is not None:
+            self.analytics.ticket_closed(rec.get("guild_id"), rec.get("type"), rec.get("open_time"), time.time(), timed=False)
+        return rec
+
+    def tickets_of(self, guild_id: int, user_id: int) -> list[str]:
+        return list(self._by_user.get((guild_id, user_id), ()))
+
+    def tickets_of_many(self, guild_id: int, user_ids) -> list[str]:
+        return [cid for uid in user_ids for cid in self._by_user.get((guild_id, uid), ())]
+
+    def guild_tickets(self, guild_id: int) -> list[str]:
+        return list(self._by_guild.get(guild_id, ()))
+
+    # ---------- status (state lives here, renames go through the scheduler) ----------
+    def set_ticket_status(self, channel_id: int, value: str) -> None:
+        rec = self.open_tickets.get(str(channel_id))
+        if rec is None:
+            return
+        if value == "none": rec.pop("status", None)
+        else: rec["status"] = value
+        save_open_tickets(self.open_tickets)
+        self.analytics.status_changed(rec.get("guild_id"), value)
+
+    # first reply from staff (not the opener) in a ticket; O(1) per message
+    def note_message(self, message: discord.Message) -> None:
+        if message.author.bot or message.guild is None:
+            return
+        rec = self.open_tickets.get(str(message.channel.id))
+        if rec is None or rec.get("first_staff_reply") or message.author.id == rec.get("user_id"):
+            return
+        if not PERMS.is_staff(message.author, rec.get("type")):
+            return
+        ts = message.created_at.timestamp()
+        rec["first_staff_reply"] = ts
+        model = CONFIGS.get_or_none(message.guild.id)
+        self.workload.staff_replied(message.channel.id, rec, message.author.id, claim=bool(model and model.assignment_enabled))
+        save_open_tickets(self.open_tickets)
+        self.analytics.first_staff_reply(rec.get("guild_id"), rec.get("type"), float(rec.get("open_time") or ts), ts)
+
+    def record_status_rename(self, channel_id: int, ts: float) -> None:
+        rec = self.open_tickets.get(str(channel_id))
+        if rec is None:
+            return
+        rec.pop("last_status_rename", None)  # legacy single-timestamp field
+        recent = [float(t) for t in (rec.get("status_renames") or []) if ts - float(t) < RENAME_WINDOW]
+        rec["status_renames"] = recent[-(RENAME_LIMIT - 1):] + [ts]
+        save_open_tickets(self.open_tickets)
+
+    def mentions_allowed(self, guild_id: int) -> bool:
+        # no pings in test mode
+        return not _is_test_guild(guild_id)
+
     def _make_overwrites(self, guild: discord.Guild, opener: discord.abc.User, support_role_ids: list[int]) -> dict:
         # default: hide from everyone, allow opener + support
         ow = {
@@ -127,21 +243,16 @@ class TicketManager:
         return str(n).zfill(width), n
 
     # ---------- per-user limit (staff + masters exempt) ----------
-    def _user_limit_violation(self, member: discord.Member, cfg: dict, combined_roles: list[int]) -> Optional[str]:
-        max_open = int(cfg.get("user_limit_max_open") or 0)
+    def _user_limit_violation(self, member: discord.Member, model: GuildConfig, type_label: str | None) -> Optional[str]:
+        max_open = model.user_limit_max_open
         if max_open <= 0:
             return None
-        # exemptions
-        if member.guild_permissions.administrator:
+        # exemptions: admins, bot masters, anyone with a support role (global or per-type)
+        if PERMS.is_staff(member, type_label):
             return None
-        if member.id in _bot_masters():
-            return None
-        # staff exempt if they have any support role (global or per-type combined)
-        if any((member.guild.get_role(rid) in member.roles) for rid in combined_roles if member.guild.get_role(rid)):
-            return None
-        # count how many tickets this user currently owns in this guild
-        count = sum(1 for _, rec in (self.open_tickets or {}).items()
-                    if rec.get("guild_id") == member.guild.id and rec.get("user_id") == member.id)
+        # open tickets plus creations still in flight for this user in this guild
+        key = (member.guild.id, member.id)
+        count = len(self._by_user.get(key, ())) + self._reserved.get(key, 0)
         if count >= max_open:
             return f"You already have {count} open ticket(s). Limit is {max_open}."
         return None
@@ -170,11 +281,11 @@ class TicketManager:
                         await msg.delete()
                         deleted += 1
                     except Exception as e:
-                        print(f"[⚠️ Panel delete error] {type(e).__name__}: {e}")
+                        panel_log.warning("panel delete failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=channel.guild.id, channel_id=channel.id))
         except Exception as e:
-            print(f"[⚠️ Panel sweep error] {type(e).__name__}: {e}")
+            panel_log.warning("panel sweep failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=channel.guild.id, channel_id=channel.id))
         if deleted:
-            print(f"🧽 Removed {deleted} old panel message(s) in #{channel.name}")
+            panel_log.info("removed %d old panel message(s) in #%s", deleted, channel.name, extra=ctx(guild_id=channel.guild.id, channel_id=channel.id))
 
     async def send_ticket_panel(self, interaction: discord.Interaction):
         if not _tm_allows_guild(interaction.guild_id):
@@ -189,155 +300,233 @@ class TicketManager:
         await self._delete_old_panels(channel)
         await self._send_ticket_panel_internal(channel.guild.id, channel)
 
-    async def _send_ticket_panel_internal(self, guild_id: int, channel: discord.TextChannel, interaction: discord.Interaction | None = None):
-        config = load_config(guild_id)
-        # only show enabled types in the dropdown
-        ticket_types: list[dict] = [t for t in (config.get("ticket_types") or []) if t.get("enabled", True)]
-
-        async def _create_after_form(ix: discord.Interaction, ticket_type_label: str, form_answers: list[tuple[str,str]] | None):
-            guild = ix.guild
-            ttype = next((t for t in ticket_types if t.get("label") == ticket_type_label), {})
-            per_type_roles = ttype.get("support_role_ids", []) or []
-            global_roles = config.get("support_role_ids", []) or []
-            combined_roles = list(dict.fromkeys(per_type_roles + global_roles))
-            # per-user limit (staff/masters exempt)
-            violation = self._user_limit_violation(ix.user, config, combined_roles)
-            if violation:
-                await ix.followup.send(f"❌ {violation}", ephemeral=True); return
-
-            # make a pretty, stable channel name
-            padded, number = self._next_ticket_number(guild.id, ticket_type_label, config)
-            uname = _sanitize_username(ix.user.name)
-            prefix = "testticket" if (guild.id == 1354566385438691479 and _is_test_guild(guild.id)) else "ticket"
-            ch_name = f"{prefix}-{padded}-{uname}"
-
-            # create the channel (explicit null category_id => top-level)
-            try:
-                if "category_id" in ttype:
-                    cid = ttype.get("category_id")
-                    cat = guild.get_channel(cid) if cid else None
-                else:
-                    cat = guild.get_channel(config.get("ticket_category_id"))
-                overwrites = self._make_overwrites(guild, ix.user, combined_roles)
-                ticket_channel = await guild.create_text_channel(
-                    name=ch_name,
-                    category=cat if isinstance(cat, discord.CategoryChannel) else None,
-                    overwrites=overwrites
-                )
-            except Exception as e:
-                print(f"[❌ CREATE CHANNEL ERROR] {type(e).__name__}: {e}")
-                await ix.followup.send("❌ Could not create a ticket channel (check permissions/config).", ephemeral=True)
-                return
+    async def create_ticket(self, ix: discord.Interaction, ticket_type_label: str):
+        if not _tm_allows_guild(getattr(ix.guild, "id", None)):
+            await ix.response.send_message("Test mode is active. This bot only works in the designated test server.", ephemeral=True)
+            return
 
-            # store metadata so we can manage status, notes thread, etc.
-            self.open_tickets[str(ticket_channel.id)] = {
-                "guild_id": guild.id, "user_id": ix.user.id, "type": ticket_type_label,
-                "number": number, "open_time": time.time()
-            }
-            save_open_tickets(self.open_tickets)
+        compiled = PANEL_UI.get(ix.guild.id)
+        if ticket_type_label not in compiled.types:
+            await ix.response.send_message("❌ That ticket type is no longer available. Please pick another one.", ephemeral=True)
+            return
+
+        # dynamic intake form (up to 5 inputs), compiled once per config version
+        modal_cls = compiled.modals.get(ticket_type_label)
+        if modal_cls is not None:
+            await ix.response.send_modal(modal_cls(self, ticket_type_label))
+        else:
+            await ix.response.defer(ephemeral=True)
+            await self._create_after_form(ix, ticket_type_label, None)
+
+    async def _create_after_form(self, ix: discord.Interaction, ticket_type_label: str, form_answers: list[tuple[str,str]] | None):
+        guild = ix.guild
+        # always the live config (compiled + validated once per file version), never a snapshot from when the panel was posted
+        try: model = CONFIGS.get(guild.id)
+        except ConfigError as e:
+            log.error("ticket refused, config invalid: %s", e, extra=ctx(guild_id=guild.id))
+            await ix.followup.send("❌ This server's ticket config is invalid. Ask an admin to check the bot log.", ephemeral=True); return
+        ttype = model.type(ticket_type_label)
+        if ttype is None or not ttype.enabled:
+            await ix.followup.send("❌ That ticket type is no longer available. Please pick another one.", ephemeral=True); return
+
+        # a double-click or repeated selection joins the creation already in flight
+        key = (guild.id, ix.user.id, ticket_type_label)
+        first = self._creating.get(key)
+        if first is not None:
+            cid = await asyncio.shield(first)
+            if cid: await ix.followup.send(f"⏳ Your ticket is already being opened: <#{cid}>", ephemeral=True)
+            else: await ix.followup.send("❌ Your previous attempt failed. Please try again.", ephemeral=True)
+            return
+
+        # per-user limit (staff/masters exempt), in-flight creations included
+        violation = self._user_limit_violation(ix.user, model, ticket_type_label)
+        if violation:
+            await ix.followup.send(f"❌ {violation}", ephemeral=True); return
+
+        # token buckets per user and per guild so floods don't burn discord's channel-create limit
+        wait = self.admission.admit(guild.id, ix.user.id, model.admission)
+        if wait > 0:
+            await ix.followup.send(f"🐢 Lots of tickets are being opened right now. Please try again in ~{max(1, round(wait))}s.", ephemeral=True)
+            return
 
-            # minimal overview embed (your partner bot does the wordy welcome)
+        # reserve before the first await so concurrent clicks see it
+        fut = asyncio.get_running_loop().create_future()
+        self._creating[key] = fut
+        ukey = (guild.id, ix.user.id)
+        self._reserved[ukey] = self._reserved.get(ukey, 0) + 1
+        channel_id = None
+        try:
+            channel_id = await self._open_ticket(ix, ttype, model, form_answers)
+        finally:
+            self._creating.pop(key, None)
+            left = self._reserved.get(ukey, 1) - 1
+            if left > 0: self._reserved[ukey] = left
+            else: self._reserved.pop(ukey, None)
+            if not fut.done(): fut.set_result(channel_id)
+
+    async def _open_ticket(self, ix: discord.Interaction, ttype: TicketType, model: GuildConfig, form_answers: list[tuple[str,str]] | None) -> int | None:
+        guild = ix.guild
+        ticket_type_label = ttype.label
+        combined_roles = list(dict.fromkeys(ttype.support_role_ids + model.support_role_ids))
+        timer = StageTimer()
+
+        # make a pretty, stable channel name (counters live in the raw file, so bump them there)
+        padded, number = self._next_ticket_number(guild.id, ticket_type_label, load_config(guild.id))
+        timer.mark("number")
+        uname = _sanitize_username(ix.user.name)
+        prefix = "testticket" if (guild.id == 1354566385438691479 and _is_test_guild(guild.id)) else "ticket"
+        ch_name = f"{prefix}-{padded}-{uname}"
+
+        overwrites = self._make_overwrites(guild, ix.user, combined_roles)
+        # warm pool: a hidden standby channel only needs a rename + the opener's access (one edit call)
+        ticket_channel, pooled_thread_id = None, None
+        pooled = self.warm_pool.take(guild, ttype, model) if model.warm_pool_size_for(ticket_type_label) else None
+        if pooled:
             try:
-                overview = discord.Embed(
-                    title=f"Ticket #{padded}",
-                    description=f"Opened by {ix.user.mention}\nType: **{ticket_type_label}**",
-                    color=0x2f3136
-                )
-                await ticket_channel.send(embed=overview)
+                ticket_channel = await pooled[0].edit(name=ch_name, topic=None, overwrites=overwrites, reason="Ticket opened") or pooled[0]
+                pooled_thread_id = pooled[1]
             except Exception as e:
-                print(f"[⚠️ OVERVIEW EMBED ERROR] {type(e).__name__}: {e}")
+                log.warning("standby channel claim failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild.id, channel_id=pooled[0].id, ticket=number))
+                asyncio.create_task(self.warm_pool.discard(pooled[0])); pooled = None
 
-            # staff-only notes thread (private thread). lazy add support members.
+        # create the channel (explicit null category_id => top-level); a full category spills into "<name> 2", ...
+        cat = None
+        if ticket_channel is None:
             try:
-                thread = await ticket_channel.create_thread(name=f"notes-{padded}", type=discord.ChannelType.private_thread, invitable=False)
-                added = set()
-                for rid in combined_roles:
-                    role = guild.get_role(rid)
-                    if not role: continue
-                    for m in role.members:
-                        if m.bot or m.id in added: continue
-                        try: await thread.add_user(m); added.add(m.id)
-                        except Exception: pass
-                await thread.send("🗒️ Staff-only notes thread created. Use this thread for internal discussion.")
-                rec = self.open_tickets.get(str(ticket_channel.id)) or {}
-                rec["notes_thread_id"] = thread.id
-                self.open_tickets[str(ticket_channel.id)] = rec; save_open_tickets(self.open_tickets)
+                cat_id = model.category_id_for(ttype)
+                base = guild.get_channel(cat_id) if cat_id else None
+                if isinstance(base, discord.CategoryChannel):
+                    cat = await self.categories.acquire(guild, base, model.overflow_enabled, model.overflow_headroom)
+                ticket_channel = await guild.create_text_channel(
+                    name=ch_name,
+                    category=cat,
+                    overwrites=overwrites
+                )
             except Exception as e:
-                print(f"[⚠️ NOTES THREAD ERROR] {type(e).__name__}: {e}")
-            # ping support unless we're in test mode or role is excluded from mention
-            allow_mentions = not _is_test_guild(guild.id)
-            exclude = list(dict.fromkeys((config.get("no_mention_role_ids") or []) + (ttype.get("no_mention_role_ids") or [])))
-            mentions = " ".join(self._support_mentions(guild, combined_roles, exclude, allow_mentions))
-            mention_prefix = (mentions + " ") if mentions else ""
-
-            # post the control message with the Close button — and PIN it so it's easy to find
+                log.error("create channel failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild.id, ticket=number, stages=timer.stages))
+                await ix.followup.send("❌ Could not create a ticket channel (check permissions/config).", ephemeral=True)
+                return None
+            finally:
+                if cat is not None: self.categories.release(cat.id)
+
+        # store metadata so we can manage status, notes thread, etc.
+        rec = {
+            "guild_id": guild.id, "user_id": ix.user.id, "type": ticket_type_label,
+            "number": number, "open_time": time.time()
+        }
+        self._add_ticket(ticket_channel.id, rec)
+        self.analytics.ticket_created(guild.id, ticket_type_label, rec["open_time"])
+        TYPE_LABELS.note_use(guild.id, ticket_type_label)  # autocomplete ranks often-opened types first
+        timer.mark("channel")
+        where = ctx(guild_id=guild.id, channel_id=ticket_channel.id, ticket=number)
+
+        # optional routing: the least-loaded eligible staff member gets the ticket (and the only ping)
+        assignee = None
+        if model.assignment_enabled:
+            try: assignee = await self.workload.pick(guild, combined_roles, exclude=ix.user.id)
+            except Exception as e: log.warning("assignment failed: %s: %s", type(e).__name__, e, extra=where)
+            if assignee: self.workload.assign(ticket_channel.id, assignee, model.assignment_escalate_minutes * 60)
+            timer.mark("assign")
+
+        # minimal overview embed (your partner bot does the wordy welcome)
+        try:
+            overview = discord.Embed(
+                title=f"Ticket #{padded}",
+                description=f"Opened by {ix.user.mention}\nType: **{ticket_type_label}**" + (f"\nAssigned to <@{assignee}>" if assignee else ""),
+                color=0x2f3136
+            )
+            await ticket_channel.send(embed=overview)
+        except Exception as e:
+            log.warning("overview embed failed: %s: %s", type(e).__name__, e, extra=where)
+        timer.mark("overview")
+
+        # keep the intake answers (recruitment review reads them later) and show them in the ticket
+        if form_answers:
+            await self._store_intake_answers(ticket_channel, ix.user, ticket_type_label, number, form_answers)
+            timer.mark("intake")
+
+        # staff-only notes thread (private thread). lazy add support members.
+        # a standby channel already has its thread, so that part moves off the click path
+        if pooled_thread_id:
+            asyncio.create_task(self._setup_notes_thread(ticket_channel, combined_roles, padded, pooled_thread_id, where, assignee))
+        else:
+            await self._setup_notes_thread(ticket_channel, combined_roles, padded, None, where, assignee)
+        timer.mark("notes_thread")
+        # ping support unless we're in test mode or role is excluded from mention (only the assignee when routed)
+        allow_mentions = self.mentions_allowed(guild.id)
+        exclude = list(dict.fromkeys(model.no_mention_role_ids + ttype.no_mention_role_ids))
+        if assignee: mentions = f"<@{assignee}>" if allow_mentions else ""
+        else: mentions = " ".join(self._support_mentions(guild, combined_roles, exclude, allow_mentions))
+        mention_prefix = (mentions + " ") if mentions else ""
+
+        # post the control message with the Close button — and PIN it so it's easy to find
+        try:
+            ctrl_msg = await ticket_channel.send(
+                f"{mention_prefix}{ix.user.mention} A staff member will be with you shortly.",
+                view=self._close_view()
+            )
             try:
-                ctrl_msg = await ticket_channel.send(
-                    f"{mention_prefix}{ix.user.mention} A staff member will be with you shortly.",
-                    view=self._close_view()
-                )
-                try:
-                    await ctrl_msg.pin(reason="Pin ticket controls")
-                except Exception as e:
-                    print(f"[⚠️ PIN ERROR] {type(e).__name__}: {e}")
+                await ctrl_msg.pin(reason="Pin ticket controls")
             except Exception as e:
-                print(f"[❌ SEND GREETING ERROR] {type(e).__name__}: {e}")
+                log.warning("pin failed: %s: %s", type(e).__name__, e, extra=where)
+        except Exception as e:
+            log.error("send greeting failed: %s: %s", type(e).__name__, e, extra=where)
+        timer.mark("control")
 
-            await ix.followup.send(f"✅ Ticket #{padded} created!", ephemeral=True)
+        await ix.followup.send(f"✅ Ticket #{padded} created!", ephemeral=True)
+        log.info("ticket created", extra=ctx(guild_id=guild.id, channel_id=ticket_channel.id, ticket=number, type=ticket_type_label,
+                                             pooled=bool(pooled) or None, ms=timer.total_ms, stages=timer.stages))
+        return ticket_channel.id
 
-        async def create_ticket(ix: discord.Interaction, ticket_type_label: str):
-            if not _tm_allows_guild(getattr(ix.guild, "id", None)):
-                await ix.response.send_message("Test mode is active. This bot only works in the designated test server.", ephemeral=True)
-                return
+    async def _add_thread_staff(self, thread: discord.Thread, role_ids: list[int], where: dict) -> None:
+        # ids only: in lean member-cache mode these come from a small on-demand cache, not role.members
+        try: staff_ids = await SUPPORT_MEMBERS.member_ids(thread.guild, role_ids)
+        except Exception as e:
+            log.warning("support member lookup failed: %s: %s", type(e).__name__, e, extra=where); staff_ids = []
+        for uid in staff_ids:
+            try: await thread.add_user(discord.Object(id=uid))
+            except Exception: pass
 
-            ttype = next((t for t in ticket_types if t.get("label") == ticket_type_label), {})
-            intake = (ttype.get("intake_form") or {})
-
-            # dynamic intake form (up to 5 inputs)
-            if intake.get("enabled") and isinstance(intake.get("questions"), list) and intake["questions"]:
-                class IntakeModal(discord.ui.Modal, title=f"{ticket_type_label} – Intake"): pass
-                inputs = []
-                for q in intake["questions"][:5]:
-                    label = (str(q.get("label") or "")[:45]) or "Question"
-                    style = discord.TextStyle.short if str(q.get("style", "short")).lower() == "short" else discord.TextStyle.paragraph
-                    required = bool(q.get("required", True))
-                    placeholder = (str(q.get("placeholder") or "")[:80]) or None
-                    ti = discord.ui.TextInput(label=label, style=style, required=required, placeholder=placeholder, max_length=4000)
-                    setattr(IntakeModal, f"field_{len(inputs)}", ti); inputs.append(ti)
-                modal = IntakeModal()
-                async def on_submit(_self, _ix: discord.Interaction):
-                    await _ix.response.defer(ephemeral=True)
-                    answers = [(inp.label, str(inp.value)) for inp in inputs]
-                    await _create_after_form(_ix, ticket_type_label, answers)
-                modal.on_submit = on_submit
-                await ix.response.send_modal(modal)
+    async def _setup_notes_thread(self, channel: discord.TextChannel, combined_roles: list[int], padded: str, pooled_thread_id: int | None, where: dict, assignee: int | None = None):
+        guild = channel.guild
+        try:
+            thread = await self.warm_pool.claim_thread(guild, pooled_thread_id, f"notes-{padded}") if pooled_thread_id else None
+            fresh = thread is None
+            if fresh:
+                thread = await channel.create_thread(name=f"notes-{padded}", type=discord.ChannelType.private_thread, invitable=False)
+            # a routed ticket only adds its assignee; the team joins if it escalates
+            if assignee:
+                try: await thread.add_user(discord.Object(id=assignee))
+                except Exception: pass
             else:
-                await ix.response.defer(ephemeral=True)
-                await _create_after_form(ix, ticket_type_label, None)
-
-        # ---- panel UI ----
-        class TicketTypeDropdown(discord.ui.Select):
-            def __init__(self):
-                options=[]
-                for t in ticket_types:
-                    try: options.append(discord.SelectOption(label=t["label"], description=t.get("description",""), emoji=t.get("emoji")))
-                    except: continue
-                super().__init__(placeholder="Choose a ticket type...", options=options, custom_id="ticket_type_select")
-            async def callback(self, ix2: discord.Interaction):
-                try: await create_ticket(ix2, self.values[0])
-                except Exception as e:
-                    print(f"[❌ CREATE_TICKET ERROR] {type(e).__name__}: {e}")
-                    if not ix2.response.is_done():
-                        await ix2.response.send_message("❌ Failed to create ticket.", ephemeral=True)
+                await self._add_thread_staff(thread, combined_roles, where)
+            if fresh: await thread.send("🗒️ Staff-only notes thread created. Use this thread for internal discussion.")
+            rec = self.open_tickets.get(str(channel.id))
+            if rec is not None:  # may have been closed meanwhile
+                rec["notes_thread_id"] = thread.id; self.save_tickets()
+        except Exception as e:
+            log.warning("notes thread failed: %s: %s", type(e).__name__, e, extra=where)
 
-        class TicketView(discord.ui.View):
-            def __init__(self): super().__init__(timeout=None); self.add_item(TicketTypeDropdown())
+    async def _store_intake_answers(self, channel: discord.TextChannel, user: discord.abc.User, ticket_type_label: str, number: int, answers: list[tuple[str,str]]):
+        try:
+            await asyncio.to_thread(INTAKE_STORE.save, channel.guild.id, channel.id, number, ticket_type_label, user.id, str(user), answers)
+        except Exception as e:
+            log.error("intake store failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=channel.guild.id, channel_id=channel.id, ticket=number))
+        try:
+            emb = discord.Embed(title="Intake answers", color=0x2f3136)
+            for question, answer in answers[:25]:
+                emb.add_field(name=(question or "Question")[:256], value=(answer or "—")[:1024], inline=False)
+            await channel.send(embed=emb)
+        except Exception as e:
+            log.warning("intake post failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=channel.guild.id, channel_id=channel.id, ticket=number))
 
+    async def _send_ticket_panel_internal(self, guild_id: int, channel: discord.TextChannel, interaction: discord.Interaction | None = None):
+        compiled = PANEL_UI.get(guild_id)
         panel_embed = discord.Embed(title="Support Panel", description="Select the type of ticket you'd like to open.", color=0x2f3136)
         try:
-            await channel.send(embed=panel_embed, view=TicketView())
+            await channel.send(embed=panel_embed, view=TicketView(self, list(compiled.options)))
         except Exception as e:
-            print(f"[❌ PANEL SEND ERROR] {type(e).__name__}: {e}")
+            panel_log.error("panel send failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild_id, channel_id=channel.id))
             if interaction and not interaction.response.is_done():
                 await interaction.response.send_message("❌ Something went wrong while opening the panel.", ephemeral=True)
 
@@ -352,20 +541,14 @@ class TicketManager:
         return CloseView()
     # persistent views so buttons survive restarts
     async def register_persistent_views(self):
-        class FallbackTypeDropdown(discord.ui.Select):
-            def __init__(self):
-                opts=[discord.SelectOption(label="Unavailable", description="Re-open the panel to create a ticket")]
-                super().__init__(placeholder="⚠️ Reopen panel to use", options=opts, custom_id="ticket_type_select")
-            async def callback(self, ix: discord.Interaction):
-                await ix.response.send_message("⚠️ Ticket creation is disabled after a restart. Please run `/panel`.", ephemeral=True)
-        class FallbackTypeView(discord.ui.View):
-            def __init__(self): super().__init__(timeout=None); self.add_item(FallbackTypeDropdown())
+        # panel clicks resolve the config at click time, so panels posted before a restart keep working
+        placeholder=[discord.SelectOption(label="Unavailable", description="Re-open the panel to create a ticket")]
         manager=self
         class CloseView(discord.ui.View):
             def __init__(self): super().__init__(timeout=None)
             @discord.ui.button(label="Close", style=discord.ButtonStyle.red, custom_id="close_ticket_button")
             async def close(self, ix: discord.Interaction, button: discord.ui.Button): await manager.close_ticket(ix)
-        self.bot.add_view(FallbackTypeView()); self.bot.add_view(CloseView())
+        self.bot.add_view(TicketView(self, placeholder)); self.bot.add_view(CloseView())
 
     # ask how to close, with opener having fewer options
     async def close_ticket(self, interaction: discord.Interaction):
@@ -383,9 +566,7 @@ class TicketManager:
             except: pass
             return
 
-        name = (channel.name or "").lower()
-        is_ticket = name.startswith("ticket-") or name.startswith("testticket-")
-        if not is_ticket:
+        if not self.is_ticket(channel.id):
             try: await interaction.followup.send("❌ This must be used inside a ticket channel.", ephemeral=True)
             except: pass
             return
@@ -396,7 +577,7 @@ class TicketManager:
         try:
             await interaction.followup.send("How should I close this ticket?", view=view, ephemeral=True)
         except Exception as e:
-            print(f"[❌ CLOSE DIALOG ERROR] {type(e).__name__}: {e}")
+            log.error("close dialog failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=channel.guild.id, channel_id=channel.id))
 
     # keep disk tidy: if >50 transcripts, delete 20 oldest
     def _prune_transcripts_if_needed(self):
@@ -404,7 +585,9 @@ class TicketManager:
             folder = "transcripts"
             if not os.path.isdir(folder):
                 return
-            files = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(".html")]
+            keep = self.deliveries.protected_paths()  # not uploaded yet
+            files = [p for p in (os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(TRANSCRIPT_EXTS))
+                     if os.path.abspath(p) not in keep]
             if len(files) <= 50:
                 return
             files.sort(key=lambda p: os.path.getmtime(p))  # oldest first
@@ -412,10 +595,10 @@ class TicketManager:
                 try:
                     os.remove(p)
                 except Exception as e:
-                    print(f"[⚠️ prune] {type(e).__name__}: {e}")
-            print("🧹 pruned 20 old transcripts.")
+                    transcript_log.warning("prune failed for %s: %s: %s", p, type(e).__name__, e)
+            transcript_log.info("pruned 20 old transcripts")
         except Exception as e:
-            print(f"[⚠️ prune error] {type(e).__name__}: {e}")
+            transcript_log.warning("prune failed: %s: %s", type(e).__name__, e)
 
     class _ConfirmCloseView(discord.ui.View):
         def __init__(self, manager:"TicketManager", channel:discord.TextChannel): super().__init__(timeout=60); self.manager=manager; self.channel=channel
@@ -437,214 +620,61 @@ class TicketManager:
         async def cancel_opener(self, ix:discord.Interaction, _): await ix.response.edit_message(content="Close canceled.", view=None)
     async def _finalize_close(self, ix: Optional[discord.Interaction], channel: discord.TextChannel, save_transcript: bool):
         guild = channel.guild
-        config = load_config(guild.id)
+        # closing must work even if the config is broken; fall back to defaults then
+        model = CONFIGS.get_or_none(guild.id) or build_guild_config({})
         rec = self.open_tickets.get(str(channel.id)) or {}
         opener_id, per_type = rec.get("user_id"), rec.get("type")
         opener = guild.get_member(opener_id) if opener_id else None
+        timer = StageTimer()
+        where = ctx(guild_id=guild.id, channel_id=channel.id, ticket=rec.get("number"))
 
-        transcript_path = None
         if save_transcript:
-            # build a Ticket-Tool style HTML transcript (embeds, attachments, avatars, participants)
-            messages_html = []
-            participants = {}  # uid -> (name, avatar_url)
-            count = 0
             try:
-                async for msg in channel.history(limit=None, oldest_first=True):
-                    count += 1
-                    # participants
-                    try:
-                        participants[msg.author.id] = (
-                            str(msg.author),
-                            str(getattr(msg.author.display_avatar, "url", "")),
-                        )
-                    except Exception:
-                        participants[msg.author.id] = (str(msg.author), "")
-
-                    ts = msg.created_at.strftime("%Y-%m-%d %H:%M:%S")
-                    author = html.escape(str(msg.author))
-                    avatar = html.escape(str(getattr(msg.author.display_avatar, "url", "")))
-                    content = html.escape(msg.content or "").replace("\n", "<br>")
-
-                    # attachments
-                    attach_html = ""
-                    if msg.attachments:
-                        links = []
-                        for a in msg.attachments:
-                            try:
-                                links.append(f"<a href='{html.escape(a.url)}' target='_blank'>{html.escape(a.filename)}</a>")
-                            except Exception:
-                                pass
-                        if links:
-                            attach_html = f"<div class='attach'>📎 {' • '.join(links)}</div>"
-
-                    # embeds
-                    ehtml = []
-                    for e in (msg.embeds or []):
-                        try:
-                            color = f"#{(e.color.value if e.color else 0x5865F2):06x}"
-                        except Exception:
-                            color = "#5865F2"
-                        title = html.escape(e.title) if getattr(e, "title", None) else ""
-                        url = html.escape(e.url) if getattr(e, "url", None) else ""
-                        desc = html.escape(e.description) if getattr(e, "description", None) else ""
-                        if desc:
-                            desc = desc.replace("\n", "<br>")
-
-                        fields = ""
-                        try:
-                            for fld in e.fields:
-                                fname = html.escape(fld.name or "")
-                                fval = html.escape(fld.value or "").replace("\n", "<br>")
-                                fields += f"<div class='efield'><div class='fname'>{fname}</div><div class='fvalue'>{fval}</div></div>"
-                        except Exception:
-                            pass
-
-                        footer = ""
-                        try:
-                            ftxt = e.footer.text if e.footer else ""
-                            if ftxt:
-                                footer = f"<div class='efooter'>{html.escape(ftxt)}</div>"
-                        except Exception:
-                            pass
-
-                        image_html = ""
-                        try:
-                            iurl = getattr(e.image, 'url', None)
-                            if iurl:
-                                image_html = f"<img class='eimg' src='{html.escape(iurl)}'/>"
-                        except Exception:
-                            pass
-
-                        title_html = ""
-                        if title and url:
-                            title_html = f"<div class='etitle'><a href='{url}' target='_blank'>{title}</a></div>"
-                        elif title:
-                            title_html = f"<div class='etitle'>{title}</div>"
-
-                        ehtml.append(
-                            f"<div class='embed' style='border-color:{color}'>"
-                            f"{title_html}"
-                            f"{('<div class=\"edesc\">'+desc+'</div>') if desc else ''}"
-                            f"{('<div class=\"efields\">'+fields+'</div>') if fields else ''}"
-                            f"{image_html}{footer}</div>"
-                        )
-
-                    messages_html.append(
-                        "<div class='msg'>"
-                        f"<img class='avatar' src='{avatar}' onerror=\"this.style.display='none'\">"
-                        "<div class='bubble'>"
-                        f"<div class='head'><span class='author'>{author}</span>"
-                        f"<span class='time'>{ts}</span></div>"
-                        f"{('<div class=\"content\">'+content+'</div>') if content else ''}"
-                        f"{''.join(ehtml)}{attach_html}"
-                        "</div></div>"
-                    )
-
-                # Participants list (chips)
-                part_html = ""
-                if participants:
-                    chips = []
-                    for _uid, (nm, av) in participants.items():
-                        chips.append(
-                            f"<div class='chip'><img src='{html.escape(av)}' onerror=\"this.style.display='none'\">"
-                            f"<span>{html.escape(nm)}</span></div>"
-                        )
-                    part_html = "<div class='participants'><div class='ptitle'>Participants</div>" + "".join(chips) + "</div>"
-
-                os.makedirs("transcripts", exist_ok=True)
-                transcript_path = f"transcripts/{channel.name}.html"
-                number = rec.get("number")
-                opened = datetime.fromtimestamp(rec.get("open_time", time.time()), tz=timezone.utc)
-                closed = datetime.now(tz=timezone.utc)
-                topic = channel.topic or ""
-                header = (
-                    f"<div class='card'><div class='cardtitle'>Ticket Summary</div>"
-                    f"<table class='meta'>"
-                    f"<tr><th>Guild</th><td>{html.escape(guild.name)}</td></tr>"
-                    f"<tr><th>Channel</th><td>{html.escape(channel.name)}</td></tr>"
-                    f"<tr><th>Ticket #</th><td>{number}</td></tr>"
-                    f"<tr><th>Type</th><td>{html.escape(per_type or '')}</td></tr>"
-                    f"<tr><th>Opener</th><td>{html.escape(str(opener)) if opener else opener_id}</td></tr>"
-                    f"<tr><th>Opened</th><td>{opened.strftime('%Y-%m-%d %H:%M:%S UTC')}</td></tr>"
-                    f"<tr><th>Closed</th><td>{closed.strftime('%Y-%m-%d %H:%M:%S UTC')}</td></tr>"
-                    f"<tr><th>Status/Topic</th><td>{html.escape(topic)}</td></tr>"
-                    f"<tr><th>Message Count</th><td>{count}</td></tr>"
-                    f"</table></div>"
+                # one history pass feeds every configured exporter (html/jsonl/md)
+                meta = TranscriptMeta(
+                    guild=guild.name, channel=channel.name, number=rec.get("number"), ticket_type=per_type or "",
+                    opener=str(opener) if opener else str(opener_id),
+                    opened=datetime.fromtimestamp(rec.get("open_time", time.time()), tz=timezone.utc),
+                    closed=datetime.now(tz=timezone.utc), topic=channel.topic or "",
                 )
-
-                html_doc = (
-                    "<html><head><meta charset='UTF-8'>"
-                    "<style>"
-                    "body{background:#2f3136;color:#ddd;font-family:Segoe UI,Arial,sans-serif;margin:0;padding:24px}"
-                    ".card{background:#1e1f22;border:1px solid #3a3c41;border-radius:10px;padding:14px;margin-bottom:14px}"
-                    ".cardtitle{font-weight:700;margin-bottom:8px;color:#fff}"
-                    ".meta{border-collapse:collapse;width:100%}.meta th{background:#232428;color:#aaa;text-align:left;padding:6px 10px;width:180px}"
-                    ".meta td{background:#1e1f22;padding:6px 10px;border-left:1px solid #2a2c30}"
-                    ".participants{display:flex;flex-wrap:wrap;gap:8px;align-items:center;margin:10px 0 18px 0}"
-                    ".participants .ptitle{width:100%;color:#9ca3af;margin-bottom:2px}"
-                    ".chip{display:inline-flex;align-items:center;gap:8px;background:#1e1f22;border:1px solid #2a2c30;border-radius:99px;padding:4px 10px}"
-                    ".chip img{width:18px;height:18px;border-radius:50%}"
-                    ".msg{display:flex;gap:10px;margin:10px 0}"
-                    ".avatar{width:38px;height:38px;border-radius:50%;flex:0 0 38px}"
-                    ".bubble{background:#1e1f22;border:1px solid #2a2c30;border-radius:10px;padding:8px 12px;flex:1}"
-                    ".head{display:flex;justify-content:space-between;align-items:center;margin-bottom:4px}"
-                    ".author{font-weight:600;color:#fff}"
-                    ".time{color:#8a8e95;font-size:12px}"
-                    ".content{white-space:pre-wrap;line-height:1.35}"
-                    ".attach{margin-top:6px;color:#cbd5e1}.attach a{color:#93c5fd;text-decoration:none}.attach a:hover{text-decoration:underline}"
-                    ".embed{margin-top:8px;border-left:4px solid #5865F2;background:#111214;border:1px solid #2a2c30;border-radius:8px;padding:8px 10px}"
-                    ".etitle{font-weight:600;margin-bottom:4px}.etitle a{color:#c7d2fe;text-decoration:none}"
-                    ".edesc{color:#d1d5db;margin-bottom:4px}"
-                    ".efields{display:grid;grid-template-columns:repeat(auto-fit,minmax(160px,1fr));gap:6px;margin-top:6px}"
-                    ".efield{background:#1b1c1f;border:1px solid #2a2c30;border-radius:6px;padding:6px}"
-                    ".fname{font-weight:600;color:#e5e7eb;margin-bottom:2px}.fvalue{color:#cbd5e1}"
-                    ".eimg{max-width:100%;border-radius:6px;margin-top:6px}"
-                    ".efooter{color:#9ca3af;margin-top:6px;font-size:12px}"
-                    "h2{display:none}"
-                    "</style></head><body>"
-                    f"{header}{part_html}{''.join(messages_html)}</body></html>"
+                # optional local copies of attachments/avatars (discord cdn links expire)
+                paths = await export_transcript(
+                    channel, meta, list(model.transcript_formats),
+                    archiver=self.archiver if model.archive_enabled else None,
+                    archive_wait=model.archive_wait_seconds, archive_base_url=model.archive_base_url,
+                    layout=model.transcript_layout, page_size=model.transcript_page_size,
                 )
 
-                with open(transcript_path, "w", encoding="utf-8") as f:
-                    f.write(html_doc)
-
-                # post to log channel (with (test) prefix if test guild)
-                log_ch = guild.get_channel(config.get("log_channel_id"))
-                if isinstance(log_ch, discord.TextChannel):
-                    test_tag = "(test) " if _is_test_guild(guild.id) else ""
-                    await log_ch.send(content=f"{test_tag}📝 Transcript from `{channel.name}`", file=discord.File(transcript_path))
+                # hand off to the log-channel uploader (with (test) prefix if test guild); it fits the files
+                # under the guild's upload limit and retries on its own, so the delete below never waits on it
+                test_tag = "(test) " if _is_test_guild(guild.id) else ""
+                self.deliveries.submit(guild.id, channel.id, rec.get("number"), model.log_channel_id,
+                                       f"{test_tag}📝 Transcript from `{channel.name}`", paths)
 
                 # after saving one, trim the folder so it doesn't grow forever
                 self._prune_transcripts_if_needed()
 
             except Exception as e:
-                print(f"[❌ Transcript Error] {type(e).__name__}: {e}")
+                transcript_log.error("transcript failed: %s: %s", type(e).__name__, e, extra=where)
+            timer.mark("transcript")
 
         # remove opener if non-staff (so the ticket isn't hanging around for them post-close)
-        per_type_roles = []
-        if per_type:
-            ttype = next((t for t in config.get("ticket_types", []) if t.get("label") == per_type), {})
-            per_type_roles = ttype.get("support_role_ids", []) or []
-        global_roles = config.get("support_role_ids", []) or []
-        combined_roles = set(per_type_roles + global_roles)
         if opener and opener_id:
-            masters = _bot_masters()
-            is_staff = opener.id in masters or any((guild.get_role(rid) in opener.roles) for rid in combined_roles if guild.get_role(rid))
+            is_staff = opener.id in PERMS.masters() or PERMS.has_support_role(opener, per_type)
             if not is_staff:
                 try: await channel.set_permissions(opener, overwrite=None)
-                except Exception as e: print(f"[⚠️ Remove Opener Error] {type(e).__name__}: {e}")
+                except Exception as e: log.warning("remove opener failed: %s: %s", type(e).__name__, e, extra=where)
 
         # forget that this channel existed, and delete it
-        self.open_tickets.pop(str(channel.id), None); save_open_tickets(self.open_tickets)
+        self.status_scheduler.cancel(channel.id)
+        if str(channel.id) in self.open_tickets:
+            self.analytics.ticket_closed(guild.id, per_type, rec.get("open_time"), time.time())
+        self._remove_ticket(channel.id)
+        self.closing.add(channel.id)
         try: await channel.delete()
-        except Exception as e: print(f"[❌ Channel Deletion Error] {type(e).__name__}: {e}")
-
-    # user left server? close any tickets they still own (save transcript)
-    async def autoclose_if_opener(self, member: discord.Member):
-        to_close = [int(cid) for cid, rec in self.open_tickets.items()
-                    if rec.get("guild_id")==member.guild.id and rec.get("user_id")==member.id]
-        for cid in to_close:
-            ch = member.guild.get_channel(cid)
-            if isinstance(ch, discord.TextChannel):
-                try: await self._finalize_close(None, ch, True)
-                except Exception as e: print(f"[❌ AutoClose Error] {type(e).__name__}: {e}")
+        except Exception as e: log.error("channel deletion failed: %s: %s", type(e).__name__, e, extra=where)
+        finally: self.closing.discard(channel.id)
+        timer.mark("delete")
+        log.info("ticket closed", extra=ctx(guild_id=guild.id, channel_id=channel.id, ticket=rec.get("number"), type=per_type,
+                                            transcript=save_transcript, ms=timer.total_ms, stages=timer.stages))
+
@@ -0,0 +1,172 @@
+import discord
+import asyncio, gzip, json, os, shutil, time
+
+import config_store
+from botlog import ctx, get_logger
+from transcripts import TRANSCRIPTS_FOLDER
+
+log = get_logger("transcripts")
+
+DELIVERY_FILE = "transcript_deliveries.json"
+OUTBOX_FOLDER = os.path.join(TRANSCRIPTS_FOLDER, "outbox")
+MAX_FILES_PER_MESSAGE = 10           # discord attachment cap per message
+UPLOAD_MARGIN = 64 * 1024            # multipart overhead kept free under the size limit
+RETRY_DELAYS = (5, 30, 120, 600, 1800, 3600)
+KEEP_FINISHED = 500                  # delivered/failed records kept for lookups
+
+# ---------- fitting files under the limit ----------
+def _gzip(src: str, dst: str) -> str:
+    with open(src, "rb") as f, gzip.open(dst, "wb", compresslevel=9) as out:
+        shutil.copyfileobj(f, out, 1024 * 1024)
+    return dst
+
+def _split(src: str, part_size: int) -> list[str]:
+    # sequential byte ranges: <name>.part01, .part02, ...; `cat name.part* > name` joins them
+    parts = []
+    with open(src, "rb") as f:
+        while True:
+            chunk = f.read(part_size)
+            if not chunk: break
+            p = f"{src}.part{len(parts) + 1:02d}"
+            with open(p, "wb") as out: out.write(chunk)
+            parts.append(p)
+    return parts
+
+def prepare_files(paths: list[str], limit: int, outbox: str) -> tuple[list[str], bool]:
+    """Files to upload, each under `limit`; oversized ones are gzipped, then split if still too big.
+
+    Returns (files, was_split). Blocking; run it in a thread.
+    """
+    budget = max(1024, limit - UPLOAD_MARGIN)
+    out, split = [], False
+    for p in paths:
+        if os.path.getsize(p) <= budget:
+            out.append(p); continue
+        os.makedirs(outbox, exist_ok=True)
+        gz = _gzip(p, os.path.join(outbox, os.path.basename(p) + ".gz"))
+        if os.path.getsize(gz) <= budget:
+            out.append(gz); continue
+        out.extend(_split(gz, budget)); os.remove(gz); split = True
+    return out, split
+
+def pack_messages(files: list[str], limit: int) -> list[list[str]]:
+    # greedy, in order: each message stays under the size limit and the attachment cap
+    budget = max(1024, limit - UPLOAD_MARGIN)
+    messages, cur, size = [], [], 0
+    for p in files:
+        n = os.path.getsize(p)
+        if cur and (size + n > budget or len(cur) >= MAX_FILES_PER_MESSAGE):
+            messages.append(cur); cur, size = [], 0
+        cur.append(p); size += n
+    if cur: messages.append(cur)
+    return messages
+
+# ---------- delivery queue ----------
+class TranscriptDelivery:
+    """Uploads transcripts to the log channel in the background, with retries.
+
+    Closing a ticket only enqueues a job; the channel is deleted right away and the
+    upload is retried on its own schedule (it survives restarts). Each job records
+    its status per ticket: pending -> delivered, or failed after the last retry.
+    Parts already posted are never re-sent.
+    """
+    def __init__(self, bot, path: str = DELIVERY_FILE, outbox: str = OUTBOX_FOLDER):
+        self.bot = bot
+        self.path = path
+        self.outbox = outbox
+        self.jobs: dict[str, dict] = self._load()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path): return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning("delivery state load failed: %s: %s", type(e).__name__, e)
+            return {}
+
+    def save(self) -> None:
+        finished = sorted((j.get("updated", 0), cid) for cid, j in self.jobs.items() if j["status"] != "pending")
+        for _, cid in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            self.jobs.pop(cid, None)
+        config_store.write_json(self.path, self.jobs)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    # ---------- api ----------
+    def submit(self, guild_id: int, channel_id: int, ticket: int | None, log_channel_id: int | None, caption: str, paths: list[str]) -> dict:
+        job = {"guild_id": guild_id, "ticket": ticket, "log_channel_id": log_channel_id, "caption": caption,
+               "paths": list(paths), "status": "pending" if log_channel_id else "no_log_channel",
+               "attempts": 0, "next_try": time.time(), "messages": None, "sent": 0, "error": None, "updated": time.time()}
+        self.jobs[str(channel_id)] = job
+        self.save(); self._wake.set()
+        return job
+
+    def status(self, guild_id: int, ticket: int) -> list[dict]:
+        # a closed ticket's jobs by number, newest first (per-type numbering can reuse a number)
+        found = [j for j in self.jobs.values() if j["guild_id"] == guild_id and j["ticket"] == ticket]
+        return sorted(found, key=lambda j: -j.get("updated", 0))
+
+    def protected_paths(self) -> set[str]:
+        # transcript files still waiting to go out (the folder pruner must keep them)
+        return {os.path.abspath(p) for j in self.jobs.values() if j["status"] == "pending" for p in j["paths"]}
+
+    # ---------- worker ----------
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = time.time()
+            for cid, job in list(self.jobs.items()):
+                if job["status"] == "pending" and job["next_try"] <= now:
+                    await self._attempt(cid, job)
+            pending = [j["next_try"] for j in self.jobs.values() if j["status"] == "pending"]
+            timeout = max(0.5, min(pending) - time.time()) if pending else None
+            try: await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError: pass
+
+    def _finish(self, cid: str, job: dict, status: str, error: str | None = None) -> None:
+        job.update(status=status, error=error, updated=time.time())
+        self.save()
+        shutil.rmtree(os.path.join(self.outbox, cid), ignore_errors=True)
+        where = ctx(guild_id=job["guild_id"], channel_id=int(cid), ticket=job["ticket"], status=status,
+                    attempts=job["attempts"], parts=len(job["messages"] or []))
+        if status == "delivered": log.info("transcript delivered", extra=where)
+        else: log.error("transcript delivery failed: %s", error, extra=where)
+
+    async def _attempt(self, cid: str, job: dict) -> None:
+        job["attempts"] += 1
+        try:
+            ch = self.bot.get_channel(job["log_channel_id"])
+            if not isinstance(ch, discord.TextChannel):
+                raise LookupError("log channel not found")
+            missing = [p for p in job["paths"] if not os.path.exists(p)]
+            if missing:
+                self._finish(cid, job, "failed", f"transcript file missing: {os.path.basename(missing[0])}"); return
+            # plan once (and re-plan only if nothing went out yet), so retries resume where they stopped
+            limit = min(ch.guild.filesize_limit, job.get("max_bytes") or ch.guild.filesize_limit)
+            if job["messages"] is None or (job["sent"] == 0 and job.get("limit") != limit):
+                files, split = await asyncio.to_thread(prepare_files, job["paths"], limit, os.path.join(self.outbox, cid))
+                job.update(messages=pack_messages(files, limit), limit=limit, split=split)
+            total = len(job["messages"])
+            for i in range(job["sent"], total):
+                note = f" (part {i + 1}/{total})" if total > 1 else ""
+                if job.get("split") and i == 0:
+                    note += "\nLarge transcript: join the `.partNN` files in order (`cat name.gz.part* > name.gz`), then gunzip."
+                await ch.send(content=f"{job['caption']}{note}", files=[discord.File(p) for p in job["messages"][i]])
+                job["sent"] = i + 1; job["updated"] = time.time(); self.save()
+            self._finish(cid, job, "delivered")
+        except Exception as e:
+            if isinstance(e, discord.HTTPException) and e.status == 413 and job["sent"] == 0:
+                # discord disagreed with the advertised limit; halve it and re-plan
+                job["max_bytes"] = max(1024 * 1024, int((job.get("limit") or 8 * 1024 * 1024) / 2))
+            job["error"] = f"{type(e).__name__}: {e}"
+            if job["attempts"] > len(RETRY_DELAYS):
+                self._finish(cid, job, "failed", job["error"]); return
+            job["next_try"] = time.time() + RETRY_DELAYS[job["attempts"] - 1]
+            job["updated"] = time.time(); self.save()
+            log.warning("transcript upload failed, retrying in %ss: %s", RETRY_DELAYS[job["attempts"] - 1], job["error"],
+                        extra=ctx(guild_id=job["guild_id"], channel_id=int(cid), ticket=job["ticket"], attempts=job["attempts"]))
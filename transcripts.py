@@ -0,0 +1,395 @@
+import discord
+import os, re, json, html, tempfile
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import AsyncIterator
+
+TRANSCRIPTS_FOLDER = "transcripts"
+TRANSCRIPT_EXTS = (".html", ".jsonl", ".md")
+TRANSCRIPT_LAYOUTS = ("single", "paged")   # html: one long page, or an index with message pages
+DEFAULT_PAGE_SIZE = 500
+
+# ---------- neutral message records ----------
+@dataclass(slots=True)
+class EmbedRecord:
+    color: int = 0x5865F2
+    title: str = ""
+    url: str = ""
+    description: str = ""
+    fields: list[tuple[str, str]] = field(default_factory=list)
+    footer: str = ""
+    image_url: str = ""
+
+@dataclass(slots=True)
+class AttachmentRecord:
+    filename: str
+    url: str
+
+@dataclass(slots=True)
+class MessageRecord:
+    id: int
+    author_id: int
+    author: str
+    avatar_url: str
+    created_at: datetime
+    content: str
+    attachments: list[AttachmentRecord] = field(default_factory=list)
+    embeds: list[EmbedRecord] = field(default_factory=list)
+
+@dataclass(slots=True)
+class TranscriptMeta:
+    guild: str
+    channel: str
+    number: int | None
+    ticket_type: str
+    opener: str
+    opened: datetime
+    closed: datetime
+    topic: str
+    message_count: int = 0
+    participants: dict[int, tuple[str, str]] = field(default_factory=dict)  # uid -> (name, avatar_url)
+
+def _embed_record(e: discord.Embed) -> EmbedRecord:
+    rec = EmbedRecord()
+    try: rec.color = e.color.value if e.color else 0x5865F2
+    except Exception: pass
+    rec.title = getattr(e, "title", None) or ""
+    rec.url = getattr(e, "url", None) or ""
+    rec.description = getattr(e, "description", None) or ""
+    try: rec.fields = [(f.name or "", f.value or "") for f in e.fields]
+    except Exception: pass
+    try: rec.footer = (e.footer.text if e.footer else "") or ""
+    except Exception: pass
+    # the proxy copy lives on discord's media host (archivable); the original url can be any site
+    try: rec.image_url = getattr(e.image, "proxy_url", None) or getattr(e.image, "url", None) or ""
+    except Exception: pass
+    return rec
+
+def record_from_message(msg: discord.Message) -> MessageRecord:
+    attachments = []
+    for a in (msg.attachments or []):
+        try: attachments.append(AttachmentRecord(a.filename, a.url))
+        except Exception: pass
+    return MessageRecord(
+        id=msg.id, author_id=msg.author.id, author=str(msg.author),
+        avatar_url=str(getattr(msg.author.display_avatar, "url", "") or ""),
+        created_at=msg.created_at, content=msg.content or "",
+        attachments=attachments, embeds=[_embed_record(e) for e in (msg.embeds or [])],
+    )
+
+async def iter_records(channel: discord.TextChannel) -> AsyncIterator[MessageRecord]:
+    async for msg in channel.history(limit=None, oldest_first=True):
+        yield record_from_message(msg)
+
+# ---------- links (archived media) ----------
+_LINK_TOKEN = re.compile(r"@@ARCHIVED-LINK-(\d+)@@")
+
+class LinkTable:
+    """Placeholder links for media that may get archived while history is still being read.
+
+    Exporters write a token instead of the CDN url; tokens are swapped for the archived
+    copy (or the original url) when the body is copied into the final file. Archived
+    copies are only linked when base_url says where they are served: the transcript is
+    opened from the log channel, where a path on the bot host leads nowhere.
+    """
+    def __init__(self, archiver=None, base_url: str = ""):
+        self.archiver = archiver
+        self.base_url = (base_url or "").rstrip("/")
+        self.urls: list[str] = []
+        self._ids: dict[str, int] = {}
+        self.resolved: list[str] = []
+
+    def ref(self, url: str) -> str:
+        if not url or self.archiver is None or not self.archiver.accepts(url):
+            return url
+        i = self._ids.get(url)
+        if i is None:
+            i = self._ids[url] = len(self.urls); self.urls.append(url)
+            self.archiver.submit(url)
+        return f"@@ARCHIVED-LINK-{i}@@"
+
+    async def resolve(self, timeout: float) -> int:
+        # returns how many links point at archived copies. without base_url the copies
+        # stay on disk as a backup and the transcript keeps the cdn links, so no waiting
+        stored = await self.archiver.wait_for(self.urls, timeout) if (self.archiver and self.urls and self.base_url) else {}
+        self.resolved = []
+        for url in self.urls:
+            path = stored.get(url)
+            if not path: self.resolved.append(url)
+            else: self.resolved.append(self.base_url + "/" + os.path.relpath(path, self.archiver.folder).replace(os.sep, "/"))
+        return len(stored)
+
+    def fill(self, text: str, escape) -> str:
+        if not self.urls or "@@ARCHIVED-LINK-" not in text:
+            return text
+        return _LINK_TOKEN.sub(lambda m: escape(self.resolved[int(m.group(1))]), text)
+
+# ---------- exporters ----------
+class TranscriptExporter:
+    """Streams records into one output file; subclasses render a format.
+
+    write() is called once per message as history is read and appends one line to a
+    temp spool, so no exporter holds the whole ticket in memory. finish() gets the
+    completed meta (count, participants) and copies head + body + tail line by line,
+    filling in archived links on the way.
+    """
+    ext = ""
+
+    def __init__(self, base_path: str, links: LinkTable):
+        self.path = base_path + self.ext
+        self.links = links
+        self._body = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def write(self, rec: MessageRecord) -> None: raise NotImplementedError
+    def _head(self, meta: TranscriptMeta) -> str: return ""
+    def _tail(self, meta: TranscriptMeta) -> str: return ""
+    def _escape(self, url: str) -> str: return url
+
+    def finish(self, meta: TranscriptMeta) -> str:
+        self._body.seek(0)
+        with open(self.path, "w", encoding="utf-8") as out:
+            out.write(self.links.fill(self._head(meta), self._escape))
+            for line in self._body:
+                out.write(self.links.fill(line, self._escape))
+            out.write(self.links.fill(self._tail(meta), self._escape))
+        self._body.close()
+        return self.path
+
+    def abort(self) -> None:
+        self._body.close()
+
+HTML_STYLE = (
+    "body{background:#2f3136;color:#ddd;font-family:Segoe UI,Arial,sans-serif;margin:0;padding:24px}"
+    ".card{background:#1e1f22;border:1px solid #3a3c41;border-radius:10px;padding:14px;margin-bottom:14px}"
+    ".cardtitle{font-weight:700;margin-bottom:8px;color:#fff}"
+    ".meta{border-collapse:collapse;width:100%}.meta th{background:#232428;color:#aaa;text-align:left;padding:6px 10px;width:180px}"
+    ".meta td{background:#1e1f22;padding:6px 10px;border-left:1px solid #2a2c30}"
+    ".participants{display:flex;flex-wrap:wrap;gap:8px;align-items:center;margin:10px 0 18px 0}"
+    ".participants .ptitle{width:100%;color:#9ca3af;margin-bottom:2px}"
+    ".chip{display:inline-flex;align-items:center;gap:8px;background:#1e1f22;border:1px solid #2a2c30;border-radius:99px;padding:4px 10px}"
+    ".chip img{width:18px;height:18px;border-radius:50%}"
+    ".msg{display:flex;gap:10px;margin:10px 0}"
+    ".avatar{width:38px;height:38px;border-radius:50%;flex:0 0 38px}"
+    ".bubble{background:#1e1f22;border:1px solid #2a2c30;border-radius:10px;padding:8px 12px;flex:1}"
+    ".head{display:flex;justify-content:space-between;align-items:center;margin-bottom:4px}"
+    ".author{font-weight:600;color:#fff}"
+    ".time{color:#8a8e95;font-size:12px}"
+    ".content{white-space:pre-wrap;line-height:1.35}"
+    ".attach{margin-top:6px;color:#cbd5e1}.attach a{color:#93c5fd;text-decoration:none}.attach a:hover{text-decoration:underline}"
+    ".embed{margin-top:8px;border-left:4px solid #5865F2;background:#111214;border:1px solid #2a2c30;border-radius:8px;padding:8px 10px}"
+    ".etitle{font-weight:600;margin-bottom:4px}.etitle a{color:#c7d2fe;text-decoration:none}"
+    ".edesc{color:#d1d5db;margin-bottom:4px}"
+    ".efields{display:grid;grid-template-columns:repeat(auto-fit,minmax(160px,1fr));gap:6px;margin-top:6px}"
+    ".efield{background:#1b1c1f;border:1px solid #2a2c30;border-radius:6px;padding:6px}"
+    ".fname{font-weight:600;color:#e5e7eb;margin-bottom:2px}.fvalue{color:#cbd5e1}"
+    ".eimg{max-width:100%;border-radius:6px;margin-top:6px}"
+    ".efooter{color:#9ca3af;margin-top:6px;font-size:12px}"
+    "h2{display:none}"
+)
+
+def _br(text: str) -> str:
+    return html.escape(text or "").replace("\n", "<br>")
+
+def html_embed(e: EmbedRecord, link=lambda u: u) -> str:
+    title, url = html.escape(e.title), html.escape(e.url)
+    desc = _br(e.description)
+    fields = "".join(
+        f"<div class='efield'><div class='fname'>{html.escape(n)}</div><div class='fvalue'>{_br(v)}</div></div>"
+        for n, v in e.fields
+    )
+    footer = f"<div class='efooter'>{html.escape(e.footer)}</div>" if e.footer else ""
+    image_html = f"<img class='eimg' src='{html.escape(link(e.image_url))}'/>" if e.image_url else ""
+    if title and url:
+        title_html = f"<div class='etitle'><a href='{url}' target='_blank'>{title}</a></div>"
+    elif title:
+        title_html = f"<div class='etitle'>{title}</div>"
+    else:
+        title_html = ""
+    desc_html = f"<div class=\"edesc\">{desc}</div>" if desc else ""
+    fields_html = f"<div class=\"efields\">{fields}</div>" if fields else ""
+    return f"<div class='embed' style='border-color:#{e.color:06x}'>{title_html}{desc_html}{fields_html}{image_html}{footer}</div>"
+
+def html_message(rec: MessageRecord, link=lambda u: u) -> str:
+    ts = rec.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    content = _br(rec.content)
+    attach_html = ""
+    if rec.attachments:
+        links = [f"<a href='{html.escape(link(a.url))}' target='_blank'>{html.escape(a.filename)}</a>" for a in rec.attachments]
+        attach_html = f"<div class='attach'>📎 {' • '.join(links)}</div>"
+    content_html = f"<div class=\"content\">{content}</div>" if content else ""
+    return (
+        "<div class='msg'>"
+        f"<img class='avatar' src='{html.escape(link(rec.avatar_url))}' onerror=\"this.style.display='none'\">"
+        "<div class='bubble'>"
+        f"<div class='head'><span class='author'>{html.escape(rec.author)}</span>"
+        f"<span class='time'>{ts}</span></div>"
+        f"{content_html}{''.join(html_embed(e, link) for e in rec.embeds)}{attach_html}"
+        "</div></div>"
+    )
+
+def html_summary(meta: TranscriptMeta) -> str:
+    return (
+        f"<div class='card'><div class='cardtitle'>Ticket Summary</div>"
+        f"<table class='meta'>"
+        f"<tr><th>Guild</th><td>{html.escape(meta.guild)}</td></tr>"
+        f"<tr><th>Channel</th><td>{html.escape(meta.channel)}</td></tr>"
+        f"<tr><th>Ticket #</th><td>{meta.number}</td></tr>"
+        f"<tr><th>Type</th><td>{html.escape(meta.ticket_type or '')}</td></tr>"
+        f"<tr><th>Opener</th><td>{html.escape(meta.opener)}</td></tr>"
+        f"<tr><th>Opened</th><td>{meta.opened.strftime('%Y-%m-%d %H:%M:%S UTC')}</td></tr>"
+        f"<tr><th>Closed</th><td>{meta.closed.strftime('%Y-%m-%d %H:%M:%S UTC')}</td></tr>"
+        f"<tr><th>Status/Topic</th><td>{html.escape(meta.topic)}</td></tr>"
+        f"<tr><th>Message Count</th><td>{meta.message_count}</td></tr>"
+        f"</table></div>"
+    )
+
+def html_participants(meta: TranscriptMeta, link=lambda u: u) -> str:
+    if not meta.participants:
+        return ""
+    chips = "".join(
+        f"<div class='chip'><img src='{html.escape(link(av))}' onerror=\"this.style.display='none'\">"
+        f"<span>{html.escape(nm)}</span></div>"
+        for nm, av in meta.participants.values()
+    )
+    return "<div class='participants'><div class='ptitle'>Participants</div>" + chips + "</div>"
+
+class HtmlExporter(TranscriptExporter):
+    # Ticket-Tool style page (embeds, attachments, avatars, participants)
+    ext = ".html"
+    def write(self, rec: MessageRecord) -> None:
+        self._body.write(html_message(rec, self.links.ref) + "\n")
+    def _escape(self, url: str) -> str:
+        return html.escape(url)
+    def _head(self, meta: TranscriptMeta) -> str:
+        return f"<html><head><meta charset='UTF-8'><style>{HTML_STYLE}</style></head><body>{html_summary(meta)}{html_participants(meta, self.links.ref)}"
+    def _tail(self, meta: TranscriptMeta) -> str:
+        return "</body></html>"
+
+PAGED_STYLE = (
+    ".nav{display:flex;flex-wrap:wrap;gap:8px;align-items:center;margin:14px 0}"
+    ".nav a{background:#1e1f22;border:1px solid #3a3c41;border-radius:6px;padding:4px 10px;color:#93c5fd;cursor:pointer;user-select:none}"
+    ".nav .pageno{color:#9ca3af;margin:0 6px}"
+    ".nav input{width:80px;background:#1e1f22;color:#ddd;border:1px solid #3a3c41;border-radius:6px;padding:3px 6px}"
+)
+
+# renders one page at a time from the inert page blocks; #pN in the url opens page N
+PAGED_SCRIPT = (
+    "<script>(function(){"
+    "var pages=document.querySelectorAll(\"script[type='text/x-transcript-page']\"),view=document.getElementById('page'),"
+    "size=+view.dataset.size,total=+view.dataset.total,cur=0;"
+    "function show(i,scroll){if(!pages.length)return;cur=Math.max(0,Math.min(pages.length-1,i));"
+    "view.innerHTML=pages[cur].textContent;"
+    "var label='Page '+(cur+1)+' / '+pages.length+' \u2022 messages '+(cur*size+1)+'\u2013'+Math.min(total,(cur+1)*size);"
+    "document.querySelectorAll('.pageno').forEach(function(e){e.textContent=label;});"
+    "try{history.replaceState(null,'','#p'+(cur+1));}catch(e){}"
+    "if(scroll)view.scrollIntoView();}"
+    "document.addEventListener('click',function(ev){var a=ev.target.closest('[data-go]');if(!a)return;ev.preventDefault();"
+    "var g=a.getAttribute('data-go');show(g==='first'?0:g==='last'?pages.length-1:cur+(+g),true);});"
+    "document.addEventListener('change',function(ev){if(ev.target.classList.contains('jump'))show((+ev.target.value||1)-1,true);});"
+    "var m=/^#p(\\d+)$/.exec(location.hash);show(m?+m[1]-1:0,false);"
+    "})();</script>"
+)
+
+def html_nav(pages: int) -> str:
+    return (
+        "<div class='nav'><a data-go='first'>« First</a><a data-go='-1'>‹ Prev</a><span class='pageno'></span>"
+        f"<a data-go='1'>Next ›</a><a data-go='last'>Last »</a><input class='jump' type='number' min='1' max='{pages}' placeholder='page…'></div>"
+    )
+
+class PagedHtmlExporter(HtmlExporter):
+    """Same page look, but only the summary, participants and one message page are ever in the DOM.
+
+    Messages are grouped into fixed-size pages, each kept as an inert <script> text block
+    the browser doesn't lay out or load images for; a small script swaps the current one
+    in. Opening a 50k-message ticket costs about what opening a 500-message one does.
+    (html_message escapes all text, so no message can close a page block early.)
+    """
+    def __init__(self, base_path: str, links: LinkTable, page_size: int = DEFAULT_PAGE_SIZE):
+        super().__init__(base_path, links)
+        self.page_size = max(1, int(page_size))
+        self._count = 0
+    def write(self, rec: MessageRecord) -> None:
+        if self._count % self.page_size == 0:
+            self._body.write(("</script>\n" if self._count else "") + "<script type='text/x-transcript-page'>\n")
+        self._count += 1
+        super().write(rec)
+    def _head(self, meta: TranscriptMeta) -> str:
+        pages = max(1, -(-self._count // self.page_size))
+        return (
+            f"<html><head><meta charset='UTF-8'><style>{HTML_STYLE}{PAGED_STYLE}</style></head><body>"
+            f"{html_summary(meta)}{html_participants(meta, self.links.ref)}{html_nav(pages)}"
+            f"<div id='page' data-size='{self.page_size}' data-total='{self._count}'></div>{html_nav(pages)}"
+            "<noscript><div class='card'>Messages are shown page by page; enable JavaScript to read them.</div></noscript>\n"
+        )
+    def _tail(self, meta: TranscriptMeta) -> str:
+        return ("</script>\n" if self._count else "") + PAGED_SCRIPT + "</body></html>"
+
+class MarkdownExporter(TranscriptExporter):
+    ext = ".md"
+    def write(self, rec: MessageRecord) -> None:
+        lines = [f"**{rec.author}** — {rec.created_at.strftime('%Y-%m-%d %H:%M:%S')}"]
+        if rec.content: lines.append("> " + rec.content.replace("\n", "\n> "))
+        for e in rec.embeds:
+            head = f"[{e.title}]({e.url})" if (e.title and e.url) else e.title
+            lines.append(f"> **Embed:** {head}".rstrip())
+            if e.description: lines.append("> " + e.description.replace("\n", "\n> "))
+            for n, v in e.fields: lines.append(f"> - **{n}:** {v}".replace("\n", " "))
+            if e.image_url: lines.append(f"> ![image]({self.links.ref(e.image_url)})")
+            if e.footer: lines.append(f"> _{e.footer}_")
+        for a in rec.attachments: lines.append(f"📎 [{a.filename}]({self.links.ref(a.url)})")
+        self._body.write("\n".join(lines) + "\n\n")
+    def _head(self, meta: TranscriptMeta) -> str:
+        rows = [("Guild", meta.guild), ("Channel", meta.channel), ("Ticket #", meta.number), ("Type", meta.ticket_type or ""),
+                ("Opener", meta.opener), ("Opened", meta.opened.strftime('%Y-%m-%d %H:%M:%S UTC')),
+                ("Closed", meta.closed.strftime('%Y-%m-%d %H:%M:%S UTC')), ("Status/Topic", meta.topic), ("Message Count", meta.message_count)]
+        table = "| | |\n|---|---|\n" + "".join(f"| {k} | {str(v).replace('|', '/')} |\n" for k, v in rows)
+        people = ", ".join(nm for nm, _ in meta.participants.values())
+        return f"# Ticket Summary\n\n{table}\n**Participants:** {people}\n\n---\n\n"
+
+class JsonlExporter(TranscriptExporter):
+    # one json object per message, then a trailing {"type": "summary"} line
+    ext = ".jsonl"
+    def write(self, rec: MessageRecord) -> None:
+        d = asdict(rec); d["type"] = "message"; d["created_at"] = rec.created_at.isoformat()
+        d["avatar_url"] = self.links.ref(rec.avatar_url)
+        for a in d["attachments"]: a["url"] = self.links.ref(a["url"])
+        for e in d["embeds"]: e["image_url"] = self.links.ref(e["image_url"])
+        self._body.write(json.dumps(d, ensure_ascii=False) + "\n")
+    def _escape(self, url: str) -> str:
+        return json.dumps(url, ensure_ascii=False)[1:-1]
+    def _tail(self, meta: TranscriptMeta) -> str:
+        d = {"type": "summary", "guild": meta.guild, "channel": meta.channel, "number": meta.number, "ticket_type": meta.ticket_type,
+             "opener": meta.opener, "opened": meta.opened.isoformat(), "closed": meta.closed.isoformat(), "topic": meta.topic,
+             "message_count": meta.message_count,
+             "participants": [{"id": uid, "name": nm, "avatar_url": self.links.ref(av)} for uid, (nm, av) in meta.participants.items()]}
+        return json.dumps(d, ensure_ascii=False) + "\n"
+
+EXPORTERS: dict[str, type[TranscriptExporter]] = {"html": HtmlExporter, "jsonl": JsonlExporter, "md": MarkdownExporter}
+DEFAULT_FORMATS = ["html"]
+
+def _exporter(fmt: str, base: str, links: LinkTable, layout: str, page_size: int) -> TranscriptExporter:
+    if fmt == "html" and layout == "paged":
+        return PagedHtmlExporter(base, links, page_size)
+    return EXPORTERS[fmt](base, links)
+
+async def export_transcript(channel: discord.TextChannel, meta: TranscriptMeta, formats: list[str], folder: str = TRANSCRIPTS_FOLDER,
+                            archiver=None, archive_wait: float = 10.0, archive_base_url: str = "",
+                            layout: str = "single", page_size: int = DEFAULT_PAGE_SIZE) -> list[str]:
+    # one pass over history feeds every exporter; returns the written paths.
+    # with an archiver, media downloads start as messages stream in and close waits at most archive_wait for them.
+    # layout "paged" makes the html an index page plus message pages of page_size (see PagedHtmlExporter).
+    os.makedirs(folder, exist_ok=True)
+    base = os.path.join(folder, channel.name)
+    links = LinkTable(archiver, archive_base_url)
+    exporters = [_exporter(f, base, links, layout, page_size) for f in formats]
+    try:
+        async for rec in iter_records(channel):
+            meta.message_count += 1
+            meta.participants[rec.author_id] = (rec.author, rec.avatar_url)
+            for ex in exporters:
+                ex.write(rec)
+        await links.resolve(archive_wait)
+    except BaseException:
+        for ex in exporters: ex.abort()
+        raise
+    return [ex.finish(meta) for ex in exporters]
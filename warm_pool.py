@@ -0,0 +1,155 @@
+import discord
+import asyncio, time
+
+from botlog import ctx, get_logger
+from config_model import CONFIGS, GuildConfig, TicketType
+
+log = get_logger("warmpool")
+
+POOL_NAME = "ticket-standby"
+POOL_THREAD = "notes-standby"
+POOL_TOPIC = "ticket-bot standby: "   # + type label; lets a restart find its pooled channels again
+REFILL_GAP = 2.0                      # seconds between pooled channel creations
+QUIET_SECONDS = 5.0                   # refills wait until ticket creation has been idle this long
+
+class WarmChannelPool:
+    """Hidden, pre-created ticket channels (with notes thread) per guild and ticket type.
+
+    A panel click takes one and only renames it, grants access and posts the control
+    message, instead of waiting on channel create -> overwrites -> thread create.
+    A background task tops the pools back up, one channel at a time, only while no
+    ticket is being opened, and only into categories that already have room (it never
+    creates an overflow category for a channel nobody asked for yet).
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self._pools: dict[tuple[int, str], list[tuple[int, int | None]]] = {}   # (guild, type) -> [(channel id, thread id)]
+        self._discovered: set[int] = set()
+        self._last_busy = 0.0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task: self._task.cancel()
+
+    # ---------- claim ----------
+    def take(self, guild: discord.Guild, ttype: TicketType, model: GuildConfig) -> tuple[discord.TextChannel, int | None] | None:
+        """A pooled channel for this type, removed from the pool; None when it's empty."""
+        self._last_busy = time.monotonic()
+        pool = self._pools.get((guild.id, ttype.label)) or []
+        want_base = model.category_id_for(ttype)
+        while pool:
+            cid, thread_id = pool.pop(0)
+            ch = guild.get_channel(cid)
+            if ch is None:
+                continue  # deleted by hand
+            # config moved the type to another category since this one was made
+            if want_base and not self._in_family(guild, ch, want_base):
+                asyncio.create_task(self.discard(ch)); continue
+            self._wake.set()
+            return ch, thread_id
+        self._wake.set()
+        return None
+
+    async def claim_thread(self, guild: discord.Guild, thread_id: int, name: str) -> discord.Thread | None:
+        # pooled notes threads may have been archived while waiting; editing brings them back
+        try:
+            thread = guild.get_thread(thread_id) or await guild.fetch_channel(thread_id)
+            return await thread.edit(name=name, archived=False)
+        except Exception as e:
+            log.warning("pooled notes thread unusable: %s: %s", type(e).__name__, e, extra=ctx(guild_id=guild.id, channel_id=thread_id))
+            return None
+
+    def _in_family(self, guild: discord.Guild, ch: discord.TextChannel, base_id: int) -> bool:
+        base = guild.get_channel(base_id)
+        if not isinstance(base, discord.CategoryChannel):
+            return ch.category_id is None
+        return any(cat.id == ch.category_id for _, cat in self.manager.categories._family(guild, base))
+
+    # ---------- refill ----------
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("pool refill failed: %s: %s", type(e).__name__, e)
+            self._wake.clear()
+            try: await asyncio.wait_for(self._wake.wait(), 60)
+            except asyncio.TimeoutError: pass
+
+    async def _yield_to_traffic(self) -> None:
+        while True:
+            if self.manager._creating: self._last_busy = time.monotonic()
+            idle = time.monotonic() - self._last_busy
+            if idle >= QUIET_SECONDS: return
+            await asyncio.sleep(QUIET_SECONDS - idle)
+
+    def _discover(self, guild: discord.Guild) -> None:
+        for ch in guild.text_channels:
+            if (ch.topic or "").startswith(POOL_TOPIC):
+                thread = next((t for t in ch.threads if t.name == POOL_THREAD), None)
+                self._pools.setdefault((guild.id, ch.topic[len(POOL_TOPIC):]), []).append((ch.id, thread.id if thread else None))
+        self._discovered.add(guild.id)
+
+    async def refill(self) -> int:
+        made = 0
+        for guild in list(self.manager.bot.guilds):
+            if guild.unavailable: continue
+            model = CONFIGS.get_or_none(guild.id)
+            if model is None: continue
+            if guild.id not in self._discovered: self._discover(guild)
+            want = {t.label: model.warm_pool_size_for(t.label) for t in model.types.values() if t.enabled}
+            for (gid, label), pool in list(self._pools.items()):
+                if gid != guild.id: continue
+                pool[:] = [e for e in pool if guild.get_channel(e[0]) is not None]
+                while len(pool) > want.get(label, 0):   # pool shrunk, type disabled, or pool turned off
+                    ch = guild.get_channel(pool.pop()[0])
+                    if ch: await self.discard(ch)
+            for label, size in want.items():
+                pool = self._pools.setdefault((guild.id, label), [])
+                while len(pool) < size:
+                    await self._yield_to_traffic()
+                    entry = await self._create(guild, model, model.types[label])
+                    if entry is None: break
+                    pool.append(entry); made += 1
+                    await asyncio.sleep(REFILL_GAP)
+        return made
+
+    async def _create(self, guild: discord.Guild, model: GuildConfig, ttype: TicketType) -> tuple[int, int | None] | None:
+        cat = None
+        base_id = model.category_id_for(ttype)
+        base = guild.get_channel(base_id) if base_id else None
+        if isinstance(base, discord.CategoryChannel):
+            cat = self.manager.categories.try_acquire(guild, base, model.overflow_enabled, model.overflow_headroom)
+            if cat is None:
+                return None  # no room without a new category; clicks will create one if they need it
+        where = ctx(guild_id=guild.id, type=ttype.label)
+        try:
+            ch = await guild.create_text_channel(name=POOL_NAME, category=cat, topic=POOL_TOPIC + ttype.label,
+                                                 overwrites={guild.default_role: discord.PermissionOverwrite(view_channel=False)},
+                                                 reason="Ticket standby channel")
+        except Exception as e:
+            log.warning("standby channel create failed: %s: %s", type(e).__name__, e, extra=where)
+            return None
+        finally:
+            if cat is not None: self.manager.categories.release(cat.id)
+        thread_id = None
+        try:
+            thread = await ch.create_thread(name=POOL_THREAD, type=discord.ChannelType.private_thread, invitable=False, auto_archive_duration=10080)
+            await thread.send("🗒️ Staff-only notes thread created. Use this thread for internal discussion.")
+            thread_id = thread.id
+        except Exception as e:
+            log.warning("standby notes thread failed: %s: %s", type(e).__name__, e, extra=where)
+        log.debug("standby channel ready", extra=ctx(guild_id=guild.id, channel_id=ch.id, type=ttype.label))
+        return ch.id, thread_id
+
+    async def discard(self, ch: discord.TextChannel) -> None:
+        try: await ch.delete(reason="Ticket standby channel no longer needed")
+        except Exception as e:
+            log.warning("standby channel delete failed: %s: %s", type(e).__name__, e, extra=ctx(guild_id=ch.guild.id, channel_id=ch.id))